@@ -99,7 +99,8 @@ def main():
     
     print("\nSetup completed!")
     print("\nTo start development:")
-    print("Run the development server: python manage.py runserver")
+    print("Run the server: uvicorn student_api.asgi:application --reload")
+    print("(python manage.py runserver works too, but each progress stream then holds a thread)")
     print("\nAdditional Notes:")
     print("- Make sure Tesseract OCR is installed for PDF processing")
     print("- Check README.md for more details about the project")
@@ -0,0 +1,493 @@
+"""
+Storage tiering for processed PDFs and analyzer outputs.
+
+``tier`` (run daily by ``manage.py archive_storage``) moves the files under
+``text_recognition/data`` (PDFs) and ``text_recognition/output`` that have
+not been written or read back for ``ARCHIVE_AFTER_DAYS`` into LZMA-compressed
+zip archives under ``ARCHIVE_DIR``, one folder per academic year:
+
+    archive/index.json                    path -> archive, size, mtime
+    archive/2024-2025/20260401T020000-1a2b3c.zip
+    archive/2025-2026/...
+
+Every run writes new archive segments (under a temporary name, renamed when
+complete) instead of appending to old ones, so a crash never damages what is
+already archived. Files are removed from the hot folders only once the index
+that points at their copy is saved. ``compact`` merges a year's segments into
+one and drops the copies of files deleted or replaced since. Both compress
+without holding the index lock, which restoring a file takes, so a download
+never waits for a tiering run; they take it only to update the index and
+remove files.
+
+``ensure(path)`` restores an archived file on first access, with its original
+modification time; the views, downloads and commands call it before opening
+a PDF or output file, and ``archived_files`` lets folder listings show
+archived files as if they were still there.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .jobs import TEXT_RECOGNITION_DIR, FileLock
+
+from analyzer_common.naming import infer_year  # noqa: E402  (jobs puts the analyzer sources on sys.path)
+
+logger = logging.getLogger(__name__)
+
+# Folders under text_recognition whose files are tiered
+DATA_DIR = os.path.join(TEXT_RECOGNITION_DIR, 'data')
+OUTPUT_DIR = os.path.join(TEXT_RECOGNITION_DIR, 'output')
+INDEX_NAME = 'index.json'
+# Held to change the index (briefly, also by readers restoring a file), and
+# by tiering and compaction for their whole run so that only one writes
+# segments at a time
+INDEX_LOCK = 'archive'
+WRITE_LOCK = 'archive-write'
+CHUNK_SIZE = 1024 * 1024
+# A year is compacted once it has this many segments, or once this share of
+# its archived bytes belongs to files deleted or replaced since
+COMPACT_SEGMENTS = 8
+COMPACT_STALE_RATIO = 0.25
+
+# What listings need of an archived file, in place of an ``os.stat_result``
+ArchivedStat = namedtuple('ArchivedStat', 'st_size st_mtime')
+
+_cache = {'key': None, 'index': None}
+_cache_lock = threading.Lock()
+
+
+def archive_dir():
+    return getattr(settings, 'ARCHIVE_DIR', None) or os.path.join(TEXT_RECOGNITION_DIR, 'archive')
+
+
+def archive_after_days():
+    return getattr(settings, 'ARCHIVE_AFTER_DAYS', None)
+
+
+def relative_path(path):
+    """``path`` relative to ``text_recognition``, with ``/``; ValueError outside it."""
+    relative = os.path.relpath(os.path.abspath(path), TEXT_RECOGNITION_DIR)
+    if relative.startswith('..') or os.path.isabs(relative):
+        raise ValueError(f'{path} is not under {TEXT_RECOGNITION_DIR}')
+    return relative.replace(os.sep, '/')
+
+
+def _local_path(relative):
+    return os.path.join(TEXT_RECOGNITION_DIR, *relative.split('/'))
+
+
+def academic_year(relative, mtime):
+    """The academic year in a file's path, else the one (April to March) it was written in."""
+    year = infer_year(relative)
+    if year:
+        return year
+    written = time.localtime(mtime)
+    start = written.tm_year if written.tm_mon >= 4 else written.tm_year - 1
+    return f'{start}-{start + 1}'
+
+
+@contextmanager
+def _locked(name=INDEX_LOCK):
+    lock = FileLock(name)
+    lock.acquire(blocking=True)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _index_path():
+    return os.path.join(archive_dir(), INDEX_NAME)
+
+
+def _read_index():
+    try:
+        with open(_index_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': 1, 'files': {}}
+
+
+def load_index():
+    """The index, read again only when another process has saved a new one. Do not modify it."""
+    try:
+        stat = os.stat(_index_path())
+    except FileNotFoundError:
+        return {'version': 1, 'files': {}}
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        if _cache['key'] != key:
+            _cache['index'] = _read_index()
+            _cache['key'] = key
+        return _cache['index']
+
+
+def _save_index(index):
+    os.makedirs(archive_dir(), exist_ok=True)
+    tmp_path = f'{_index_path()}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, _index_path())
+
+
+def lookup(path):
+    """Index entry of ``path``, or None when it was never archived."""
+    try:
+        return load_index()['files'].get(relative_path(path))
+    except ValueError:
+        return None
+
+
+def ensure(path):
+    """Whether ``path`` exists, restoring it from the archive first if it was archived."""
+    if os.path.exists(path):
+        return True
+    if lookup(path) is None:
+        return False
+    return rehydrate(path)
+
+
+def rehydrate(path):
+    """Extract an archived file back to ``path``; False when it is not archived."""
+    relative = relative_path(path)
+    with _locked():
+        if os.path.exists(path):
+            return True
+        index = _read_index()
+        entry = index['files'].get(relative)
+        if entry is None:
+            return False
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with zipfile.ZipFile(os.path.join(archive_dir(), entry['archive'])) as archive:
+            with archive.open(relative) as src, open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.utime(tmp_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        os.replace(tmp_path, path)
+        # Restored files stay in the hot folder until they go unread again
+        entry['rehydrated'] = time.time()
+        _save_index(index)
+    logger.info("Restored archived file", extra={
+        'path': relative, 'archive': entry['archive'], 'seconds': round(time.perf_counter() - start, 3),
+    })
+    return True
+
+
+def archived_files(directory, recursive=False):
+    """``(path, ArchivedStat)`` of the archived files in ``directory`` that are not restored."""
+    try:
+        prefix = relative_path(directory).rstrip('/') + '/'
+    except ValueError:
+        return []
+    files = []
+    for relative, entry in load_index()['files'].items():
+        if not relative.startswith(prefix) or (not recursive and '/' in relative[len(prefix):]):
+            continue
+        path = _local_path(relative)
+        if not os.path.exists(path):
+            files.append((path, ArchivedStat(entry['size'], entry['mtime_ns'] / 1e9)))
+    return sorted(files)
+
+
+def forget(paths):
+    """Drop deleted files from the index; ``compact`` later reclaims their space."""
+    relatives = set()
+    for path in paths:
+        try:
+            relatives.add(relative_path(path))
+        except ValueError:
+            continue
+    if not relatives or not relatives & set(load_index()['files']):
+        return 0
+    with _locked():
+        index = _read_index()
+        removed = [relative for relative in relatives if index['files'].pop(relative, None)]
+        if removed:
+            _save_index(index)
+    return len(removed)
+
+
+def forget_tree(directory):
+    """Forget every archived file under ``directory`` (a replaced output folder)."""
+    try:
+        prefix = relative_path(directory).rstrip('/') + '/'
+    except ValueError:
+        return 0
+    return forget(_local_path(relative) for relative in load_index()['files'] if relative.startswith(prefix))
+
+
+def _hidden(name):
+    return name.startswith('.') or name.endswith('.tmp')
+
+
+def candidates():
+    """``(relative path, path, stat)`` of every file that may be tiered."""
+    found = []
+    if os.path.isdir(DATA_DIR):
+        # Only the PDFs of the class data folders
+        for class_dir in sorted(os.listdir(DATA_DIR)):
+            folder = os.path.join(DATA_DIR, class_dir)
+            if _hidden(class_dir) or not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.lower().endswith('.pdf') and not _hidden(name):
+                    found.append(os.path.join(folder, name))
+    # Output sets are links to the run directory that is current
+    for root, dirs, names in os.walk(OUTPUT_DIR, followlinks=True):
+        # Hidden folders are analyzer staging areas and checkpoints
+        dirs[:] = sorted(name for name in dirs if not _hidden(name))
+        found.extend(os.path.join(root, name) for name in sorted(names) if not _hidden(name))
+
+    files = []
+    for path in found:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((relative_path(path), path, stat))
+    return files
+
+
+def _segment_name(year):
+    return f"{year}/{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}.zip"
+
+
+def _write_segment(year, members, read):
+    """
+    Write ``members`` (``(relative path, mtime, size)``) to a new segment of
+    ``year``; ``read(relative)`` opens each one. Returns the segment name and
+    the compressed size of every member.
+    """
+    name = _segment_name(year)
+    path = os.path.join(archive_dir(), name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    compressed = {}
+    with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_LZMA) as archive:
+        for relative, mtime, size in members:
+            info = zipfile.ZipInfo(relative, time.localtime(mtime)[:6])
+            info.compress_type = zipfile.ZIP_LZMA
+            with read(relative) as src, archive.open(info, 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        for info in archive.infolist():
+            compressed[info.filename] = info.compress_size
+    os.replace(tmp_path, path)
+    return name, compressed
+
+
+def _prune_empty_dirs():
+    """Remove the folders inside the output sets that tiering left empty."""
+    for root, dirs, names in os.walk(OUTPUT_DIR, topdown=False, followlinks=True):
+        # An output set, or the run directory it links to, stays
+        if os.path.dirname(root) != OUTPUT_DIR and root != OUTPUT_DIR and not os.listdir(root):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+def tier(days=None, dry_run=False):
+    """
+    Archive the files untouched for ``days`` (default ``ARCHIVE_AFTER_DAYS``)
+    and remove them from the hot folders; returns a report of what moved.
+    """
+    days = archive_after_days() if days is None else days
+    if days is None:
+        raise ValueError('Storage tiering is disabled (ARCHIVE_AFTER_DAYS is None)')
+    cutoff = time.time() - days * 86400
+    report = {'days': days, 'files': 0, 'bytes': 0, 'archived_bytes': 0, 'segments': [], 'released': 0}
+    with _locked(WRITE_LOCK):
+        entries = _read_index()['files']
+        groups = {}
+        release = []
+        for relative, path, stat in candidates():
+            entry = entries.get(relative)
+            if max(stat.st_mtime, (entry or {}).get('rehydrated', 0)) > cutoff:
+                continue
+            report['files'] += 1
+            report['bytes'] += stat.st_size
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                # Restored earlier and unchanged: the archived copy is still good
+                release.append((relative, path, stat))
+                continue
+            groups.setdefault(academic_year(relative, stat.st_mtime), []).append((relative, path, stat))
+        if dry_run:
+            report['years'] = sorted(groups)
+            return report
+
+        # Compressing is the slow part and runs without the index lock, so
+        # files are restored meanwhile; only segments are written here
+        written = []
+        for year, members in sorted(groups.items()):
+            paths = {relative: path for relative, path, _ in members}
+            name, compressed = _write_segment(
+                year, [(relative, stat.st_mtime, stat.st_size) for relative, _, stat in members],
+                lambda relative: open(paths[relative], 'rb'),
+            )
+            written.append((name, members, compressed))
+            report['segments'].append(name)
+            report['archived_bytes'] += sum(compressed.values())
+
+        with _locked():
+            index = _read_index()
+            entries = index['files']
+            for name, members, compressed in written:
+                for relative, path, stat in members:
+                    # Written again while it was being archived: the copy is
+                    # stale and the new content stays in the hot folder
+                    if not _unchanged(path, stat):
+                        continue
+                    entries[relative] = {
+                        'archive': name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                        'compressed': compressed[relative], 'archived': time.time(),
+                    }
+                    release.append((relative, path, stat))
+            _save_index(index)
+
+            for relative, path, stat in release:
+                entry = entries.get(relative)
+                if entry is None or (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+                    continue
+                if not _unchanged(path, stat):
+                    continue
+                os.remove(path)
+                report['released'] += stat.st_size
+            _prune_empty_dirs()
+        report['compacted'] = _compact()
+
+    logger.info("Tiered old files into the archive", extra={
+        'files': report['files'], 'bytes': report['bytes'], 'archived_bytes': report['archived_bytes'],
+        'segments': len(report['segments']), 'compacted': len(report['compacted']),
+    })
+    return report
+
+
+def _unchanged(path, stat):
+    """Whether ``path`` still has the size and modification time of ``stat``."""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return (current.st_size, current.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def _segments(year_dir):
+    return sorted(name for name in os.listdir(year_dir) if name.endswith('.zip'))
+
+
+def _compact(force=False):
+    """
+    Merge the segments of every year that needs it; the caller holds the
+    write lock. The merged segment is written without the index lock, which
+    is only taken to point the index at it and remove the old segments.
+    """
+    root = archive_dir()
+    if not os.path.isdir(root):
+        return []
+    live = {}
+    for relative, entry in _read_index()['files'].items():
+        live.setdefault(entry['archive'].split('/', 1)[0], {})[relative] = entry
+
+    compacted = []
+    for year in sorted(os.listdir(root)):
+        year_dir = os.path.join(root, year)
+        if not os.path.isdir(year_dir):
+            continue
+        segments = _segments(year_dir)
+        members = live.get(year, {})
+        total = stale = 0
+        for segment in segments:
+            with zipfile.ZipFile(os.path.join(year_dir, segment)) as archive:
+                for info in archive.infolist():
+                    total += info.compress_size
+                    entry = members.get(info.filename)
+                    if entry is None or entry['archive'] != f'{year}/{segment}':
+                        stale += info.compress_size
+        if not segments or not (
+            not members
+            or (len(segments) > 1 and (force or len(segments) >= COMPACT_SEGMENTS))
+            or stale > COMPACT_STALE_RATIO * total
+        ):
+            continue
+        size = sum(os.path.getsize(os.path.join(year_dir, segment)) for segment in segments)
+
+        name = None
+        compressed = {}
+        if members:
+            opened = {}
+
+            def read(relative):
+                segment = members[relative]['archive']
+                if segment not in opened:
+                    opened[segment] = zipfile.ZipFile(os.path.join(root, segment))
+                return opened[segment].open(relative)
+
+            try:
+                name, compressed = _write_segment(
+                    year, [(relative, entry['mtime_ns'] / 1e9, entry['size'])
+                           for relative, entry in sorted(members.items())], read,
+                )
+            finally:
+                for archive in opened.values():
+                    archive.close()
+
+        old = {f'{year}/{segment}' for segment in segments}
+        with _locked():
+            index = _read_index()
+            for relative, entry in index['files'].items():
+                # Entries forgotten meanwhile are simply gone; the others
+                # still point at the segments merged above
+                if entry['archive'] in old and relative in compressed:
+                    entry.update(archive=name, compressed=compressed[relative])
+            _save_index(index)
+            referenced = {entry['archive'] for entry in index['files'].values()}
+            for segment in segments:
+                if f'{year}/{segment}' not in referenced:
+                    os.remove(os.path.join(year_dir, segment))
+            if not os.listdir(year_dir):
+                os.rmdir(year_dir)
+        compacted.append({
+            'year': year, 'segments': len(segments), 'before': size,
+            'after': os.path.getsize(os.path.join(root, name)) if name else 0,
+        })
+    return compacted
+
+
+def compact(force=False):
+    """Merge archive segments; ``force`` merges every year with more than one."""
+    with _locked(WRITE_LOCK):
+        return _compact(force=force)
+
+
+def restore(path):
+    """Restore an archived file, or every archived file under a folder; returns the count."""
+    if lookup(path) is not None:
+        return int(rehydrate(path))
+    return sum(rehydrate(archived) for archived, _ in archived_files(path, recursive=True))
+
+
+def stats():
+    """Files and bytes per archived year, and in total."""
+    years = {}
+    for entry in load_index()['files'].values():
+        year = years.setdefault(entry['archive'].split('/', 1)[0], {'files': 0, 'bytes': 0, 'archived_bytes': 0})
+        year['files'] += 1
+        year['bytes'] += entry['size']
+    root = archive_dir()
+    for year, totals in years.items():
+        year_dir = os.path.join(root, year)
+        if os.path.isdir(year_dir):
+            segments = _segments(year_dir)
+            totals['segments'] = len(segments)
+            totals['archived_bytes'] = sum(os.path.getsize(os.path.join(year_dir, name)) for name in segments)
+    return years
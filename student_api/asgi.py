@@ -3,6 +3,10 @@ ASGI config for student_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the app through this module (for example ``uvicorn student_api.asgi:application``)
+so that the analyzer progress stream (``views.analyzer_events``) runs as an async
+view: each open stream then costs an idle coroutine instead of a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
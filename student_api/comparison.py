@@ -0,0 +1,344 @@
+"""
+Comparisons across academic years, from the stored student results.
+
+``cubes(policy)`` scans ``StudentResult`` once and grades it (with
+``analyzer_common.grading``) into pivot cubes per class:
+
+* ``bands[year, subject, band]`` with ``students``, ``passed`` and ``api``
+  per (year, subject), and the same for all subjects per year (``overall``)
+* ``(year x stream)`` students, passed, API and mean best-of-5 percentage;
+  Class X has the single stream ''
+
+The cubes are kept in memory under the data version (row count and last
+change of ``StudentResult``) and the policy version, so they are built again
+only after new results are stored. ``trend``, ``delta``, ``rank`` and
+``cohort`` then only slice the arrays.
+
+``cohort`` follows the students of a Class X year into Class XII two years
+later. Roll numbers change between the two examinations, so students are
+joined on their name; names shared by two students in either year are left
+out and counted as ``ambiguous``.
+"""
+import threading
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import StudentResult
+from . import jobs  # noqa: F401  (puts the analyzer sources on sys.path)
+
+from analyzer_common import grading  # noqa: E402
+from analyzer_common.batch import _new_analyzer  # noqa: E402
+# Name as printed on both certificates, the same key the results store uses
+from analyzer_common.student_index import name_key as identity  # noqa: E402
+
+CLASSES = ('class_10', 'class_12')
+METRICS = ('api', 'students', 'passed', 'pass_rate')
+# Cubes kept per process (one per policy version in use)
+MEMO_SIZE = 4
+
+_memo = {}
+_memo_lock = threading.Lock()
+_subject_names = {}
+
+
+def data_version():
+    """Changes whenever a student result is stored or updated."""
+    stats = StudentResult.objects.aggregate(rows=Count('id'), changed=Max('updated_at'))
+    changed = stats['changed'].timestamp() if stats['changed'] else 0
+    return f"{stats['rows']}:{changed}"
+
+
+def subject_names(class_name):
+    if class_name not in _subject_names:
+        _subject_names[class_name] = dict(_new_analyzer(class_name).subject_codes)
+    return _subject_names[class_name]
+
+
+def _rates(passed, students):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(students > 0, np.round(passed / np.maximum(students, 1) * 100, 2), np.nan)
+
+
+def _build(policy):
+    years, classes, streams, subjects, marks = [], [], [], [], []
+    student_rows = []
+    rows = StudentResult.objects.values_list('academic_year', 'class_name', 'stream', 'name', 'percentage', 'marks')
+    for year, class_name, stream, name, percentage, student_marks in rows.iterator(chunk_size=5000):
+        student_rows.append((year, class_name, stream or '', identity(name), percentage))
+        for code, mark in student_marks.items():
+            years.append(year)
+            classes.append(class_name)
+            streams.append(stream or '')
+            subjects.append(code)
+            marks.append(mark)
+
+    all_years = sorted({row[0] for row in student_rows})
+    year_index = {year: i for i, year in enumerate(all_years)}
+    n_years = len(all_years)
+    n_bands = len(policy.labels)
+    mark_year = np.array([year_index[year] for year in years], dtype=np.int64)
+    mark_class = np.array(classes, dtype=object)
+    mark_stream = np.array(streams, dtype=object)
+    mark_subject = np.array(subjects, dtype=object)
+    marks = np.array(marks, dtype=np.int64)
+
+    cube = {'policy': policy.version, 'labels': policy.labels, 'years': all_years, 'classes': {}}
+    for class_name in CLASSES:
+        in_class = mark_class == class_name
+        class_students = [row for row in student_rows if row[1] == class_name]
+        if not class_students:
+            continue
+        codes = sorted(set(mark_subject[in_class]))
+        code_index = {code: i for i, code in enumerate(codes)}
+        class_years = mark_year[in_class]
+        class_marks = marks[in_class]
+
+        subject_ids = np.array([code_index[code] for code in mark_subject[in_class]], dtype=np.int64)
+        by_subject = grading.grade_groups(class_years * len(codes) + subject_ids, class_marks, policy,
+                                          n_years * len(codes))
+        overall = grading.grade_groups(class_years, class_marks, policy, n_years)
+
+        stream_names = sorted({row[2] for row in class_students})
+        stream_index = {stream: i for i, stream in enumerate(stream_names)}
+        stream_ids = np.array([stream_index[stream] for stream in mark_stream[in_class]], dtype=np.int64)
+        by_stream = grading.grade_groups(class_years * len(stream_names) + stream_ids, class_marks, policy,
+                                         n_years * len(stream_names))
+        student_year = np.array([year_index[row[0]] for row in class_students], dtype=np.int64)
+        student_stream = np.array([stream_index[row[2]] for row in class_students], dtype=np.int64)
+        percentage = np.array([row[4] for row in class_students], dtype=float)
+        stream_cell = student_year * len(stream_names) + student_stream
+        head_count = np.bincount(stream_cell, minlength=n_years * len(stream_names))
+        percentage_sum = np.bincount(stream_cell, weights=percentage, minlength=n_years * len(stream_names))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_percentage = np.where(head_count > 0, np.round(percentage_sum / np.maximum(head_count, 1), 2),
+                                       np.nan)
+
+        shape = (n_years, len(codes))
+        stream_shape = (n_years, len(stream_names))
+        cube['classes'][class_name] = {
+            'subjects': codes,
+            'subject_names': [subject_names(class_name).get(code, code) for code in codes],
+            'subject': {
+                'bands': by_subject['bands'].reshape(n_years, len(codes), n_bands),
+                'students': by_subject['students'].reshape(shape),
+                'passed': by_subject['passed'].reshape(shape),
+                'api': by_subject['api'].reshape(shape),
+            },
+            'overall': {
+                'bands': overall['bands'],
+                'students': overall['students'],
+                'passed': overall['passed'],
+                'api': overall['api'],
+            },
+            'streams': stream_names,
+            'stream': {
+                'students': head_count.reshape(stream_shape),
+                'marks': by_stream['students'].reshape(stream_shape),
+                'passed': by_stream['passed'].reshape(stream_shape),
+                'api': by_stream['api'].reshape(stream_shape),
+                'mean_percentage': mean_percentage.reshape(stream_shape),
+            },
+            # Per student, for the cohort view
+            'student_year': student_year,
+            'student_stream': [row[2] for row in class_students],
+            'student_identity': [row[3] for row in class_students],
+            'student_percentage': percentage,
+        }
+    return cube
+
+
+def cubes(policy_version=None):
+    """Pivot cubes for ``policy_version`` (default: latest), built once per data version."""
+    policy = grading.get_policy(policy_version)
+    key = (data_version(), policy.version)
+    cube = _memo.get(key)
+    if cube is None:
+        with _memo_lock:
+            cube = _memo.get(key)
+            if cube is None:
+                cube = _build(policy)
+                cube['data_version'] = key[0]
+                # Cubes of an older data version are stale
+                for old in [k for k in _memo if k[0] != key[0]]:
+                    del _memo[old]
+                while len(_memo) >= MEMO_SIZE:
+                    del _memo[next(iter(_memo))]
+                _memo[key] = cube
+    return cube
+
+
+def _class_cube(cube, class_name):
+    if class_name not in CLASSES:
+        raise ValueError(f"Unknown class {class_name!r}; expected class_10 or class_12")
+    if class_name not in cube['classes']:
+        raise ValueError(f'No stored results for {class_name}')
+    return cube['classes'][class_name]
+
+
+def _year(cube, year):
+    try:
+        return cube['years'].index(year)
+    except ValueError:
+        raise ValueError(f'No stored results for {year}')
+
+
+def _value(value):
+    value = value.item() if hasattr(value, 'item') else value
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def _series(class_cube, labels, metric, subject=None, stream=None):
+    """``years``-long array of ``metric`` for one subject, stream, or the whole class."""
+    if stream is not None:
+        if stream not in class_cube['streams']:
+            raise ValueError(f'Unknown stream {stream!r}')
+        cells = {key: values[:, class_cube['streams'].index(stream)] for key, values in class_cube['stream'].items()}
+        cells['bands'] = None
+    elif subject:
+        if subject not in class_cube['subjects']:
+            raise ValueError(f'Unknown subject {subject!r}')
+        i = class_cube['subjects'].index(subject)
+        cells = {key: values[:, i] for key, values in class_cube['subject'].items()}
+    else:
+        cells = class_cube['overall']
+    if metric == 'pass_rate':
+        return _rates(cells['passed'], cells['marks'] if stream is not None else cells['students'])
+    if metric in cells:
+        return cells[metric]
+    if metric in labels and cells.get('bands') is not None:
+        return cells['bands'][:, labels.index(metric)]
+    raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS + tuple(labels))}")
+
+
+def trend(class_name, metric='api', subject=None, stream=None, policy_version=None):
+    """``metric`` for every stored year, for a subject, a stream or the whole class."""
+    cube = cubes(policy_version)
+    values = _series(_class_cube(cube, class_name), cube['labels'], metric, subject, stream)
+    return {
+        'class': class_name, 'metric': metric, 'subject': subject, 'stream': stream,
+        'points': [{'year': year, 'value': _value(value)} for year, value in zip(cube['years'], values)],
+    }
+
+
+def _breakdown(cube, class_name, by, metric):
+    """``[(key, name, years-long values), ...]`` for every subject or stream of a class."""
+    class_cube = _class_cube(cube, class_name)
+    if by == 'subject':
+        return [
+            (code, name, _series(class_cube, cube['labels'], metric, subject=code))
+            for code, name in zip(class_cube['subjects'], class_cube['subject_names'])
+        ]
+    if by == 'stream':
+        return [
+            (stream, stream.capitalize() or 'Unspecified', _series(class_cube, cube['labels'], metric, stream=stream))
+            for stream in class_cube['streams']
+        ]
+    raise ValueError(f"Unknown breakdown {by!r}; expected subject or stream")
+
+
+def delta(class_name, from_year, to_year, by='subject', metric='api', policy_version=None):
+    """Change of ``metric`` per subject or stream between two years, largest gain first."""
+    cube = cubes(policy_version)
+    a, b = _year(cube, from_year), _year(cube, to_year)
+    rows = []
+    for key, name, values in _breakdown(cube, class_name, by, metric):
+        before, after = _value(values[a]), _value(values[b])
+        change = round(after - before, 2) if before is not None and after is not None else None
+        rows.append({'key': key, 'name': name, 'from': before, 'to': after, 'change': change})
+    rows.sort(key=lambda row: (row['change'] is None, -(row['change'] or 0)))
+    return {'class': class_name, 'metric': metric, 'from_year': from_year, 'to_year': to_year, 'by': by,
+            'rows': rows}
+
+
+def rank(class_name, year=None, by='subject', metric='api', subject=None, policy_version=None):
+    """
+    Subjects or streams of one year ranked by ``metric``, or (``by='year'``)
+    the years ranked for one subject or the whole class.
+    """
+    cube = cubes(policy_version)
+    if by == 'year':
+        values = _series(_class_cube(cube, class_name), cube['labels'], metric, subject=subject)
+        entries = [(year_name, year_name, _value(value)) for year_name, value in zip(cube['years'], values)]
+    else:
+        if year is None:
+            raise ValueError('year is required')
+        i = _year(cube, year)
+        entries = [(key, name, _value(values[i])) for key, name, values in _breakdown(cube, class_name, by, metric)]
+    entries = [entry for entry in entries if entry[2] is not None]
+    entries.sort(key=lambda entry: -entry[2])
+    return {
+        'class': class_name, 'metric': metric, 'year': year, 'by': by, 'subject': subject,
+        'rows': [{'rank': i, 'key': key, 'name': name, 'value': value}
+                 for i, (key, name, value) in enumerate(entries, start=1)],
+    }
+
+
+def _unique_students(class_cube, year_index):
+    """``identity -> position`` of one year's students, minus names held by two of them."""
+    seen, shared = {}, set()
+    for i in np.flatnonzero(class_cube['student_year'] == year_index):
+        name = class_cube['student_identity'][i]
+        if name in seen:
+            shared.add(name)
+        seen[name] = i
+    for name in shared:
+        del seen[name]
+    return seen, shared
+
+
+def _shift_year(year, years):
+    start, end = (int(part) for part in year.split('-'))
+    return f'{start + years}-{end + years}'
+
+
+def cohort(class_x_year, class_xii_year=None, policy_version=None):
+    """
+    Class X students of ``class_x_year`` found again in Class XII of
+    ``class_xii_year`` (default: two years later): their best-of-5
+    percentages, the change per Class XII stream, and how many moved
+    from each band to each other band.
+    """
+    if not class_x_year:
+        raise ValueError('year is required')
+    cube = cubes(policy_version)
+    class_xii_year = class_xii_year or _shift_year(class_x_year, 2)
+    x_cube, xii_cube = _class_cube(cube, 'class_10'), _class_cube(cube, 'class_12')
+    x_students, x_shared = _unique_students(x_cube, _year(cube, class_x_year))
+    xii_students, xii_shared = _unique_students(xii_cube, _year(cube, class_xii_year))
+    matched = [(x_students[name], xii_students[name]) for name in x_students if name in xii_students]
+
+    policy = grading.get_policy(cube['policy'])
+    x_idx = np.array([pair[0] for pair in matched], dtype=np.int64)
+    xii_idx = np.array([pair[1] for pair in matched], dtype=np.int64)
+    x_pct = x_cube['student_percentage'][x_idx]
+    xii_pct = xii_cube['student_percentage'][xii_idx]
+    n_bands = len(policy.labels)
+    x_band = policy.band_of(np.floor(x_pct))
+    xii_band = policy.band_of(np.floor(xii_pct))
+    both = (x_band >= 0) & (xii_band >= 0)
+    transitions = np.bincount(x_band[both] * n_bands + xii_band[both],
+                              minlength=n_bands * n_bands).reshape(n_bands, n_bands)
+
+    def mean(values):
+        return round(float(values.mean()), 2) if len(values) else None
+
+    by_stream = []
+    streams = np.array([xii_cube['student_stream'][i] for i in xii_idx], dtype=object)
+    for stream in sorted(set(streams)):
+        mask = streams == stream
+        by_stream.append({
+            'stream': stream, 'students': int(mask.sum()),
+            'mean_x': mean(x_pct[mask]), 'mean_xii': mean(xii_pct[mask]),
+            'mean_change': mean(xii_pct[mask] - x_pct[mask]),
+        })
+    return {
+        'class_x_year': class_x_year, 'class_xii_year': class_xii_year,
+        'matched': len(matched),
+        'only_x': len(x_students) - len(matched),
+        'only_xii': len(xii_students) - len(matched),
+        'ambiguous': len(x_shared) + len(xii_shared),
+        'mean_x': mean(x_pct), 'mean_xii': mean(xii_pct), 'mean_change': mean(xii_pct - x_pct),
+        'by_stream': by_stream,
+        'transitions': {'labels': policy.labels, 'counts': transitions.tolist()},
+    }
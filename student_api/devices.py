@@ -0,0 +1,86 @@
+"""
+"Remember this device" for the OTP login.
+
+After a successful OTP check the user can have the browser trusted: it gets
+a random token in a signed, HTTP-only cookie, and ``TrustedDevice`` keeps
+the token's SHA-256 with an expiry. A later password login from that
+browser is let through without an OTP email while the token is stored,
+unexpired and not revoked. Devices are revoked one at a time from the
+browser itself, or all at once (and on every password reset).
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TrustedDevice
+
+COOKIE_NAME = 'trusted_device'
+SALT = 'student_api.trusted_device'
+
+
+def trust_days():
+    return getattr(settings, 'TRUSTED_DEVICE_DAYS', 30)
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode('ascii')).hexdigest()
+
+
+def _cookie(request):
+    """``(user id, token)`` from the request's trusted device cookie, or None."""
+    value = request.get_signed_cookie(COOKIE_NAME, default=None, salt=SALT, max_age=trust_days() * 86400)
+    user_id, _, token = (value or '').partition(':')
+    if not user_id.isdigit() or not token:
+        return None
+    return int(user_id), token
+
+
+def trust(request, response, user):
+    """Trust the requesting browser for ``user``; sets the cookie on ``response``."""
+    token = secrets.token_urlsafe(32)
+    now = timezone.now()
+    TrustedDevice.objects.create(
+        user=user, token_hash=_hash(token), label=request.headers.get('User-Agent', '')[:200],
+        expires_at=now + timedelta(days=trust_days()),
+    )
+    # Keep the newest devices of the user
+    limit = getattr(settings, 'TRUSTED_DEVICES_PER_USER', 10)
+    active = TrustedDevice.objects.filter(user=user, revoked_at__isnull=True, expires_at__gt=now)
+    stale = list(active.order_by('-created_at').values_list('id', flat=True)[limit:])
+    if stale:
+        TrustedDevice.objects.filter(id__in=stale).update(revoked_at=now)
+    response.set_signed_cookie(
+        COOKIE_NAME, f'{user.pk}:{token}', salt=SALT, max_age=trust_days() * 86400,
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+
+
+async def arecognise(request, user):
+    """The ``TrustedDevice`` the request's cookie stands for, if it is valid for ``user``."""
+    cookie = _cookie(request)
+    if cookie is None or cookie[0] != user.pk:
+        return None
+    now = timezone.now()
+    device = await TrustedDevice.objects.filter(
+        user=user, token_hash=_hash(cookie[1]), revoked_at__isnull=True, expires_at__gt=now,
+    ).afirst()
+    if device is not None:
+        await TrustedDevice.objects.filter(pk=device.pk).aupdate(last_used_at=now)
+    return device
+
+
+def revoke(request):
+    """Revoke the device the request's cookie stands for; returns how many were revoked."""
+    cookie = _cookie(request)
+    if cookie is None:
+        return 0
+    return TrustedDevice.objects.filter(
+        user_id=cookie[0], token_hash=_hash(cookie[1]), revoked_at__isnull=True,
+    ).update(revoked_at=timezone.now())
+
+
+def revoke_all(user):
+    return TrustedDevice.objects.filter(user=user, revoked_at__isnull=True).update(revoked_at=timezone.now())
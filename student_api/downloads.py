@@ -0,0 +1,254 @@
+"""
+Downloads of the files the analyzers write under ``text_recognition/output``.
+
+``file_response`` serves one file with a strong ``ETag`` (SHA-256 of its
+content, hashed once per size and modification time), answers
+``If-None-Match`` with 304, and a single ``Range`` (or ``If-Range``) with
+206 and only the bytes asked for. With ``DOWNLOAD_OFFLOAD`` set in the
+Django settings the web server sends the file instead:
+
+    'x-accel'     nginx: ``X-Accel-Redirect: <DOWNLOAD_ACCEL_PREFIX><set>/<path>``
+                  pointing at an ``internal`` location aliased to the output folder
+    'x-sendfile'  Apache mod_xsendfile / lighttpd: ``X-Sendfile: <absolute path>``
+
+``archive_response`` streams a zip of a whole output set: every file is
+opened when the first bytes are sent, so a run that publishes a new output
+set meanwhile cannot mix two sets in one archive, and each file is
+compressed in chunks straight into the response, so the archive is never
+held in memory or written to disk.
+
+Files moved to the storage archive (see ``archive``) are listed with the
+others and restored when they are downloaded.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import zipfile
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from . import archive
+from .jobs import TEXT_RECOGNITION_DIR
+
+OUTPUT_ROOT = os.path.join(TEXT_RECOGNITION_DIR, 'output')
+OUTPUT_SETS = ('class_10', 'class_12')
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_etags = {}
+_etags_lock = threading.Lock()
+
+
+def output_dir(output_set):
+    if output_set not in OUTPUT_SETS:
+        raise Http404(f'Unknown output set {output_set!r}')
+    return os.path.join(OUTPUT_ROOT, output_set)
+
+
+def resolve(output_set, relative_path):
+    """Absolute path of a file in an output set; 404 outside it or for hidden files."""
+    base = os.path.realpath(output_dir(output_set))
+    path = os.path.realpath(os.path.join(base, relative_path))
+    parts = os.path.relpath(path, base).split(os.sep)
+    if parts[0] == '..' or any(part.startswith('.') for part in parts):
+        raise Http404('No such file')
+    # The archive knows files by their path through the output set's link
+    if not os.path.isfile(path) and not archive.ensure(os.path.join(output_dir(output_set), *parts)):
+        raise Http404('No such file')
+    return path
+
+
+def list_files(output_set):
+    """``(relative path, absolute path, stat)`` of every file in an output set, sorted."""
+    base = output_dir(output_set)
+    # The run directory the set links to right now: a publish meanwhile
+    # does not change what is listed (see jobs.publish_output)
+    current = os.path.realpath(base)
+    files = []
+    for root, dirs, names in os.walk(current):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        for name in sorted(names):
+            if name.startswith('.') or name.endswith('.tmp'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                files.append((os.path.relpath(path, current).replace(os.sep, '/'), path, os.stat(path)))
+            except FileNotFoundError:
+                continue
+    for path, stat in archive.archived_files(base, recursive=True):
+        relative_path = os.path.relpath(path, base).replace(os.sep, '/')
+        if not any(part.startswith('.') for part in relative_path.split('/')):
+            files.append((relative_path, path, stat))
+    return sorted(files)
+
+
+def file_etag(path, stat=None):
+    """Quoted SHA-256 of the file, recomputed only when its size or mtime changes."""
+    stat = stat or os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    etag = _etags.get(key)
+    if etag is None:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        etag = quote_etag(digest.hexdigest()[:32])
+        with _etags_lock:
+            for old in [k for k in _etags if k[0] == path]:
+                del _etags[old]
+            _etags[key] = etag
+    return etag
+
+
+def parse_range(header, size):
+    """``(start, end)`` (inclusive) of a single byte range, None to send it all, or ValueError."""
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Several ranges or another unit: the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+class _RangeReader:
+    """Reads ``length`` bytes of an open file from its current position."""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def _offload(response, output_set, relative_path, path):
+    mode = getattr(settings, 'DOWNLOAD_OFFLOAD', None)
+    if mode == 'x-accel':
+        prefix = getattr(settings, 'DOWNLOAD_ACCEL_PREFIX', '/protected-output/')
+        response['X-Accel-Redirect'] = f'{prefix.rstrip("/")}/{output_set}/{relative_path}'
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        return False
+    return True
+
+
+def file_response(request, output_set, relative_path):
+    path = resolve(output_set, relative_path)
+    stat = os.stat(path)
+    etag = file_etag(path, stat)
+    headers = {'ETag': etag, 'Last-Modified': http_date(stat.st_mtime), 'Accept-Ranges': 'bytes'}
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        return HttpResponse(status=304, headers=headers)
+
+    filename = os.path.basename(path)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    offloaded = HttpResponse(content_type=content_type, headers=headers)
+    offloaded['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if _offload(offloaded, output_set, relative_path.replace(os.sep, '/'), path):
+        # The web server handles ranges and sends the body
+        return offloaded
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            return HttpResponse(status=416, headers=dict(headers, **{'Content-Range': f'bytes */{stat.st_size}'}))
+
+    f = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(f, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = FileResponse(_RangeReader(f, end - start + 1), status=206, as_attachment=True,
+                                filename=filename, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+class _ZipSink:
+    """Write-only file for ``zipfile`` that hands the written bytes back to the generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_archive(output_set):
+    """Zip of every file of an output set, as a generator of bytes."""
+    files = []
+    try:
+        for relative_path, path, stat in list_files(output_set):
+            try:
+                archive.ensure(path)
+                files.append((relative_path, open(path, 'rb'), stat))
+            except FileNotFoundError:
+                continue
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zipped:
+            for relative_path, f, stat in files:
+                info = zipfile.ZipInfo.from_file(f.name, f'{output_set}/{relative_path}')
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with zipped.open(info, 'w', force_zip64=stat.st_size >= zipfile.ZIP64_LIMIT) as entry:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        entry.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                f.close()
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        for _, f, _ in files:
+            f.close()
+
+
+def archive_response(output_set):
+    output_dir(output_set)
+    response = StreamingHttpResponse(stream_archive(output_set), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{output_set}_output.zip"'
+    return response
@@ -0,0 +1,441 @@
+"""
+Watch folders for result PDFs dropped outside ``upload_results``.
+
+``InboxWatcher`` (run by ``manage.py watch_inbox``) watches the class data
+folders, or the inboxes in ``settings.RESULT_INBOXES``, and starts analyzer
+runs for new PDFs through ``jobs.start_job``, so they share the web runs'
+per-class locks, single flight and atomic publishing.
+
+* Changes are picked up with inotify on Linux and by polling elsewhere (or
+  with ``--poll``, e.g. for network mounts whose writes happen on another
+  machine). With inotify a full rescan still runs every ``RESCAN_INTERVAL``.
+* A file is taken once its size and modification time have stayed the same
+  for ``INBOX_SETTLE_SECONDS`` and it ends with a PDF trailer, so partially
+  copied files are left alone.
+* Files that fail ``jobs.triage_pdf`` (scans, encrypted or wrong-class
+  PDFs) are rejected without a run.
+* Files are identified by their SHA-256; content seen before (under any
+  name) is not analyzed again. The ledger is ``inbox/seen.jsonl`` in the
+  jobs directory.
+* Arrivals are grouped per academic year and class, and each group has at
+  most one inbox run in flight; files arriving meanwhile are coalesced into
+  the group's next run. At most ``INBOX_MAX_JOBS`` runs are in flight in
+  total, so a burst of hundreds of files costs a few runs, not hundreds.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import select
+import shutil
+import struct
+import sys
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import jobs
+
+from analyzer_common.naming import infer_year  # noqa: E402  (jobs puts the analyzer sources on sys.path)
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(jobs.TEXT_RECOGNITION_DIR, 'data')
+# Data folders, each holding the PDFs of one class (and stream)
+CLASS_DIRS = ('class_10', 'class_12_science', 'class_12_commerce', 'class_12_humanities')
+CLASS_12_STREAMS = ('class_12_science', 'class_12_commerce', 'class_12_humanities')
+
+# Seconds between full rescans when inotify is used, in case an event was missed
+RESCAN_INTERVAL = 60
+# Files that are still not a complete PDF after this many settle periods are skipped
+INCOMPLETE_LIMIT = 12
+
+
+def inboxes():
+    """``{folder: class data folder name}`` of every watched folder."""
+    configured = getattr(settings, 'RESULT_INBOXES', None)
+    if configured:
+        unknown = set(configured.values()) - set(CLASS_DIRS)
+        if unknown:
+            raise ImproperlyConfigured(
+                f"RESULT_INBOXES: unknown class folder {', '.join(sorted(unknown))}; use one of {', '.join(CLASS_DIRS)}"
+            )
+        return {os.path.abspath(folder): class_dir for folder, class_dir in configured.items()}
+    return {os.path.join(DATA_DIR, class_dir): class_dir for class_dir in CLASS_DIRS}
+
+
+def academic_year_for(path):
+    """Year such as '2025-2026' from the file or folder names, else the current one."""
+    inferred = infer_year(path)
+    if inferred:
+        return inferred
+    year = datetime.now().year
+    return f"{year}-{year + 1}"
+
+
+def looks_complete(path):
+    """Whether ``path`` starts with a PDF header and ends with a trailer."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(5) != b'%PDF-':
+                return False
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 1024))
+            return b'%%EOF' in f.read()
+    except OSError:
+        return False
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _list_pdfs(folder):
+    try:
+        return [entry.path for entry in os.scandir(folder) if entry.is_file() and entry.name.lower().endswith('.pdf')]
+    except OSError:
+        return []
+
+
+class PollingWatcher:
+    """Report PDFs whose size or modification time changed, by listing the folders."""
+
+    name = 'polling'
+
+    def __init__(self, folders, interval=2.0):
+        self.folders = list(folders)
+        self.interval = interval
+        self._seen = {}
+
+    def scan(self):
+        changed = set()
+        current = {}
+        for folder in self.folders:
+            for path in _list_pdfs(folder):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                current[path] = (stat.st_size, stat.st_mtime)
+                if self._seen.get(path) != current[path]:
+                    changed.add(path)
+        self._seen = current
+        return changed
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return self.scan()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Report PDFs written to or moved into the folders, from inotify events."""
+
+    name = 'inotify'
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, folders):
+        self.folders = list(folders)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._folders_by_wd = {}
+        for folder in self.folders:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), self.MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(error, f'Cannot watch {folder}')
+            self._folders_by_wd[wd] = folder
+        self._rescan_at = 0.0
+
+    @classmethod
+    def is_available(cls):
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def scan(self):
+        self._rescan_at = time.monotonic() + RESCAN_INTERVAL
+        return {path for folder in self.folders for path in _list_pdfs(folder)}
+
+    def wait(self, timeout):
+        if time.monotonic() >= self._rescan_at:
+            return self.scan()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were dropped; fall back to listing the folders
+                    return self.scan()
+                folder = self._folders_by_wd.get(wd)
+                if folder and name.lower().endswith(b'.pdf'):
+                    changed.add(os.path.join(folder, os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_watcher(folders, poll=False, interval=2.0):
+    """inotify where available (unless ``poll``), otherwise polling."""
+    if not poll and InotifyWatcher.is_available():
+        try:
+            return InotifyWatcher(folders)
+        except OSError as e:
+            logger.warning("inotify unavailable, polling instead", extra={'error': str(e)})
+    return PollingWatcher(folders, interval)
+
+
+class Ledger:
+    """Append-only record of the inbox files already handled, by content hash."""
+
+    def __init__(self, path):
+        self.path = path
+        self.hashes = set()
+        # (path, size, mtime) of handled files, so they are not hashed again
+        self.files = set()
+        self.existed = os.path.exists(path)
+        if self.existed:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.hashes.add(record['sha256'])
+                    self.files.add((record['path'], record['size'], record['mtime']))
+
+    def knows(self, path, size, mtime):
+        return (path, size, mtime) in self.files
+
+    def add(self, sha256, path, size, mtime, outcome, job_id=None):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'sha256': sha256, 'path': path, 'size': size, 'mtime': mtime,
+                'outcome': outcome, 'job_id': job_id, 'time': time.time(),
+            }) + '\n')
+        self.hashes.add(sha256)
+        self.files.add((path, size, mtime))
+
+
+class InboxWatcher:
+    """Turn settled, unseen PDFs in the watched folders into analyzer runs."""
+
+    def __init__(self, poll=False, interval=2.0, process_existing=False):
+        self.inboxes = inboxes()
+        for folder in self.inboxes:
+            os.makedirs(folder, exist_ok=True)
+        self.settle = getattr(settings, 'INBOX_SETTLE_SECONDS', 5)
+        self.max_jobs = getattr(settings, 'INBOX_MAX_JOBS', 2)
+        self.ledger = Ledger(os.path.join(jobs.jobs_dir(), 'inbox', 'seen.jsonl'))
+        self.watcher = open_watcher(self.inboxes, poll=poll, interval=interval)
+        # path -> [size, mtime, time of the last change, settle periods while incomplete]
+        self.pending = {}
+        # (year, run class) -> [file records] waiting for a run
+        self.waiting = {}
+        # (year, run class) -> (job_id, [file records]) in flight
+        self.running = {}
+        # Hashes of the files in ``waiting`` and ``running``
+        self.accepted = set()
+        self._baseline = not self.ledger.existed and not process_existing
+        self._stopping = False
+
+    def run_forever(self):
+        logger.info("Watching inboxes", extra={'folders': list(self.inboxes), 'watcher': self.watcher.name})
+        self._note(self.watcher.scan())
+        if self._baseline:
+            # First start: PDFs already in place count as handled
+            self._baseline_existing()
+        try:
+            while True:
+                self._note(self.watcher.wait(1.0))
+                self._settle()
+                self._reap()
+                self._submit()
+        finally:
+            self.watcher.close()
+
+    def shutdown(self, wait=jobs.KILL_GRACE + 5):
+        """Cancel the runs in flight; their files are picked up again on the next start."""
+        self._stopping = True
+        for job_id, _ in self.running.values():
+            jobs.request_cancel(job_id)
+        deadline = time.monotonic() + wait
+        while self.running and time.monotonic() < deadline:
+            time.sleep(jobs.WATCH_INTERVAL)
+            self._reap()
+
+    def _baseline_existing(self):
+        os.makedirs(os.path.dirname(self.ledger.path), exist_ok=True)
+        open(self.ledger.path, 'a').close()
+        for path in list(self.pending):
+            try:
+                stat = os.stat(path)
+                self.ledger.add(file_sha256(path), path, stat.st_size, stat.st_mtime, 'existing')
+            except OSError:
+                pass
+        self.pending.clear()
+
+    def _note(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.pending.pop(path, None)
+                continue
+            if self.ledger.knows(path, stat.st_size, stat.st_mtime):
+                continue
+            entry = self.pending.get(path)
+            if entry is None or (entry[0], entry[1]) != (stat.st_size, stat.st_mtime):
+                self.pending[path] = [stat.st_size, stat.st_mtime, now, 0]
+
+    def _settle(self):
+        now = time.monotonic()
+        for path, entry in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime) != (entry[0], entry[1]):
+                self.pending[path] = [stat.st_size, stat.st_mtime, now, entry[3]]
+                continue
+            if now - entry[2] < self.settle:
+                continue
+            if not looks_complete(path):
+                entry[2] = now
+                entry[3] += 1
+                if entry[3] >= INCOMPLETE_LIMIT:
+                    logger.warning("Skipping inbox file that is not a complete PDF", extra={'path': path})
+                    self.ledger.add(file_sha256(path), path, stat.st_size, stat.st_mtime, 'incomplete')
+                    del self.pending[path]
+                continue
+            del self.pending[path]
+            self._accept(path, stat)
+
+    def _accept(self, path, stat):
+        sha256 = file_sha256(path)
+        if sha256 in self.ledger.hashes or sha256 in self.accepted:
+            self.ledger.add(sha256, path, stat.st_size, stat.st_mtime, 'duplicate')
+            return
+        class_dir = self.inboxes[os.path.dirname(path)]
+        run_class = 'class_10' if class_dir == 'class_10' else 'class_12_all'
+        triage = jobs.triage_pdf(path, run_class)
+        if not triage['ok']:
+            logger.warning("Rejected inbox file", extra={'path': path, 'reason': triage['reason']})
+            self.ledger.add(sha256, path, stat.st_size, stat.st_mtime, f"rejected: {triage['reason']}")
+            return
+        year = academic_year_for(path)
+        data_path = path
+        target_dir = os.path.join(DATA_DIR, class_dir)
+        if os.path.dirname(path) != target_dir:
+            # Stored as upload_results stores uploads, so the upload page lists it
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            data_path = os.path.join(target_dir, f"{year}_{timestamp}_{os.path.basename(path)}")
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.copyfile(path, data_path + '.part')
+            os.replace(data_path + '.part', data_path)
+        record = {
+            'sha256': sha256, 'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime,
+            'data_path': data_path, 'class_dir': class_dir, 'estimated_seconds': triage['estimated_seconds'],
+        }
+        self.accepted.add(sha256)
+        self.waiting.setdefault((year, run_class), []).append(record)
+
+    def _pdf_files(self, year, run_class, records):
+        if run_class == 'class_10':
+            return sorted({record['data_path'] for record in records})
+        # A Class XII run covers every stream, as on the upload page: the new
+        # files plus the latest PDF of that year for the other streams
+        by_stream = {}
+        for record in records:
+            by_stream.setdefault(record['class_dir'], []).append(record['data_path'])
+        pdf_files = []
+        for stream in CLASS_12_STREAMS:
+            if stream in by_stream:
+                pdf_files.extend(sorted(set(by_stream[stream])))
+                continue
+            candidates = [
+                path for path in _list_pdfs(os.path.join(DATA_DIR, stream))
+                if academic_year_for(path) == year
+            ]
+            if candidates:
+                pdf_files.append(max(candidates, key=os.path.getmtime))
+        return pdf_files
+
+    def _submit(self):
+        for key in list(self.waiting):
+            if len(self.running) >= self.max_jobs:
+                return
+            if key in self.running:
+                # Coalesced into the group's next run
+                continue
+            year, run_class = key
+            records = self.waiting.pop(key)
+            pdf_files = self._pdf_files(year, run_class, records)
+            analyzer_args, output_dir = jobs.analyzer_run(run_class, pdf_files)
+            job_id, joined = jobs.start_job(
+                run_class, analyzer_args, None, pdf_files, year, output_dir, unattended=True,
+                estimated_seconds=sum(record['estimated_seconds'] or 0 for record in records),
+            )
+            logger.info("Inbox run started", extra={
+                'job_id': job_id, 'joined': joined, 'year': year, 'analyzer': run_class, 'pdf_count': len(pdf_files),
+            })
+            self.running[key] = (job_id, records)
+
+    def _reap(self):
+        for key, (job_id, records) in list(self.running.items()):
+            status = jobs.read_status(job_id)
+            if jobs.job_active(status):
+                continue
+            del self.running[key]
+            if self._stopping:
+                # Left out of the ledger so the next start picks them up
+                continue
+            stop_reason = status.get('stop_reason') if status else None
+            if status is None or status['state'] != jobs.STATE_FINISHED or stop_reason == jobs.STOP_ABANDONED:
+                # Its supervisor died, or it was a joined web run whose page
+                # was closed: try these files again
+                self.waiting.setdefault(key, [])[:0] = records
+                continue
+            outcome = stop_reason or status['response']['status']
+            log = logger.warning if stop_reason else logger.info
+            log("Inbox run finished", extra={'job_id': job_id, 'outcome': outcome})
+            self._record(records, outcome, job_id)
+
+    def _record(self, records, outcome, job_id):
+        for record in records:
+            self.ledger.add(record['sha256'], record['path'], record['size'], record['mtime'], outcome, job_id)
+            self.accepted.discard(record['sha256'])
@@ -0,0 +1,741 @@
+"""
+Background analyzer runs.
+
+``start_job`` hands an analyzer run to the jobs event loop and returns at once
+with a job id. That loop lives on one daemon thread and supervises every
+analyzer subprocess with ``asyncio.create_subprocess_exec``, so concurrent
+runs cost no thread each, under WSGI and ASGI alike. Everything about a job
+lives in its own directory under ``settings.ANALYZER_JOBS_DIR``:
+
+* ``status.json``  - state (queued/running/finished), owner and, once
+  finished, the exit code and the response shown to the user
+* ``progress.jsonl`` - progress events appended by the analyzer
+* ``result.json`` - the analyzer's JSON result document
+* ``cancel`` - present once a cancel was requested
+* ``watcher`` - touched while a browser follows the progress stream
+* ``viewers/<user id>`` - other users whose identical request joined the job
+
+Each run is bounded: it is killed, with its whole process group, when it
+exceeds ``ANALYZER_TIMEOUT_SECONDS`` or ``ANALYZER_MAX_RSS_MB``, when it is
+cancelled, or when its progress stream has gone unwatched for
+``ANALYZER_ABANDON_SECONDS`` (the teacher closed the tab).
+
+Concurrent runs are coordinated through advisory file locks, so this holds
+across worker processes too:
+
+* Requests for the same PDFs of the same academic year and class join the
+  job already queued or running for them (single flight) and share its
+  progress stream and result.
+* Only one run per class executes at a time, whatever its year, since
+  every year of a class shares one output directory; others queue. Runs for
+  different classes go ahead in parallel.
+* An analyzer writes into a directory of its own next to its output
+  directory, a link that is switched to it only when the run succeeds, so
+  readers never see a mix of CSVs from two runs (see ``publish_output``).
+
+Because the state is on disk, the progress stream can be served by any worker
+process, not only the one that started the run.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .metrics import ANALYZER_DURATION, ANALYZER_JOBS_RUNNING, ANALYZER_STOPPED
+
+logger = logging.getLogger(__name__)
+
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_FINISHED = 'finished'
+
+# Why a run was killed
+STOP_TIMEOUT = 'timeout'
+STOP_MEMORY = 'memory'
+STOP_CANCELLED = 'cancelled'
+STOP_ABANDONED = 'abandoned'
+# Not a kill: the worker process supervising the run died
+STOP_LOST = 'lost'
+
+STOP_MESSAGES = {
+    STOP_TIMEOUT: 'Processing took too long and was stopped',
+    STOP_MEMORY: 'Processing used too much memory and was stopped',
+    STOP_CANCELLED: 'Processing was cancelled',
+    STOP_ABANDONED: 'Processing was stopped because the page was closed',
+    STOP_LOST: 'Processing stopped because the server running it restarted; please start it again',
+}
+
+# Seconds between limit checks of a running analyzer
+WATCH_INTERVAL = 0.5
+# Seconds a killed analyzer gets to exit after SIGTERM before SIGKILL
+KILL_GRACE = 5
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+TEXT_RECOGNITION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'text_recognition')
+SRC_DIR = os.path.join(TEXT_RECOGNITION_DIR, 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from analyzer_common.triage import triage  # noqa: E402
+
+# Analyzer script and output directory for each kind of run
+ANALYZERS = {
+    'class_10': (os.path.join('class_10', 'test10th.py'), 'class_10'),
+    'class_12_all': (os.path.join('class_12', 'test12th.py'), 'class_12'),
+}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def jobs_dir():
+    return getattr(settings, 'ANALYZER_JOBS_DIR', None) or os.path.join(tempfile.gettempdir(), 'student_api_jobs')
+
+
+def job_dir(job_id):
+    if not _JOB_ID_RE.match(job_id or ''):
+        raise ValueError('Invalid job id')
+    return os.path.join(jobs_dir(), job_id)
+
+
+def _write_json(path, data):
+    # Write to a temporary file and rename so readers never see half a file
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_status(job_id):
+    """Return the job's status dict, or None if there is no such job."""
+    return _read_json(os.path.join(job_dir(job_id), 'status.json'))
+
+
+def read_events(job_id, offset=0):
+    """
+    Return ``(events, new_offset)`` for progress events written after byte
+    ``offset``. Each event is an ``(end_offset, data)`` pair; a line still
+    being written is left for the next call.
+    """
+    path = os.path.join(job_dir(job_id), 'progress.jsonl')
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    events = []
+    consumed = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        consumed += len(line)
+        try:
+            events.append((offset + consumed, json.loads(line)))
+        except ValueError:
+            continue
+    return events, offset + consumed
+
+
+class FileLock:
+    """
+    Advisory lock on a file under the jobs directory.
+
+    flock on POSIX, msvcrt.locking on Windows. Either way the operating
+    system drops the lock when its holder dies, so a crashed worker never
+    leaves a class locked.
+    """
+
+    def __init__(self, *name_parts):
+        name = '_'.join(re.sub(r'[^\w.-]+', '-', str(part)) for part in name_parts)
+        self.path = os.path.join(jobs_dir(), 'locks', f'{name}.lock')
+        self._file = None
+
+    def acquire(self, blocking=False):
+        """Take the lock; without ``blocking``, return False if it is held."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            if blocking:
+                raise
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def analyzer_run(class_name, pdf_files):
+    """``(analyzer_args, output_dir)`` for analyzing ``pdf_files`` as ``class_name``."""
+    script, output_name = ANALYZERS[class_name]
+    analyzer_path = os.path.join(TEXT_RECOGNITION_DIR, 'src', script)
+    output_dir = os.path.join(TEXT_RECOGNITION_DIR, 'output', output_name)
+    return [sys.executable, analyzer_path] + list(pdf_files), output_dir
+
+
+def triage_pdf(source, class_name):
+    """
+    Pre-flight report for a PDF (path or bytes) to be analyzed as ``class_name``.
+
+    See ``analyzer_common.triage``; the run time estimate is calibrated
+    with the profile of the class's last run.
+    """
+    _, output_name = ANALYZERS[class_name]
+    profile_path = os.path.join(TEXT_RECOGNITION_DIR, 'output', output_name, f'{output_name[-2:]}th_profile.json')
+    from . import archive
+    archive.ensure(profile_path)
+    return triage(source, output_name, getattr(settings, 'ANALYZER_TEXT_BACKEND', None), profile_path)
+
+
+def flight_key(class_name, year, pdf_files):
+    """Identity of a request: the same PDFs of the same year and class."""
+    parts = [class_name, year] + sorted(os.path.abspath(pdf) for pdf in pdf_files)
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _flight_path(key):
+    return os.path.join(jobs_dir(), 'flights', f'{key}.json')
+
+
+def _active_flight(key):
+    """Id of the queued or running job for ``key``, or None."""
+    flight = _read_json(_flight_path(key))
+    if not flight:
+        return None
+    if not job_active(read_status(flight['job_id'])):
+        return None
+    return flight['job_id']
+
+
+def job_active(status):
+    """Whether the job is queued or running, and will still finish."""
+    if status is None or status['state'] == STATE_FINISHED:
+        return False
+    # When the worker supervising it has died, the job never finishes
+    return _process_alive(status['supervisor_pid'])
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _leave_flight(key, job_id):
+    flight = _read_json(_flight_path(key))
+    if flight and flight['job_id'] == job_id:
+        try:
+            os.remove(_flight_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def can_view(status, user_id):
+    """Whether ``user_id`` started the job or joined it with an identical request."""
+    if status['user_id'] == user_id:
+        return True
+    return os.path.exists(os.path.join(job_dir(status['job_id']), 'viewers', str(user_id)))
+
+
+def _add_viewer(job_id, user_id):
+    if user_id is None:
+        # Runs started without a user (the inbox watcher) only need the status
+        return
+    viewers = os.path.join(job_dir(job_id), 'viewers')
+    os.makedirs(viewers, exist_ok=True)
+    with open(os.path.join(viewers, str(user_id)), 'w'):
+        pass
+
+
+def publish_output(staging_dir, output_dir):
+    """
+    Make ``staging_dir`` the current ``output_dir``.
+
+    ``output_dir`` is a symbolic link to the run directory that is current.
+    Publishing points a new link at ``staging_dir`` and renames it over
+    ``output_dir``, a single atomic step, so a reader finds either the old
+    set or the new one and never a missing folder. The run directory it
+    replaces is kept until the next publish, for readers that resolved the
+    old link a moment before. Both live in the same parent directory; a
+    publish lock keeps two runs that share an output directory from swapping
+    at the same moment.
+    """
+    lock = FileLock('publish', hashlib.sha1(os.path.abspath(output_dir).encode('utf-8')).hexdigest())
+    lock.acquire(blocking=True)
+    parent, name = os.path.split(os.path.abspath(output_dir))
+    # Link to the run directory replaced by the last publish
+    retired_link = os.path.join(parent, f'.{name}.retired')
+    try:
+        if os.name != 'posix':
+            # Symbolic links need extra privileges on Windows: two renames
+            retired_dir = f'{staging_dir}.old'
+            if os.path.exists(output_dir):
+                os.replace(output_dir, retired_dir)
+            os.replace(staging_dir, output_dir)
+            shutil.rmtree(retired_dir, ignore_errors=True)
+        else:
+            if os.path.islink(output_dir):
+                previous = os.readlink(output_dir)
+            elif os.path.isdir(output_dir):
+                # A folder from before output sets were links: the one
+                # publish that is not atomic
+                previous = f'.{name}.{uuid.uuid4().hex}'
+                os.replace(output_dir, os.path.join(parent, previous))
+            else:
+                previous = None
+            link_path = f'{staging_dir}.link'
+            os.symlink(os.path.basename(staging_dir), link_path)
+            os.replace(link_path, output_dir)
+            if previous is not None:
+                expired = os.readlink(retired_link) if os.path.islink(retired_link) else None
+                retired_tmp = f'{retired_link}.tmp'
+                if os.path.lexists(retired_tmp):
+                    os.remove(retired_tmp)
+                os.symlink(previous, retired_tmp)
+                os.replace(retired_tmp, retired_link)
+                if expired is not None and expired != previous:
+                    shutil.rmtree(os.path.join(parent, expired), ignore_errors=True)
+    finally:
+        lock.release()
+    # Archived copies of the replaced files must not show up next to the new ones
+    from . import archive
+    archive.forget_tree(output_dir)
+
+
+def students_file(output_dir):
+    """The de-duplicated students an analyzer wrote to ``output_dir``."""
+    return os.path.join(output_dir, f'{os.path.basename(output_dir)[-2:]}th_students.jsonl')
+
+
+def _store_results(job_id, path):
+    """Merge a finished run's students file into the results store; a failure is only logged."""
+    from . import results_store
+    from django.db import close_old_connections
+    close_old_connections()
+    try:
+        return results_store.record_file(path)
+    except Exception:
+        logger.exception("Storing student results failed", extra={'job_id': job_id})
+        return None
+    finally:
+        close_old_connections()
+
+
+def request_cancel(job_id):
+    """Ask the job's supervisor to kill the run; it notices within WATCH_INTERVAL."""
+    with open(os.path.join(job_dir(job_id), 'cancel'), 'w'):
+        pass
+
+
+def touch_watcher(job_id):
+    """Record that a progress stream is following the job right now."""
+    path = os.path.join(job_dir(job_id), 'watcher')
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        with open(path, 'w'):
+            pass
+
+
+def analyzer_response(returncode, api_results, error_text='', stop_reason=None):
+    """The JSON body shown to the user for a finished analyzer run."""
+    if stop_reason is not None:
+        return {
+            'status': 'error',
+            'message': STOP_MESSAGES[stop_reason],
+            'stopped': stop_reason,
+            'api_results': None
+        }
+    if returncode == 0 and api_results and api_results.get('status') == 'success':
+        return {
+            'status': 'success',
+            'message': 'PDF processing completed successfully',
+            'api_results': api_results
+        }
+    if returncode == 0 and api_results and api_results.get('status') == 'no_data':
+        return {
+            'status': 'error',
+            'message': 'No student results found in the PDF',
+            'api_results': api_results
+        }
+    return {
+        'status': 'error',
+        'message': 'Error processing PDF',
+        'api_results': api_results,
+        'error': (api_results or {}).get('error') or error_text
+    }
+
+
+def start_job(class_name, analyzer_args, user_id, pdf_files, year, output_dir, unattended=False,
+              estimated_seconds=None):
+    """
+    Run ``analyzer_args`` in the background, or join an identical run.
+
+    Returns ``(job_id, joined)``. ``joined`` is True when the same PDFs of the
+    same year and class were already queued or running; the caller then
+    shares that job's progress stream and result. ``unattended`` runs have
+    no page following them and are never stopped as abandoned.
+    ``estimated_seconds`` (from ``triage_pdf``) orders the class's queue.
+    """
+    key = flight_key(class_name, year, pdf_files)
+    # Serialises the check-then-create below across worker processes
+    flights = FileLock('flights')
+    flights.acquire(blocking=True)
+    try:
+        job_id = _active_flight(key)
+        if job_id is not None:
+            _add_viewer(job_id, user_id)
+            return job_id, True
+
+        job_id = uuid.uuid4().hex
+        path = job_dir(job_id)
+        os.makedirs(path)
+        status = {
+            'job_id': job_id,
+            'state': STATE_QUEUED,
+            'class_name': class_name,
+            'year': year,
+            'flight': key,
+            'user_id': user_id,
+            'supervisor_pid': os.getpid(),
+            'unattended': unattended,
+            'estimated_seconds': estimated_seconds,
+            'started': time.time(),
+        }
+        _write_json(os.path.join(path, 'status.json'), status)
+        os.makedirs(os.path.dirname(_flight_path(key)), exist_ok=True)
+        _write_json(_flight_path(key), {'job_id': job_id})
+    finally:
+        flights.release()
+
+    future = asyncio.run_coroutine_threadsafe(
+        _run_job(job_id, class_name, analyzer_args, status, len(pdf_files), output_dir),
+        _job_loop(),
+    )
+    future.add_done_callback(_log_job_failure)
+    return job_id, False
+
+
+def _log_job_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Analyzer job failed", exc_info=future.exception())
+
+
+def _job_loop():
+    """
+    Return the jobs event loop, starting its thread on first use.
+
+    Request event loops are no good for this: under WSGI each async view gets
+    a loop that closes with the response, and the run must outlive it.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='analyzer-jobs', daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def _limit(name):
+    value = getattr(settings, name, None)
+    return value or None
+
+
+def _rss_mb(pid):
+    """Resident memory of ``pid`` and its children in MB, or None if unknown."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        # Linux without psutil: the analyzer itself, from /proc
+        with open(f'/proc/{pid}/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _stop_reason(path, started, timeout, max_rss_mb, rss_mb, abandon_after):
+    now = time.time()
+    if os.path.exists(os.path.join(path, 'cancel')):
+        return STOP_CANCELLED
+    if timeout is not None and now - started > timeout:
+        return STOP_TIMEOUT
+    if max_rss_mb is not None and rss_mb is not None and rss_mb > max_rss_mb:
+        return STOP_MEMORY
+    if abandon_after is not None:
+        try:
+            last_watched = os.path.getmtime(os.path.join(path, 'watcher'))
+        except OSError:
+            # Nobody has opened the stream yet; the timeout still applies
+            return None
+        if now - last_watched > abandon_after:
+            return STOP_ABANDONED
+    return None
+
+
+def _signal_group(process, sig):
+    try:
+        if os.name == 'posix':
+            # The analyzer leads its own session, so this reaches pdftotext too
+            os.killpg(process.pid, sig)
+        elif sig == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _kill(process):
+    _signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE)
+    except asyncio.TimeoutError:
+        _signal_group(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+
+
+def _next_in_queue(queue_dir, job_id):
+    """Whether ``job_id`` has the lowest priority among the live jobs queued in ``queue_dir``."""
+    best = None
+    for name in os.listdir(queue_dir):
+        if not _JOB_ID_RE.match(name):
+            # A temporary file of _write_json
+            continue
+        entry = _read_json(os.path.join(queue_dir, name))
+        if name != job_id and not job_active(read_status(name)):
+            # Left behind by a worker that died
+            try:
+                os.remove(os.path.join(queue_dir, name))
+            except FileNotFoundError:
+                pass
+            continue
+        if entry is not None and (best is None or (entry['priority'], name) < best):
+            best = (entry['priority'], name)
+    return best is None or best[1] == job_id
+
+
+async def _wait_for_class_lock(lock, path, abandon_after, status):
+    """
+    Queue until ``lock`` is free and this job is next; returns a stop reason if the wait ends early.
+
+    Waiting jobs go in order of the time they were queued plus their
+    estimated run time, so a short run overtakes a long one queued shortly
+    before it, but never holds it back longer than its own estimate.
+    """
+    queue_dir = os.path.join(os.path.dirname(lock.path), 'queue_' + os.path.basename(lock.path)[:-len('.lock')])
+    os.makedirs(queue_dir, exist_ok=True)
+    entry_path = os.path.join(queue_dir, status['job_id'])
+    _write_json(entry_path, {'priority': status['started'] + (status.get('estimated_seconds') or 0)})
+    try:
+        waiting = False
+        while not (_next_in_queue(queue_dir, status['job_id']) and lock.acquire()):
+            if not waiting:
+                _append_event(path, {'stage': 'waiting', 'total_pages': None, 'pdfs': 0, 'pages': 0, 'students': 0})
+                waiting = True
+            stop_reason = _stop_reason(path, None, None, None, None, abandon_after)
+            if stop_reason is not None:
+                return stop_reason
+            await asyncio.sleep(WATCH_INTERVAL)
+        return None
+    finally:
+        os.remove(entry_path)
+
+
+def _append_event(path, event):
+    with open(os.path.join(path, 'progress.jsonl'), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(event) + '\n')
+
+
+async def _run_job(job_id, class_name, analyzer_args, status, pdf_count, output_dir):
+    path = job_dir(job_id)
+    result_path = os.path.join(path, 'result.json')
+    # Sibling of output_dir, which links to it once it is published
+    staging_dir = os.path.join(os.path.dirname(output_dir), f'.{os.path.basename(output_dir)}.{job_id}')
+    timeout = _limit('ANALYZER_TIMEOUT_SECONDS')
+    max_rss_mb = _limit('ANALYZER_MAX_RSS_MB')
+    abandon_after = None if status.get('unattended') else _limit('ANALYZER_ABANDON_SECONDS')
+    # Per class, not per year: every year of a class publishes to the same output directory
+    class_lock = FileLock('class', class_name)
+    start = time.perf_counter()
+    returncode = None
+    peak_rss_mb = None
+    api_results = None
+    stop_reason = None
+    published = False
+    stdout = stderr = b''
+    try:
+        stop_reason = await _wait_for_class_lock(class_lock, path, abandon_after, status)
+        if stop_reason is None:
+            status.update({'state': STATE_RUNNING, 'run_started': time.time()})
+            _write_json(os.path.join(path, 'status.json'), status)
+            returncode, stop_reason, peak_rss_mb, stdout, stderr = await _supervise(
+                analyzer_args + [
+                    '--result-file', result_path,
+                    '--progress-file', os.path.join(path, 'progress.jsonl'),
+                    '--output-dir', staging_dir,
+                    '--backend', getattr(settings, 'ANALYZER_TEXT_BACKEND', 'auto'),
+                    '--year', status['year'],
+                    '--duplicates', getattr(settings, 'DUPLICATE_ROLL_POLICY', 'latest'),
+                ],
+                path, status['run_started'], timeout, max_rss_mb, abandon_after,
+            )
+        if stop_reason is None:
+            api_results = _read_json(result_path)
+        if returncode == 0 and api_results and api_results.get('status') == 'success':
+            # Stored from this run's own directory, which the output
+            # directory links to only once it is published
+            api_results['stored'] = await asyncio.to_thread(
+                _store_results, job_id, os.path.join(staging_dir, os.path.basename(students_file(output_dir)))
+            )
+            await asyncio.to_thread(publish_output, staging_dir, output_dir)
+            published = True
+            # The analyzer listed its files under the staging directory
+            api_results['files'] = [
+                output_dir + name[len(staging_dir):] if name.startswith(staging_dir) else name
+                for name in api_results.get('files', [])
+            ]
+        else:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    except Exception as e:
+        # The job must still finish: a status left queued or running keeps
+        # its progress stream waiting for as long as this process lives
+        logger.exception("Analyzer job failed", extra={'job_id': job_id})
+        if not published:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        returncode = None
+        api_results = None
+        stderr = stderr + f'\n{type(e).__name__}: {e}'.encode('utf-8')
+    finally:
+        class_lock.release()
+        _leave_flight(status['flight'], job_id)
+    duration = time.perf_counter() - start
+
+    if stop_reason is not None:
+        outcome = stop_reason
+        ANALYZER_STOPPED.inc(analyzer=class_name, reason=stop_reason)
+    else:
+        outcome = (api_results or {}).get('status') or 'error'
+    ANALYZER_DURATION.observe(duration, analyzer=class_name, outcome=outcome)
+    output_text = stdout.decode('utf-8', errors='replace')
+    error_text = stderr.decode('utf-8', errors='replace')
+
+    # Log a bounded summary rather than the raw output streams
+    log = logger.warning if stop_reason else logger.info
+    log("Analyzer stopped" if stop_reason else "Analyzer finished", extra={
+        'analyzer': class_name,
+        'job_id': job_id,
+        'returncode': returncode,
+        'stop_reason': stop_reason,
+        'duration_seconds': round(duration, 3),
+        'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        'pdf_count': pdf_count,
+        'stdout_tail': output_text[-500:],
+        'stderr_tail': error_text[-2000:],
+    })
+
+    status.update({
+        'state': STATE_FINISHED,
+        'returncode': returncode,
+        'stop_reason': stop_reason,
+        'duration_seconds': round(duration, 3),
+        'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        'response': analyzer_response(returncode, api_results, error_text, stop_reason),
+    })
+    _write_json(os.path.join(path, 'status.json'), status)
+
+
+async def _supervise(args, path, started, timeout, max_rss_mb, abandon_after):
+    """
+    Run the analyzer, killing it when a limit is hit.
+
+    Returns ``(returncode, stop_reason, peak_rss_mb, stdout, stderr)``.
+    """
+    returncode = None
+    stop_reason = None
+    peak_rss_mb = None
+    stdout = stderr = b''
+    ANALYZER_JOBS_RUNNING.inc()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=os.name == 'posix'
+        )
+        output = asyncio.ensure_future(process.communicate())
+        while not output.done():
+            await asyncio.wait([output], timeout=WATCH_INTERVAL)
+            if output.done():
+                break
+            rss_mb = _rss_mb(process.pid)
+            if rss_mb is not None:
+                peak_rss_mb = max(peak_rss_mb or 0, rss_mb)
+            stop_reason = _stop_reason(path, started, timeout, max_rss_mb, rss_mb, abandon_after)
+            if stop_reason is not None:
+                await _kill(process)
+                break
+        stdout, stderr = await output
+        returncode = process.returncode
+    except Exception as e:
+        stderr = str(e).encode('utf-8')
+    finally:
+        ANALYZER_JOBS_RUNNING.dec()
+    return returncode, stop_reason, peak_rss_mb, stdout, stderr
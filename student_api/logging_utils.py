@@ -0,0 +1,108 @@
+"""
+Structured logging helpers.
+
+``JsonFormatter`` renders one JSON object per line. ``QueueListenerHandler``
+hands records to a background thread through a queue so that file I/O never
+runs on the request path. ``DailyRotatingFileHandler`` keeps the log file
+within a size and a day.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import date, datetime, timezone
+
+from django.utils.module_loading import import_string
+
+# Attributes every LogRecord carries; anything else was passed via ``extra``
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """
+    Non-blocking handler: records are queued and written by a listener thread.
+
+    The wrapped handler is built from ``handler_class`` and the remaining
+    keyword arguments, so it can be configured from ``settings.LOGGING``.
+    """
+
+    def __init__(self, handler_class='logging.FileHandler', json_output=True, **handler_kwargs):
+        super().__init__(queue.SimpleQueue())
+        self.target = import_string(handler_class)(**handler_kwargs)
+        if json_output:
+            self.target.setFormatter(JsonFormatter())
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, while the arguments are still
+        # valid, but keep the record's extra fields for the JSON formatter.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def setLevel(self, level):
+        super().setLevel(level)
+        self.target.setLevel(level)
+
+    def _stop_listener(self):
+        # Flushes anything still queued; safe to call more than once
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self._stop_listener()
+        self.target.close()
+        super().close()
+
+
+class DailyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    ``RotatingFileHandler`` that also rolls the file over on the first record
+    of a new day, so each numbered backup holds at most ``maxBytes`` and at
+    most one day, and ``backupCount`` bounds the disk the log can use.
+
+    Only one process should write to a rotated file: give every worker
+    process its own ``filename`` when running several.
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        try:
+            self.day = date.fromtimestamp(os.path.getmtime(self.baseFilename))
+        except FileNotFoundError:
+            self.day = date.today()
+
+    def shouldRollover(self, record):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            if os.path.isfile(self.baseFilename) and os.path.getsize(self.baseFilename):
+                return True
+        return super().shouldRollover(record)
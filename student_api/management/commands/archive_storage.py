@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_api import archive
+
+
+def _mb(size):
+    return f'{size / 1024 / 1024:.1f} MB'
+
+
+class Command(BaseCommand):
+    help = (
+        'Move processed PDFs and analyzer outputs untouched for ARCHIVE_AFTER_DAYS into '
+        'per-year LZMA archives (restored automatically on first access), and compact the archives.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float,
+                            help='Archive files untouched this many days (default: settings.ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+        parser.add_argument('--compact', action='store_true',
+                            help="Only merge every year's archive segments into one")
+        parser.add_argument('--restore', nargs='+', metavar='PATH',
+                            help='Restore these archived files, or every archived file under these folders')
+        parser.add_argument('--stats', action='store_true', help='Show what the archive holds per year')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['restore']:
+            for path in options['restore']:
+                self.stdout.write(f'Restored {archive.restore(path)} file(s) under {path}')
+        elif options['compact']:
+            for year in archive.compact(force=True):
+                self.stdout.write(f"{year['year']}: {year['segments']} segment(s), "
+                                  f"{_mb(year['before'])} -> {_mb(year['after'])}")
+        elif not options['stats']:
+            try:
+                report = archive.tier(options['days'], dry_run=options['dry_run'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            if options['dry_run']:
+                self.stdout.write(f"Would archive {report['files']} file(s), {_mb(report['bytes'])}, "
+                                  f"untouched for {report['days']} days (years: {', '.join(report['years']) or '-'})")
+            else:
+                self.stdout.write(
+                    f"Archived {report['files']} file(s) untouched for {report['days']} days: "
+                    f"{_mb(report['bytes'])} -> {_mb(report['archived_bytes'])} in {len(report['segments'])} "
+                    f"new segment(s), {_mb(report['released'])} freed, {len(report['compacted'])} year(s) compacted "
+                    f"in {time.perf_counter() - start:.2f}s"
+                )
+
+        if options['stats'] or options['compact']:
+            self.stdout.write('year       files   original    archived  segments')
+            for year, totals in sorted(archive.stats().items()):
+                self.stdout.write(f"{year:<10} {totals['files']:>5} {_mb(totals['bytes']):>10} "
+                                  f"{_mb(totals['archived_bytes']):>11} {totals.get('segments', 0):>9}")
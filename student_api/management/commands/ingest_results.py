@@ -0,0 +1,122 @@
+import os
+import shutil
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SRC_DIR = os.path.join(settings.BASE_DIR, 'student_api', 'text_recognition', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from analyzer_common.ingest import DEFAULT_CHUNK_PAGES, IngestError, find_pdfs, run_ingest  # noqa: E402
+from analyzer_common.student_index import POLICIES  # noqa: E402
+from student_api import jobs, results_store  # noqa: E402
+from analyzer_common.text_backends import DEFAULT_BACKEND_ENV  # noqa: E402
+
+BAR_WIDTH = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Analyze archived result PDFs in bulk on a process pool. Finished pages are '
+        'checkpointed, so rerunning the same command after a crash or Ctrl-C resumes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='PDF files, directories (searched recursively) or glob patterns')
+        parser.add_argument('--class', dest='class_name', choices=['10', '12'],
+                            help='Class of every PDF (default: from the file or directory name)')
+        parser.add_argument('--year',
+                            help='Academic year of every PDF, e.g. 2019-2020 (default: from the file or directory name)')
+        parser.add_argument('--output-root',
+                            default=os.path.join(settings.BASE_DIR, 'student_api', 'text_recognition', 'output', 'ingest'),
+                            help='Outputs go to <output-root>/<year>/<class>/ (default: text_recognition/output/ingest)')
+        parser.add_argument('--state-dir',
+                            help='Checkpoint directory (default: <output-root>/.ingest_state)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: number of CPUs)')
+        parser.add_argument('--chunk-pages', type=int, default=DEFAULT_CHUNK_PAGES,
+                            help=f'Pages per unit of work and checkpoint (default: {DEFAULT_CHUNK_PAGES})')
+        parser.add_argument('--backend', choices=['auto', 'pdfplumber', 'pdfium', 'poppler'],
+                            help='Text extraction backend (default: $RESULT_TEXT_BACKEND or auto)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Discard the checkpoint and start over')
+        parser.add_argument('--duplicates', choices=POLICIES, default=results_store.duplicate_policy(),
+                            help='Roll number seen again with other marks: newest PDF wins (latest), '
+                                 'highest mark per subject (max), or keep the first and flag it (flag) '
+                                 '(default: DUPLICATE_ROLL_POLICY)')
+        parser.add_argument('--no-store', action='store_true',
+                            help='Only write the output files; do not merge the students into the database')
+
+    def handle(self, *args, **options):
+        if options['chunk_pages'] < 1:
+            raise CommandError('--chunk-pages must be at least 1')
+        if options['backend']:
+            # Inherited by the worker processes
+            os.environ[DEFAULT_BACKEND_ENV] = options['backend']
+
+        pdf_paths = find_pdfs(options['paths'])
+        if not pdf_paths:
+            raise CommandError('No PDF files found')
+
+        output_root = os.path.abspath(options['output_root'])
+        state_dir = options['state_dir'] or os.path.join(output_root, '.ingest_state')
+        if options['restart'] and os.path.isdir(state_dir):
+            shutil.rmtree(state_dir)
+
+        class_name = f"class_{options['class_name']}" if options['class_name'] else None
+        self.stdout.write(f'{len(pdf_paths)} PDF files, checkpoint in {state_dir}')
+        self._tty = self.stdout.isatty()
+        self._last_tenth = -1
+        start = time.perf_counter()
+        try:
+            outcome = run_ingest(
+                pdf_paths, output_root, state_dir=state_dir, class_name=class_name, year=options['year'],
+                chunk_pages=options['chunk_pages'], max_workers=options['workers'], on_progress=self._progress,
+                duplicate_policy=options['duplicates'],
+            )
+        except IngestError as e:
+            raise CommandError(str(e))
+        if self._tty:
+            self.stdout.write('')
+
+        if outcome['interrupted']:
+            raise CommandError('Interrupted; run the same command again to resume.', returncode=130)
+        for path, first_page, error in outcome['failed']:
+            self.stderr.write(f'{path} (from page {first_page + 1}): {error}')
+        for group, result in outcome['groups']:
+            api = (result['overall'] or {}).get('api')
+            self.stdout.write(f"{group['year']} {group['class']}: {result['status']} "
+                              f"({result['students']} students, API {api}) -> {group['output_dir']}")
+            duplicates = result['duplicates'] or {}
+            if duplicates.get('conflicts'):
+                self.stdout.write(f"  {duplicates['conflicts']} roll numbers with conflicting results "
+                                  f"({duplicates['policy']}); see result.json")
+            if duplicates.get('shared_rolls'):
+                self.stdout.write(f"  {duplicates['shared_rolls']} roll numbers shared by students with "
+                                  f"different names (kept both); see result.json")
+            if result['status'] == 'success' and not options['no_store']:
+                stored = results_store.record_file(jobs.students_file(group['output_dir']), options['duplicates'])
+                self.stdout.write(f"  stored: {stored['created']} new, {stored['updated']} updated, "
+                                  f"{stored['conflicts']} conflicts with earlier uploads ({stored['policy']}), "
+                                  f"{stored['shared_rolls']} roll numbers shared with earlier students")
+        self.stdout.write(f'Done in {time.perf_counter() - start:.1f}s')
+        if outcome['failed']:
+            raise CommandError(f"{len(outcome['failed'])} chunks failed; rerun to retry them")
+
+    def _progress(self, progress):
+        total = progress['pages_total']
+        fraction = progress['pages_done'] / total if total else 0
+        line = (f"{progress['pages_done']}/{total} pages, "
+                f"{progress['files_done']}/{progress['files_total']} files, "
+                f"{progress['students']} students")
+        if self._tty:
+            filled = int(BAR_WIDTH * fraction)
+            self.stdout.write(f"\r[{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {fraction:4.0%} {line}", ending='')
+            self.stdout.flush()
+        elif int(fraction * 10) > self._last_tenth:
+            # Not a terminal (e.g. a log file): one line per 10%
+            self._last_tenth = int(fraction * 10)
+            self.stdout.write(f'{fraction:4.0%} {line}')
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_api import results_store
+from student_api.models import GradeSummary, StudentResult
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the subject and overall API of the stored student results under every '
+        'grading policy version (or the ones given), without reading the PDFs again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', type=int, action='append', dest='versions', metavar='VERSION',
+                            help='Grading policy version to apply; repeat for several (default: all)')
+        parser.add_argument('--year', action='append', dest='years', metavar='YYYY-YYYY',
+                            help='Academic year to re-grade; repeat for several (default: all)')
+        parser.add_argument('--class', dest='class_name', choices=['10', '12'],
+                            help='Class to re-grade (default: both)')
+
+    def handle(self, *args, **options):
+        scope = None
+        if options['years'] or options['class_name']:
+            pairs = StudentResult.objects.values_list('academic_year', 'class_name').distinct()
+            if options['years']:
+                pairs = pairs.filter(academic_year__in=options['years'])
+            if options['class_name']:
+                pairs = pairs.filter(class_name=f"class_{options['class_name']}")
+            scope = set(pairs)
+
+        start = time.perf_counter()
+        try:
+            outcome = results_store.regrade(options['versions'], scope)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"Re-graded {outcome['marks']} marks of {outcome['students']} students in "
+            f"{outcome['groups']} year/class groups under policies {outcome['policies']} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+        # Overall API side by side, one column per policy version
+        overall = GradeSummary.objects.filter(subject='', policy_version__in=outcome['policies'])
+        table = {}
+        for row in overall.order_by('academic_year', 'class_name'):
+            table.setdefault((row.academic_year, row.class_name), {})[row.policy_version] = row.api
+        self.stdout.write('year       class     ' + ''.join(f'v{v:<8}' for v in outcome['policies']))
+        for (year, class_name), apis in table.items():
+            if scope is not None and (year, class_name) not in scope:
+                continue
+            self.stdout.write(f'{year:<10} {class_name:<9} ' + ''.join(
+                f"{apis.get(v) if apis.get(v) is not None else '-':<9}" for v in outcome['policies']
+            ))
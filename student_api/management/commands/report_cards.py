@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from student_api import archive
+
+SRC_DIR = os.path.join(settings.BASE_DIR, 'student_api', 'text_recognition', 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from analyzer_common.batch import _new_analyzer  # noqa: E402
+from analyzer_common.report_cards import generate_cards, load_students  # noqa: E402
+from analyzer_common.student_index import load_records  # noqa: E402
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a one-page PDF report card for every student in a class's result CSV "
+        'into a zip archive, on a process pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_name', choices=['10', '12'], required=True)
+        parser.add_argument('--output-dir',
+                            help='Analyzer output directory holding 1Xth_result.csv '
+                                 '(default: text_recognition/output/class_10 or class_12)')
+        parser.add_argument('--output', help='Zip archive to write (default: <output-dir>/report_cards.zip)')
+        parser.add_argument('--year', help="Academic year printed on the cards (default: from the run's students)")
+        parser.add_argument('--school', default='', help='School name printed in the heading')
+        parser.add_argument('--grading-policy', type=int, metavar='VERSION',
+                            help='Grading policy for the bands and points (default: the latest)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: number of CPUs)')
+
+    def handle(self, *args, **options):
+        class_name = f"class_{options['class_name']}"
+        output_dir = options['output_dir'] or os.path.join(
+            settings.BASE_DIR, 'student_api', 'text_recognition', 'output', class_name)
+        result_csv = os.path.join(output_dir, f"{options['class_name']}th_result.csv")
+        if not archive.ensure(result_csv):
+            raise CommandError(f'{result_csv} not found; analyze the PDFs first')
+
+        year = options['year']
+        students_path = os.path.join(output_dir, f"{options['class_name']}th_students.jsonl")
+        if year is None and archive.ensure(students_path):
+            records = load_records(students_path)
+            year = records[0]['year'] if records else ''
+
+        subject_names = _new_analyzer(class_name).subject_codes
+        students = load_students(result_csv, subject_names)
+        output = options['output'] or os.path.join(output_dir, 'report_cards.zip')
+        start = time.perf_counter()
+        try:
+            count = generate_cards(
+                students, output, class_name, subject_names, year=year or '', school=options['school'],
+                policy_version=options['grading_policy'], max_workers=options['workers'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{count} report cards in {elapsed:.1f}s '
+                          f'({count / elapsed * 60 if elapsed else 0:.0f} per minute) -> {output}')
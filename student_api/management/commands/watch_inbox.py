@@ -0,0 +1,37 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from student_api.inbox import InboxWatcher
+
+
+class Command(BaseCommand):
+    help = (
+        'Watch the class data folders (or settings.RESULT_INBOXES) and analyze result PDFs '
+        'as soon as they have been copied in completely.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='store_true',
+                            help='Poll the folders instead of using inotify (e.g. for network mounts)')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between folder listings when polling (default: 2)')
+        parser.add_argument('--process-existing', action='store_true',
+                            help='On the first start, also analyze the PDFs already in the folders')
+
+    def handle(self, *args, **options):
+        watcher = InboxWatcher(
+            poll=options['poll'], interval=options['interval'], process_existing=options['process_existing'],
+        )
+
+        def stop(signum, frame):
+            raise KeyboardInterrupt
+
+        # Stopped by a service manager like Ctrl-C
+        signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(f"Watching {', '.join(watcher.inboxes)} ({watcher.watcher.name})")
+        try:
+            watcher.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping; runs in flight are cancelled and retried on the next start.')
+            watcher.shutdown()
@@ -0,0 +1,196 @@
+"""
+In-process metrics registry rendered in the Prometheus text exposition format.
+
+Metrics live in the memory of the serving process, so no outside collector
+is needed to read them: scrape (or simply open) ``/metrics``. When the app
+runs under several worker processes each worker reports its own values.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets in seconds (Prometheus client defaults plus the long
+# tail an analyzer run can reach)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.extend(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        missing = set(self.label_names) - set(labels)
+        if missing:
+            raise ValueError(f"Missing labels for {self.name}: {', '.join(sorted(missing))}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [
+            f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+            for key, value in items
+        ]
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Render every registered metric as Prometheus text."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'student_api_request_duration_seconds',
+    'Time spent serving a request, per view.',
+    labels=('view', 'method', 'status'),
+))
+REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    'student_api_requests_in_progress',
+    'Requests currently being served.',
+))
+DB_QUERIES = REGISTRY.register(Histogram(
+    'student_api_db_queries_per_request',
+    'Number of database queries issued per request, per view.',
+    labels=('view',),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+))
+DB_QUERY_TIME = REGISTRY.register(Histogram(
+    'student_api_db_query_duration_seconds',
+    'Total database time spent per request, per view.',
+    labels=('view',),
+))
+ANALYZER_DURATION = REGISTRY.register(Histogram(
+    'student_api_analyzer_duration_seconds',
+    'Wall-clock duration of result analyzer runs.',
+    labels=('analyzer', 'outcome'),
+))
+ANALYZER_JOBS_RUNNING = REGISTRY.register(Gauge(
+    'student_api_analyzer_jobs_running',
+    'Analyzer runs currently in progress in this process.',
+))
+ANALYZER_STOPPED = REGISTRY.register(Counter(
+    'student_api_analyzer_stopped_total',
+    'Analyzer runs killed before finishing, by reason (timeout, memory, cancelled, abandoned).',
+    labels=('analyzer', 'reason'),
+))
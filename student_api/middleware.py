@@ -0,0 +1,111 @@
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import REQUEST_LATENCY, REQUESTS_IN_PROGRESS, DB_QUERIES, DB_QUERY_TIME
+
+# Counter of the request being served. A context variable rather than a
+# per-connection wrapper because async views run their queries on executor
+# threads, whose connections differ from the one the request started on;
+# sync_to_async carries the context over to those threads.
+_current_counter = contextvars.ContextVar('query_counter', default=None)
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def _install_wrapper(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='student_api_query_counter')
+
+
+class RequestMetricsMiddleware:
+    """Record per-view latency and database usage for every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for conn in connections.all(initialized_only=True):
+            _install_wrapper(conn)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter, token, start = self._begin()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._end(request, counter, token, start, status)
+
+    async def __acall__(self, request):
+        counter, token, start = self._begin()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._end(request, counter, token, start, status)
+
+    def _begin(self):
+        counter = QueryCounter()
+        token = _current_counter.set(counter)
+        REQUESTS_IN_PROGRESS.inc()
+        return counter, token, time.perf_counter()
+
+    def _end(self, request, counter, token, start, status):
+        _current_counter.reset(token)
+        REQUESTS_IN_PROGRESS.dec()
+        view = self._view_name(request)
+        REQUEST_LATENCY.observe(time.perf_counter() - start, view=view, method=request.method, status=status)
+        DB_QUERIES.observe(counter.count, view=view)
+        DB_QUERY_TIME.observe(counter.duration, view=view)
+
+    @staticmethod
+    def _view_name(request):
+        # Label by route rather than raw path so label cardinality stays bounded
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        if match.view_name:
+            return match.view_name
+        func = match.func
+        return f"{func.__module__}.{getattr(func, '__qualname__', type(func).__qualname__)}"
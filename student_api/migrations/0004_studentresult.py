@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0003_delete_uploadedfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=9)),
+                ('class_name', models.CharField(max_length=8)),
+                ('stream', models.CharField(blank=True, max_length=12)),
+                ('roll_number', models.CharField(max_length=20)),
+                ('name', models.CharField(max_length=200)),
+                ('marks', models.JSONField(default=dict)),
+                ('source', models.CharField(blank=True, max_length=255)),
+                ('source_version', models.FloatField(default=0)),
+                ('conflicts', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'class_name', 'roll_number'), name='unique_student_result')],
+            },
+        ),
+    ]
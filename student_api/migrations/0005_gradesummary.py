@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0004_studentresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=9)),
+                ('class_name', models.CharField(max_length=8)),
+                ('policy_version', models.PositiveIntegerField()),
+                ('subject', models.CharField(blank=True, max_length=8)),
+                ('students', models.PositiveIntegerField()),
+                ('passed', models.PositiveIntegerField()),
+                ('bands', models.JSONField(default=dict)),
+                ('points', models.IntegerField()),
+                ('api', models.FloatField(null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'class_name', 'policy_version', 'subject'), name='unique_grade_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0005_gradesummary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
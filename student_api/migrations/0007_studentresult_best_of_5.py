@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:25
+
+from django.db import migrations, models
+
+
+def fill_best_of_5(apps, schema_editor):
+    StudentResult = apps.get_model('student_api', 'StudentResult')
+    rows = []
+    for row in StudentResult.objects.only('id', 'marks').iterator(chunk_size=2000):
+        scores = sorted(row.marks.values(), reverse=True)
+        if len(scores) >= 5:
+            row.best_of_5 = sum(scores[:5])
+            row.percentage = round(row.best_of_5 / 500 * 100, 2)
+            rows.append(row)
+    StudentResult.objects.bulk_update(rows, ['best_of_5', 'percentage'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0006_studentresult_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentresult',
+            name='best_of_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studentresult',
+            name='percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_best_of_5, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='studentresult',
+            index=models.Index(fields=['academic_year', 'class_name', 'percentage', 'id'], name='student_result_percentage'),
+        ),
+        migrations.AddIndex(
+            model_name='studentresult',
+            index=models.Index(fields=['academic_year', 'class_name', 'best_of_5', 'id'], name='student_result_best_of_5'),
+        ),
+        migrations.AddIndex(
+            model_name='studentresult',
+            index=models.Index(fields=['percentage', 'id'], name='student_percentage_all'),
+        ),
+        migrations.AddIndex(
+            model_name='studentresult',
+            index=models.Index(fields=['best_of_5', 'id'], name='student_best_of_5_all'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import DatabaseError, migrations, transaction
+
+INDEX = 'student_result_name_trgm'
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm is optional: without it (or another database) student search
+    # uses the in-process index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {INDEX} ON student_api_studentresult USING gin (upper(name) gin_trgm_ops)'
+            )
+    except DatabaseError:
+        pass
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0007_studentresult_best_of_5'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
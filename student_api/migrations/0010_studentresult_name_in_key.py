@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-19 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0009_trusteddevice'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='studentresult',
+            name='unique_student_result',
+        ),
+        migrations.AddConstraint(
+            model_name='studentresult',
+            constraint=models.UniqueConstraint(fields=('academic_year', 'class_name', 'roll_number', 'name'), name='unique_student_result'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def name_key(name):
+    # analyzer_common.student_index.name_key as of this migration
+    first_line = str(name or '').strip().split('\n')[0]
+    return ' '.join(first_line.split()).upper()
+
+
+def clean_names(apps, schema_editor):
+    StudentResult = apps.get_model('student_api', 'StudentResult')
+    groups = {}
+    for row in StudentResult.objects.iterator(chunk_size=2000):
+        key = (row.academic_year, row.class_name, row.roll_number, name_key(row.name))
+        groups.setdefault(key, []).append(row)
+
+    removed, cleaned = [], []
+    for (year, class_name, roll, name), rows in groups.items():
+        # Rows that only differed in the gender line or spacing are one
+        # student: the newest result stays, the others go to its conflicts
+        rows.sort(key=lambda row: (row.source_version, row.updated_at, row.id), reverse=True)
+        kept = rows[0]
+        if len(rows) > 1:
+            kept.conflicts = list(kept.conflicts or []) + [
+                {'source': row.source, 'name': name, 'marks': row.marks} for row in rows[1:]
+            ]
+            removed.extend(row.id for row in rows[1:])
+        if kept.name != name or len(rows) > 1:
+            kept.name = name
+            cleaned.append(kept)
+    for start in range(0, len(removed), 500):
+        StudentResult.objects.filter(id__in=removed[start:start + 500]).delete()
+    StudentResult.objects.bulk_update(cleaned, ['name', 'conflicts'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_api', '0010_studentresult_name_in_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_names, migrations.RunPython.noop),
+    ]
@@ -23,9 +23,110 @@ class OTP(models.Model):
             otp=otp
         )
         return otp
+
+    @classmethod
+    async def agenerate_otp(cls, user):
+        # Async variant of generate_otp for async views
+        await cls.objects.filter(user=user).adelete()
+        otp = ''.join([str(random.randint(0, 9)) for _ in range(6)])
+        await cls.objects.acreate(user=user, otp=otp)
+        return otp
     
     def is_valid(self):
         # OTP is valid for 5 minutes
         now = timezone.now()
         time_diff = now - self.created_at
         return time_diff.total_seconds() < 300  # 5 minutes in seconds
+
+
+class TrustedDevice(models.Model):
+    """
+    A browser that passed the OTP check and asked to be remembered (see
+    ``devices``). Only the SHA-256 of its token is stored.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trusted_devices')
+    token_hash = models.CharField(max_length=64, unique=True)
+    # User agent when the device was trusted, to tell devices apart
+    label = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'expires_at'], name='trusted_device_user'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.label[:40]}'
+
+
+class StudentResult(models.Model):
+    """
+    One student's marks in one academic year and class, merged across every
+    upload (see ``results_store``).
+    """
+    academic_year = models.CharField(max_length=9)
+    class_name = models.CharField(max_length=8)
+    stream = models.CharField(max_length=12, blank=True)
+    roll_number = models.CharField(max_length=20)
+    name = models.CharField(max_length=200)
+    # {subject code: mark}
+    marks = models.JSONField(default=dict)
+    # Sum of the five best marks and its percentage, as in 1Xth_result.csv
+    best_of_5 = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField(default=0)
+    source = models.CharField(max_length=255, blank=True)
+    # Modification time of the source PDF; the newest wins under the 'latest' policy
+    source_version = models.FloatField(default=0)
+    # Other results seen for this roll number, kept for review under the 'flag' policy
+    conflicts = models.JSONField(default=list, blank=True)
+    # Indexed: the latest change is the data version of cached comparisons
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            # Two students can share a roll number (a misprint on one sheet); both are kept
+            models.UniqueConstraint(fields=['academic_year', 'class_name', 'roll_number', 'name'],
+                                    name='unique_student_result'),
+        ]
+        # Sort keys of the results API (keyset pagination on key, id)
+        indexes = [
+            models.Index(fields=['academic_year', 'class_name', 'percentage', 'id'], name='student_result_percentage'),
+            models.Index(fields=['academic_year', 'class_name', 'best_of_5', 'id'], name='student_result_best_of_5'),
+            models.Index(fields=['percentage', 'id'], name='student_percentage_all'),
+            models.Index(fields=['best_of_5', 'id'], name='student_best_of_5_all'),
+        ]
+
+    def __str__(self):
+        return f'{self.academic_year} {self.class_name} {self.roll_number}'
+
+
+class GradeSummary(models.Model):
+    """
+    API of one subject (or, with an empty ``subject``, of all subjects) in one
+    academic year and class under one grading policy version, recomputed from
+    ``StudentResult`` by ``results_store.regrade``.
+    """
+    academic_year = models.CharField(max_length=9)
+    class_name = models.CharField(max_length=8)
+    policy_version = models.PositiveIntegerField()
+    # Subject code; '' for the overall row
+    subject = models.CharField(max_length=8, blank=True)
+    students = models.PositiveIntegerField()
+    passed = models.PositiveIntegerField()
+    # {band label: students}
+    bands = models.JSONField(default=dict)
+    points = models.IntegerField()
+    api = models.FloatField(null=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['academic_year', 'class_name', 'policy_version', 'subject'],
+                                    name='unique_grade_summary'),
+        ]
+
+    def __str__(self):
+        return f'{self.academic_year} {self.class_name} v{self.policy_version} {self.subject or "overall"}'
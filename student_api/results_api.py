@@ -0,0 +1,176 @@
+"""
+Paged queries over the stored student results (``StudentResult``).
+
+``page(params)`` filters by academic year, class, stream, subject, band and
+percentage range, sorts by ``percentage`` or ``best_of_5`` and returns one
+page with the ``fields`` asked for. Pages are cut with a keyset cursor - the
+sort value and id of the last row, sent back as ``cursor`` - instead of an
+offset, so every page is an index range scan on
+``(academic_year, class_name, <sort key>, id)`` however deep it is.
+
+``compress(request, response)`` gzips (or, with the ``brotli`` package
+installed, brotli-compresses) a JSON response when the client accepts it.
+"""
+import base64
+import binascii
+import gzip
+import json
+import re
+
+from django.db.models import Func, IntegerField, Q
+from django.utils.cache import patch_vary_headers
+
+from . import jobs  # noqa: F401  (puts the analyzer sources on sys.path)
+from .models import StudentResult
+
+from analyzer_common import grading  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+SORT_KEYS = ('percentage', 'best_of_5')
+FIELDS = ('academic_year', 'class_name', 'stream', 'roll_number', 'name', 'marks',
+          'best_of_5', 'percentage', 'source', 'conflicts', 'updated_at')
+DEFAULT_FIELDS = ('roll_number', 'name', 'stream', 'marks', 'best_of_5', 'percentage')
+# Responses shorter than this are sent as they are
+MIN_COMPRESS_BYTES = 200
+
+_SUBJECT_CODE = re.compile(r'^[A-Za-z0-9]+$')
+
+
+def encode_cursor(value, pk):
+    return base64.urlsafe_b64encode(json.dumps([value, pk]).encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+    if not isinstance(value, (int, float)) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor.')
+    return value, pk
+
+
+def _number(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number.')
+
+
+class SubjectMark(Func):
+    """
+    The mark of one subject from ``StudentResult.marks``. Django's JSON key
+    lookups read a numeric key such as ``184`` as an array index, and CBSE
+    subject codes are all numeric, so the key is always passed as a string.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, code):
+        super().__init__(code=code)
+
+    def as_sql(self, compiler, connection):
+        return 'CAST(JSON_EXTRACT(marks, %s) AS INTEGER)', ['$.' + json.dumps(self.extra['code'])]
+
+    def as_postgresql(self, compiler, connection):
+        return '(marks ->> %s)::integer', [self.extra['code']]
+
+
+def _band_filter(label, subject, policy_version):
+    """Marks of ``subject``, or the percentage when no subject is given, inside band ``label``."""
+    policy = grading.get_policy(policy_version)
+    if label not in policy.labels:
+        raise ValueError(f"Unknown band {label!r}; policy {policy.version} has {', '.join(policy.labels)}")
+    band = policy.bands[policy.labels.index(label)]
+    if subject:
+        return Q(subject_mark__gte=band['min'], subject_mark__lte=band['max'])
+    # Whole-mark bands cover the percentages above the mark below them
+    return Q(percentage__gt=band['min'] - 1, percentage__lte=band['max'])
+
+
+def page(params):
+    """
+    One page of stored results for the query ``params`` (a ``QueryDict`` or
+    dict); returns ``{results, next, limit, sort}``. Bad parameters raise
+    ``ValueError``.
+    """
+    queryset = StudentResult.objects.all()
+    if params.get('year'):
+        queryset = queryset.filter(academic_year=params['year'])
+    if params.get('class'):
+        queryset = queryset.filter(class_name=params['class'])
+    if params.get('stream'):
+        queryset = queryset.filter(stream=params['stream'].lower())
+
+    subject = params.get('subject') or None
+    if subject:
+        if not _SUBJECT_CODE.match(subject):
+            raise ValueError(f'Invalid subject code {subject!r}.')
+        queryset = queryset.alias(subject_mark=SubjectMark(subject)).filter(subject_mark__isnull=False)
+    if params.get('band'):
+        queryset = queryset.filter(_band_filter(params['band'], subject, params.get('policy') or None))
+    low, high = _number(params, 'min_percentage'), _number(params, 'max_percentage')
+    if low is not None:
+        queryset = queryset.filter(percentage__gte=low)
+    if high is not None:
+        queryset = queryset.filter(percentage__lte=high)
+
+    sort = params.get('sort') or '-percentage'
+    key = sort.lstrip('-')
+    if key not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)} (prefix - for descending).")
+    descending = sort.startswith('-')
+    if params.get('cursor'):
+        value, pk = decode_cursor(params['cursor'])
+        after = 'lt' if descending else 'gt'
+        queryset = queryset.filter(Q(**{f'{key}__{after}': value}) | Q(**{key: value, f'id__{after}': pk}))
+    queryset = queryset.order_by(sort, '-id' if descending else 'id')
+
+    fields = [field for field in (params.get('fields') or '').split(',') if field] or list(DEFAULT_FIELDS)
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; available: {', '.join(FIELDS)}")
+    try:
+        limit = int(params.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError('limit must be a whole number.')
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    # One extra row tells whether there is a next page
+    rows = list(queryset.values('id', key, *fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][key], rows[-1]['id'])
+    results = [{field: row[field] for field in fields} for row in rows]
+    return {'results': results, 'next': next_cursor, 'limit': limit, 'sort': sort}
+
+
+def _accepts(request, coding):
+    return any(part.split(';')[0].strip() == coding
+               for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','))
+
+
+def compress(request, response):
+    """Compress ``response`` in place for a client that accepts brotli or gzip."""
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if response.streaming or response.has_header('Content-Encoding') or len(response.content) < MIN_COMPRESS_BYTES:
+        return response
+    if brotli is not None and _accepts(request, 'br'):
+        response.content = brotli.compress(response.content, quality=4)
+        response['Content-Encoding'] = 'br'
+    elif _accepts(request, 'gzip'):
+        response.content = gzip.compress(response.content, compresslevel=6)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response['Content-Length'] = str(len(response.content))
+    return response
@@ -0,0 +1,229 @@
+"""
+Student results kept across uploads, one row per (academic year, class,
+roll number, name).
+
+Every successful analyzer run writes its de-duplicated students to
+``1Xth_students.jsonl`` (see ``analyzer_common.student_index``).
+``record_students`` merges those records into ``StudentResult``: the
+unique key is looked up for a whole batch in one query, and a student
+stored by an earlier upload with a different result is resolved with
+``settings.DUPLICATE_ROLL_POLICY``, as inside a run. A different name under
+a stored roll number is another student, kept alongside and reported.
+
+``regrade`` recomputes the subject and overall API of the stored students
+under every grading policy version (``analyzer_common.grading``) without
+touching the PDFs, and keeps one set of ``GradeSummary`` rows per version.
+"""
+import logging
+from array import array
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import jobs, student_search  # noqa: F401  (jobs puts the analyzer sources on sys.path)
+from .models import GradeSummary, StudentResult
+
+from analyzer_common import grading  # noqa: E402
+from analyzer_common.student_index import (  # noqa: E402
+    KEPT_BOTH, POLICY_LATEST, REPORT_LIMIT, load_records, name_key, resolve, same_result,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per lookup, insert and update statement
+BATCH_SIZE = 500
+# Students fetched per round trip while re-grading
+REGRADE_CHUNK = 5000
+
+FIELDS = ['stream', 'name', 'marks', 'best_of_5', 'percentage', 'source', 'source_version', 'conflicts']
+
+
+def duplicate_policy():
+    return getattr(settings, 'DUPLICATE_ROLL_POLICY', POLICY_LATEST)
+
+
+def _as_record(row):
+    return {
+        'year': row.academic_year, 'class': row.class_name, 'roll': row.roll_number,
+        'stream': row.stream, 'name': row.name, 'marks': row.marks, 'source': row.source,
+        'version': row.source_version, 'conflicts': row.conflicts,
+    }
+
+
+def best_of_5(marks):
+    """``(best_of_5, percentage)`` of a marks dict, as the analyzers compute them."""
+    scores = sorted(marks.values(), reverse=True)
+    if len(scores) < 5:
+        return 0, 0
+    best = sum(scores[:5])
+    return best, round(best / 500 * 100, 2)
+
+
+def _apply(row, record):
+    row.stream = record.get('stream') or ''
+    row.name = name_key(record['name'])
+    row.marks = record['marks']
+    row.best_of_5, row.percentage = best_of_5(record['marks'])
+    row.source = record.get('source') or ''
+    row.source_version = record.get('version') or 0
+    row.conflicts = record.get('conflicts') or []
+    # bulk_update does not touch auto_now fields
+    row.updated_at = timezone.now()
+    return row
+
+
+def _collision(report, current, record, resolution):
+    report['shared_rolls' if resolution == KEPT_BOTH else 'conflicts'] += 1
+    if len(report['collisions']) < REPORT_LIMIT:
+        report['collisions'].append({
+            'year': current['year'], 'class': current['class'], 'roll': current['roll'],
+            'names': [current['name'], record['name']],
+            'sources': [current['source'], record.get('source')], 'resolution': resolution,
+        })
+
+
+def record_students(records, policy=None):
+    """
+    Merge student records into the store; returns a report like
+    ``StudentIndex.report()`` plus the ``created`` and ``updated`` counts.
+    """
+    policy = policy or duplicate_policy()
+    report = {
+        'policy': policy, 'rows': 0, 'created': 0, 'updated': 0,
+        'duplicates': 0, 'conflicts': 0, 'shared_rolls': 0, 'collisions': [],
+    }
+    groups = {}
+    stored = []
+    for record in records:
+        groups.setdefault((record['year'], record['class']), {})[record['roll'], name_key(record['name'])] = record
+        report['rows'] += 1
+
+    with transaction.atomic():
+        for (year, class_name), incoming in groups.items():
+            rolls = list({roll for roll, name in incoming})
+            existing = {}
+            # Stored students of each roll number, to report a new name under it
+            by_roll = {}
+            for start in range(0, len(rolls), BATCH_SIZE):
+                for row in StudentResult.objects.filter(
+                    academic_year=year, class_name=class_name, roll_number__in=rolls[start:start + BATCH_SIZE]
+                ):
+                    existing[row.roll_number, name_key(row.name)] = row
+                    by_roll.setdefault(row.roll_number, row)
+
+            created, updated = [], []
+            for (roll, name), record in incoming.items():
+                row = existing.get((roll, name))
+                if row is None:
+                    created.append(_apply(
+                        StudentResult(academic_year=year, class_name=class_name, roll_number=roll), record
+                    ))
+                    if roll in by_roll:
+                        _collision(report, _as_record(by_roll[roll]), record, KEPT_BOTH)
+                    continue
+                current = _as_record(row)
+                if same_result(current, record):
+                    report['duplicates'] += 1
+                    continue
+                updated.append(_apply(row, resolve(current, record, policy)))
+                _collision(report, current, record, policy)
+
+            StudentResult.objects.bulk_create(created, batch_size=BATCH_SIZE)
+            StudentResult.objects.bulk_update(updated, FIELDS + ['updated_at'], batch_size=BATCH_SIZE)
+            report['created'] += len(created)
+            report['updated'] += len(updated)
+            stored.extend(created + updated)
+    student_search.stored(stored)
+    return report
+
+
+def record_file(path, policy=None):
+    """Merge a ``1Xth_students.jsonl`` file into the store and re-grade what it touched."""
+    records = load_records(path)
+    report = record_students(records, policy)
+    regrade(scope={(record['year'], record['class']) for record in records})
+    logger.info("Stored student results", extra={
+        'path': path,
+        'students_created': report['created'],
+        'students_updated': report['updated'],
+        'duplicates': report['duplicates'],
+        'conflicts': report['conflicts'],
+        'shared_rolls': report['shared_rolls'],
+    })
+    return report
+
+
+def _scope_filter(queryset, scope):
+    """Restrict to the given ``(academic_year, class_name)`` pairs."""
+    if scope is None:
+        return queryset
+    return queryset.filter(reduce(or_, (Q(academic_year=year, class_name=class_name) for year, class_name in scope)))
+
+
+def regrade(versions=None, scope=None):
+    """
+    Recompute ``GradeSummary`` for the stored students in one batched pass.
+
+    ``versions`` limits the grading policy versions (default: all) and
+    ``scope`` the ``(academic_year, class_name)`` pairs (default: all).
+    Marks are read once into flat arrays; every policy then grades all
+    subjects of all years with one ``grading.grade_groups`` call, and all
+    classes of all years with another.
+    """
+    policies = grading.load_policies()
+    if versions:
+        known = {policy.version for policy in policies}
+        unknown = sorted(set(versions) - known)
+        if unknown:
+            raise ValueError(f"No grading policy version {', '.join(map(str, unknown))}")
+        policies = [policy for policy in policies if policy.version in versions]
+    if scope is not None and not scope:
+        return {'policies': [], 'groups': 0, 'students': 0, 'marks': 0, 'summaries': 0}
+
+    groups = {}
+    subjects = {}
+    subject_ids, group_ids, marks = array('q'), array('q'), array('q')
+    students = 0
+    rows = _scope_filter(StudentResult.objects.all(), scope).values_list('academic_year', 'class_name', 'marks')
+    for year, class_name, student_marks in rows.iterator(chunk_size=REGRADE_CHUNK):
+        students += 1
+        group = groups.setdefault((year, class_name), len(groups))
+        for code, mark in student_marks.items():
+            subject_ids.append(subjects.setdefault((group, code), len(subjects)))
+            group_ids.append(group)
+            marks.append(mark)
+    group_keys = list(groups)
+    subject_keys = list(subjects)
+
+    summaries = []
+    for policy in policies:
+        for keys, graded in (
+            (subject_keys, grading.grade_groups(subject_ids, marks, policy, len(subject_keys))),
+            ([(group, '') for group in range(len(group_keys))],
+             grading.grade_groups(group_ids, marks, policy, len(group_keys))),
+        ):
+            for i, (group, code) in enumerate(keys):
+                year, class_name = group_keys[group]
+                summaries.append(GradeSummary(
+                    academic_year=year, class_name=class_name, policy_version=policy.version, subject=code,
+                    students=int(graded['students'][i]), passed=int(graded['passed'][i]),
+                    bands=dict(zip(policy.labels, graded['bands'][i].tolist())),
+                    points=int(graded['points'][i]),
+                    api=None if graded['students'][i] == 0 else float(graded['api'][i]),
+                ))
+
+    with transaction.atomic():
+        stale = GradeSummary.objects.filter(policy_version__in=[policy.version for policy in policies])
+        _scope_filter(stale, scope).delete()
+        GradeSummary.objects.bulk_create(summaries, batch_size=BATCH_SIZE)
+    return {
+        'policies': [policy.version for policy in policies],
+        'groups': len(group_keys),
+        'students': students,
+        'marks': len(marks),
+        'summaries': len(summaries),
+    }
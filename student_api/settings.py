@@ -42,7 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'student_api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -125,15 +127,30 @@ SESSION_COOKIE_AGE = 86400  # 24 hours (1 day) in seconds
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # Keep session even if browser closes
 SESSION_SAVE_EVERY_REQUEST = True  # Update session on every request to keep it active
 
+# "Remember this device" after an OTP login: days a browser skips the OTP,
+# and the most browsers remembered per user (the oldest are revoked)
+TRUSTED_DEVICE_DAYS = 30
+TRUSTED_DEVICES_PER_USER = 10
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
-STATICFILES_DIRS = [
-    os.path.join(BASE_DIR, 'student_api', 'static'),
-]
+# student_api/static is found as the app's static folder; also listing it in
+# STATICFILES_DIRS would collect every file twice
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes every file under a content-hashed name, plus .gz and
+# .br copies of the compressible ones; WhiteNoise serves the hashed names with
+# a ten-year immutable Cache-Control and the precompressed copy the browser
+# accepts. The logo is not checked in yet, so a missing file falls back to its
+# plain name instead of failing the page.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'student_api.storage.StaticFilesStorage'},
+}
+WHITENOISE_MANIFEST_STRICT = False
+
 # Media files (Uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -173,9 +190,14 @@ LOGGING = {
             'formatter': 'verbose',
         },
         'file': {
-            'class': 'logging.FileHandler',
+            # JSON lines written by a background thread, off the request path,
+            # to a file rolled over daily and at 10 MB (at most 11 files)
+            'class': 'student_api.logging_utils.QueueListenerHandler',
+            'handler_class': 'student_api.logging_utils.DailyRotatingFileHandler',
             'filename': 'debug.log',
-            'formatter': 'verbose',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 10,
+            'encoding': 'utf-8',
         },
     },
     'loggers': {
@@ -186,3 +208,53 @@ LOGGING = {
         },
     },
 }
+
+# Metrics endpoint (/metrics): clients allowed to scrape without logging in
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Text extraction engine for the result analyzers: 'auto' (fastest available),
+# 'pdfium', 'pdfplumber' or 'poppler'
+ANALYZER_TEXT_BACKEND = 'auto'
+
+# A roll number seen again in the same academic year and class with other
+# marks: 'latest' (newest PDF wins), 'max' (higher mark per subject) or 'flag'
+# (keep the first result and attach the other for review)
+DUPLICATE_ROLL_POLICY = 'latest'
+
+# Output file downloads: None streams them from Django; 'x-accel' (nginx) or
+# 'x-sendfile' (Apache mod_xsendfile) leaves sending the file to the web server.
+# For nginx, DOWNLOAD_ACCEL_PREFIX is an internal location aliased to
+# student_api/text_recognition/output/
+DOWNLOAD_OFFLOAD = None
+DOWNLOAD_ACCEL_PREFIX = '/protected-output/'
+
+# Student search (/api/students/search/): 'memory' keeps a name and roll number
+# index in each process; 'postgres' matches names with the pg_trgm extension
+STUDENT_SEARCH_BACKEND = 'memory'
+
+# Working directories of background analyzer runs (status, progress events
+# and result document per job). None uses a folder under the system temp dir.
+ANALYZER_JOBS_DIR = None
+
+# Limits for one analyzer run. A run over a limit is killed together with its
+# child processes; None disables that limit.
+ANALYZER_TIMEOUT_SECONDS = 600
+ANALYZER_MAX_RSS_MB = 2048
+# Kill a run once its progress stream has been unwatched this long
+ANALYZER_ABANDON_SECONDS = 30
+
+# Storage tiering (`manage.py archive_storage`, run daily): processed PDFs and
+# analyzer outputs untouched this many days move into per-year LZMA archives
+# under ARCHIVE_DIR (None: student_api/text_recognition/archive) and are
+# restored on first access. None disables tiering.
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_DIR = None
+
+# Folders watched by `manage.py watch_inbox`, mapped to the data folder of the
+# class their PDFs belong to, e.g. {'/mnt/results/class_10': 'class_10'}.
+# When empty the data folders themselves are watched.
+RESULT_INBOXES = {}
+# A new PDF is analyzed once its size has stayed the same this many seconds
+INBOX_SETTLE_SECONDS = 5
+# Inbox runs in flight at once; later arrivals are coalesced into the next run
+INBOX_MAX_JOBS = 2
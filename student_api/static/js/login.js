@@ -0,0 +1,353 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const loginForm = document.getElementById('loginForm');
+    const otpForm = document.getElementById('otpForm');
+    const forgotPasswordForm = document.getElementById('forgotPasswordForm');
+    const resetPasswordForm = document.getElementById('resetPasswordForm');
+    const backBtn = document.getElementById('backToLogin');
+    const backToLoginFromForgot = document.getElementById('backToLoginFromForgot');
+    const backToForgot = document.getElementById('backToForgot');
+    const forgotPasswordLink = document.getElementById('forgotPasswordLink');
+    const resendBtn = document.getElementById('resendOtp');
+    const timerDisplay = document.getElementById('otpTimer');
+    let countdown;
+
+    // Function to show login form and hide others
+    function showLoginForm() {
+        loginForm.style.display = 'block';
+        otpForm.style.display = 'none';
+        forgotPasswordForm.style.display = 'none';
+        resetPasswordForm.style.display = 'none';
+        clearError();
+    }
+
+    // Function to show forgot password form
+    function showForgotPasswordForm() {
+        loginForm.style.display = 'none';
+        otpForm.style.display = 'none';
+        forgotPasswordForm.style.display = 'block';
+        resetPasswordForm.style.display = 'none';
+        clearError();
+    }
+
+    // Function to show reset password form
+    function showResetPasswordForm() {
+        loginForm.style.display = 'none';
+        otpForm.style.display = 'none';
+        forgotPasswordForm.style.display = 'none';
+        resetPasswordForm.style.display = 'block';
+        clearError();
+    }
+
+    // Add event listeners for navigation
+    forgotPasswordLink.addEventListener('click', function(e) {
+        e.preventDefault();
+        showForgotPasswordForm();
+    });
+
+    backToLoginFromForgot.addEventListener('click', showLoginForm);
+    backToForgot.addEventListener('click', showForgotPasswordForm);
+
+    // Function to show message (success or error)
+    function showMessage(message, type = 'error') {
+        let msgDiv = document.querySelector('.alert-msg');
+        if (!msgDiv) {
+            msgDiv = document.createElement('div');
+            msgDiv.className = 'alert-msg';
+            const currentForm = otpForm.style.display === 'block' ? otpForm : loginForm;
+            currentForm.insertBefore(msgDiv, currentForm.firstChild);
+        }
+        msgDiv.textContent = message;
+        msgDiv.style.display = 'block';
+        msgDiv.style.backgroundColor = type === 'success' ? '#e6ffe6' : '#ffe5e5';
+        msgDiv.style.color = type === 'success' ? '#198754' : '#dc3545';
+        msgDiv.style.padding = '1rem';
+        msgDiv.style.borderRadius = '8px';
+        msgDiv.style.marginBottom = '1.5rem';
+        msgDiv.style.fontSize = '14px';
+        msgDiv.style.textAlign = 'center';
+        // Auto-hide after 5 seconds
+        setTimeout(() => {
+            msgDiv.style.display = 'none';
+        }, 5000);
+    }
+
+    // Function to clear message
+    function clearError() {
+        const msgDiv = document.querySelector('.alert-msg');
+        if (msgDiv) {
+            msgDiv.style.display = 'none';
+        }
+    }
+
+    // Function to show OTP section
+    function showOTPSection() {
+        loginForm.style.display = 'none';
+        otpForm.style.display = 'block';
+        startOTPTimer();
+        clearError();
+    }
+
+    // Function to show login section
+    function showLoginSection() {
+        otpForm.style.display = 'none';
+        loginForm.style.display = 'block';
+        clearError();
+    }
+
+    // Show forgot password form
+    function showForgotPasswordForm() {
+        loginForm.style.display = 'none';
+        otpForm.style.display = 'none';
+        resetPasswordForm.style.display = 'none';
+        forgotPasswordForm.style.display = 'block';
+        clearError();
+    }
+
+    // Show reset password form
+    function showResetPasswordForm() {
+        loginForm.style.display = 'none';
+        otpForm.style.display = 'none';
+        forgotPasswordForm.style.display = 'none';
+        resetPasswordForm.style.display = 'block';
+        clearError();
+    }
+
+    // Event Listeners for navigation
+    backBtn.addEventListener('click', showLoginSection);
+    backToLoginFromForgot.addEventListener('click', showLoginSection);
+    backToForgot.addEventListener('click', showForgotPasswordForm);
+    forgotPasswordLink.addEventListener('click', function(e) {
+        e.preventDefault();
+        showForgotPasswordForm();
+    });
+
+    // Forgot Password form submit handler
+    forgotPasswordForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        clearError();
+
+        const formData = new FormData(forgotPasswordForm);
+
+        fetch('/forgot-password/', {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+            },
+            credentials: 'same-origin'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                showMessage(data.message || 'OTP has been sent to your email.', 'success');
+                showResetPasswordForm();
+            } else {
+                showMessage(data.message || 'Error sending OTP. Please try again.', 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('An error occurred. Please try again.');
+        });
+    });
+
+    // Reset Password form submit handler
+    resetPasswordForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        clearError();
+
+        if (resetPasswordForm.querySelector('#new_password').value !== 
+            resetPasswordForm.querySelector('#confirm_password').value) {
+            showError('Passwords do not match.');
+            return;
+        }
+
+        const formData = new FormData(resetPasswordForm);
+
+        fetch('/reset-password/', {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+            },
+            credentials: 'same-origin'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                showMessage(data.message || 'Password reset successful.', 'success');
+                setTimeout(() => {
+                    showLoginForm();
+                    clearError();
+                }, 2000);
+            } else {
+                showMessage(data.message || 'Error resetting password. Please try again.', 'error');
+                setTimeout(() => {
+                    clearError();
+                }, 5000);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('An error occurred. Please try again.');
+        });
+    });
+
+    // Back button handler
+    backBtn.addEventListener('click', showLoginSection);
+
+    // Login form submit handler
+    loginForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        clearError();
+
+        const formData = new FormData(loginForm);
+
+        fetch(document.body.dataset.loginUrl, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+            },
+            credentials: 'same-origin'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('Login response:', data); // Debug log
+            if (data.success) {
+                if (data.require_otp) {
+                    showOTPSection();
+                    startOTPTimer(); // Start timer immediately
+                    showError(data.message || 'OTP has been sent to your email.');
+                } else {
+                    window.location.href = data.redirect_url || '/dashboard/';
+                }
+            } else {
+                showError(data.message || 'Invalid credentials or insufficient permissions.');
+            }
+        })
+        .catch(error => {
+            console.error('Login error:', error);
+            showError('An error occurred. Please try again.');
+        });
+    });
+
+    // OTP form submit handler
+    otpForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        clearError();
+
+        const formData = new FormData(otpForm);
+
+        fetch(document.body.dataset.verifyOtpUrl, {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                window.location.href = data.redirect_url || '/dashboard/';
+            } else {
+                showError(data.message || 'Invalid OTP. Please try again.');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('An error occurred. Please try again.');
+        });
+    });
+
+    // OTP timer function
+    function startOTPTimer() {
+        let timeLeft = 30;
+        resendBtn.disabled = true;
+
+        clearInterval(countdown);
+        countdown = setInterval(() => {
+            if (timeLeft <= 0) {
+                clearInterval(countdown);
+                resendBtn.disabled = false;
+                timerDisplay.textContent = '';
+            } else {
+                timerDisplay.textContent = `Resend OTP in ${timeLeft} seconds`;
+                timeLeft--;
+            }
+        }, 1000);
+    }
+
+    // Resend OTP handler
+    resendBtn.addEventListener('click', function() {
+        if (resendBtn.disabled) return;
+
+        clearError();
+        resendBtn.disabled = true;
+
+        fetch(document.body.dataset.resendOtpUrl, {
+            method: 'POST',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                showError('New OTP has been sent to your email');
+                startOTPTimer();
+            } else {
+                showError(data.message || 'Failed to resend OTP. Please try again.');
+                resendBtn.disabled = false;
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError('An error occurred while resending OTP.');
+            resendBtn.disabled = false;
+        });
+    });
+
+    // Initialize OTP input to accept only numbers
+    const otpInput = document.getElementById('otp');
+    otpInput.addEventListener('input', function() {
+        this.value = this.value.replace(/[^0-9]/g, '');
+    });
+
+    // Auto-hide Django messages after 5 seconds
+    const djangoMessages = document.querySelector('.error-msg');
+    if (djangoMessages) {
+        setTimeout(() => {
+            djangoMessages.style.display = 'none';
+        }, 5000);
+    }
+});
@@ -0,0 +1,329 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const uploadForm = document.getElementById('uploadForm');
+    const errorMessage = document.getElementById('errorMessage');
+    const academicYearSelect = document.getElementById('academic_year');
+
+    // Load PDF files on page load
+    loadPDFFiles();
+
+    // Handle file selection
+    document.querySelectorAll('input[type="file"]').forEach(input => {
+        input.addEventListener('change', function() {
+            const id = this.id.replace('file_', '');
+            const statusSpan = document.getElementById(`status_${id}`);
+            const uploadStatusSpan = document.getElementById(`upload_status_${id}`);
+
+            if (this.files.length > 0) {
+                const file = this.files[0];
+                // Check if file is PDF
+                if (!file.name.toLowerCase().endsWith('.pdf')) {
+                    showAlert('Please select a PDF file only', 'error');
+                    this.value = ''; // Clear the file input
+                    statusSpan.textContent = 'No file chosen';
+                    uploadStatusSpan.textContent = '-';
+                    uploadStatusSpan.className = 'file-status';
+                    return;
+                }
+
+                statusSpan.textContent = file.name;
+                uploadStatusSpan.textContent = 'Ready to upload';
+                uploadStatusSpan.className = 'file-status';
+            } else {
+                statusSpan.textContent = 'No file chosen';
+                uploadStatusSpan.textContent = '-';
+                uploadStatusSpan.className = 'file-status';
+            }
+        });
+    });
+
+    // Handle form submission
+    uploadForm.addEventListener('submit', function(e) {
+        const academicYear = academicYearSelect.value.trim();
+        if (!academicYear) {
+            showAlert('Please select the Academic Year', 'error');
+            academicYearSelect.focus();
+            e.preventDefault();
+            return;
+        }
+        let hasFiles = false;
+        document.querySelectorAll('input[type="file"]').forEach(input => {
+            if (input.files.length > 0) hasFiles = true;
+        });
+        if (!hasFiles) {
+            showAlert('Please select at least one PDF file to upload', 'error');
+            e.preventDefault();
+            return;
+        }
+        // Let the browser submit the form normally
+    });
+});
+
+function showAlert(message, type) {
+    const messages = document.querySelector('.messages');
+    messages.innerHTML = `
+        <div class="alert alert-${type} alert-dismissible fade show" role="alert">
+            ${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+        </div>
+    `;
+
+    // Auto-hide alert after 7 seconds
+    setTimeout(() => {
+        const alerts = messages.getElementsByClassName('alert');
+        for(let alert of alerts) {
+            alert.style.display = 'none';
+        }
+    }, 7000);
+}
+
+function refreshPDFList() {
+    const refreshBtn = document.querySelector('.refresh-btn');
+    refreshBtn.classList.add('rotating');
+    loadPDFFiles();
+
+    // Remove rotating class after animation
+    setTimeout(() => {
+        refreshBtn.classList.remove('rotating');
+    }, 1000);
+}
+
+function loadPDFFiles() {
+    fetch('/get-pdf-files/')
+        .then(response => response.json())
+        .then(data => {
+            const pdfGrid = document.getElementById('pdfGrid');
+            pdfGrid.innerHTML = '';
+
+            const classes = {
+                'class_10': 'Class X',
+                'class_12_science': 'Class XII Science',
+                'class_12_commerce': 'Class XII Commerce',
+                'class_12_humanities': 'Class XII Humanities'
+            };
+
+            let latest12th = {science: '', commerce: '', humanities: ''};
+            // Create a row for the 4 class cards
+            const row = document.createElement('div');
+            row.className = 'pdf-row';
+            for (const [className, displayName] of Object.entries(classes)) {
+                const files = data.files[className] || [];
+                const card = document.createElement('div');
+                card.className = 'pdf-card pdf-card-inline';
+                card.innerHTML = `
+                    <h3>${displayName}</h3>
+                    <div class="pdf-list">
+                        ${files.length ? files.map(pdf => `
+                            <div class="pdf-item">
+                                <i class="fas fa-file-pdf"></i>
+                                <span title="${pdf}">${pdf.slice(0, 10)}${pdf.length > 10 ? '...' : ''}</span>
+                                <button class="pdf-remove-btn" onclick="removePDF('${className}', '${pdf}', this)"><i class='fas fa-trash'></i> Remove</button>
+                            </div>
+                        `).join('') : '<p class="no-files">No PDF files available</p>'}
+                    </div>
+                `;
+                row.appendChild(card);
+                // Track latest file for each 12th stream
+                if (className === 'class_12_science' && files.length) latest12th.science = files[files.length-1];
+                if (className === 'class_12_commerce' && files.length) latest12th.commerce = files[files.length-1];
+                if (className === 'class_12_humanities' && files.length) latest12th.humanities = files[files.length-1];
+            }
+            pdfGrid.appendChild(row);
+            // Track latest file for Class 10th
+            let latest10th = '';
+            if (data.files['class_10'] && data.files['class_10'].length) {
+                latest10th = data.files['class_10'][data.files['class_10'].length-1];
+            }
+            // Add unified process buttons for Class 10th and Class 12th at the bottom
+            const btnContainer = document.createElement('div');
+            btnContainer.className = 'pdf-process-btn-row';
+            const process10thBtn = document.createElement('button');
+            process10thBtn.className = 'pdf-process-btn';
+            process10thBtn.innerHTML = 'Process Class X PDF';
+            process10thBtn.onclick = function(event) {
+                processLatest10thPDF(latest10th, event);
+            };
+            process10thBtn.disabled = !latest10th;
+            btnContainer.appendChild(process10thBtn);
+            const process12thBtn = document.createElement('button');
+            process12thBtn.className = 'pdf-process-btn';
+            process12thBtn.innerHTML = 'Process All Class XII Streams';
+            process12thBtn.onclick = function(event) {
+                processAll12thPDFs(latest12th, event);
+            };
+            process12thBtn.disabled = !(latest12th.science || latest12th.commerce || latest12th.humanities);
+            btnContainer.appendChild(process12thBtn);
+            pdfGrid.appendChild(btnContainer);
+        })
+        .catch(error => {
+            showAlert('Error loading PDF files: ' + error.message, 'error');
+        });
+}
+
+function formatApiSummary(result) {
+    // One-line summary of the analyzer's result document
+    if (!result || !result.overall) return '';
+    const api = result.overall.api === null ? 'n/a' : result.overall.api;
+    return ` &mdash; ${result.students} students, overall API ${api}`;
+}
+
+function showProcessingResult(data) {
+    const messages = document.querySelector('.messages');
+    if (data.status === 'success') {
+        messages.innerHTML = `
+            <div class="alert alert-success alert-dismissible fade show" role="alert">
+                ${data.message}${formatApiSummary(data.api_results)}
+                <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+            </div>
+        `;
+        console.log('Processing output:', data.api_results);
+    } else {
+        messages.innerHTML = `
+            <div class="alert alert-error alert-dismissible fade show" role="alert">
+                ${data.message}
+                <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+            </div>
+        `;
+    }
+}
+
+function formatProgress(progress) {
+    // Button label for an analyzer progress event
+    const stages = {
+        waiting: 'Waiting for another run of this class',
+        starting: 'Starting',
+        extract_text: 'Reading pages',
+        extract_regions: 'Reading pages',
+        finished: 'Finishing'
+    };
+    const stage = stages[progress.stage] || 'Calculating results';
+    const pages = progress.total_pages ? `${progress.pages}/${progress.total_pages}` : `${progress.pages}`;
+    return `<i class="fas fa-spinner fa-spin"></i> ${stage} &middot; ${pages} pages &middot; ${progress.students} students`;
+}
+
+function runAnalyzer(formData, processBtn) {
+    // Start an analyzer run, then follow its progress over Server-Sent Events
+    const originalText = processBtn.innerHTML;
+    processBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+    processBtn.disabled = true;
+    const cancelBtn = document.createElement('button');
+    cancelBtn.className = 'pdf-remove-btn';
+    cancelBtn.innerHTML = '<i class="fas fa-times"></i> Cancel';
+    let stopOnLeave = null;
+    const done = () => {
+        processBtn.innerHTML = originalText;
+        processBtn.disabled = false;
+        cancelBtn.remove();
+        if (stopOnLeave) window.removeEventListener('pagehide', stopOnLeave);
+    };
+    const showError = (message) => {
+        showProcessingResult({status: 'error', message: `Error processing PDF: ${message}`});
+        done();
+    };
+
+    const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    fetch('/process-pdf/', {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrftoken
+        },
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status !== 'started') {
+            showProcessingResult(data);
+            done();
+            return;
+        }
+        // Stop the run on the server if the teacher cancels or leaves the
+        // page; a run joined from another teacher's request is left alone
+        if (!data.joined) {
+            const cancelData = new FormData();
+            cancelData.append('csrfmiddlewaretoken', csrftoken);
+            cancelBtn.onclick = () => {
+                cancelBtn.disabled = true;
+                fetch(data.cancel_url, {method: 'POST', body: cancelData});
+            };
+            processBtn.after(cancelBtn);
+            stopOnLeave = () => navigator.sendBeacon(data.cancel_url, cancelData);
+            window.addEventListener('pagehide', stopOnLeave);
+        }
+
+        const events = new EventSource(data.events_url);
+        events.addEventListener('progress', (e) => {
+            processBtn.innerHTML = formatProgress(JSON.parse(e.data));
+        });
+        events.addEventListener('result', (e) => {
+            events.close();
+            showProcessingResult(JSON.parse(e.data));
+            done();
+        });
+        events.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (events.readyState === EventSource.CLOSED) {
+                showError('lost connection to the progress stream');
+            }
+        };
+    })
+    .catch(error => showError(error.message));
+}
+
+function processLatest10thPDF(latest10th, event) {
+    const formData = new FormData();
+    formData.append('class_name', 'class_10');
+    formData.append('file_name', latest10th);
+    runAnalyzer(formData, event.target);
+}
+
+function processAll12thPDFs(latest12th, event) {
+    const formData = new FormData();
+    formData.append('class_name', 'class_12_all');
+    formData.append('file_name', JSON.stringify(latest12th));
+    runAnalyzer(formData, event.target);
+}
+
+function removePDF(className, fileName, btn) {
+    if (!confirm(`Are you sure you want to delete this PDF?`)) return;
+    btn.disabled = true;
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Removing...';
+    const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    const formData = new FormData();
+    formData.append('class_name', className);
+    formData.append('file_name', fileName);
+    fetch('/delete-pdf/', {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrftoken
+        },
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            showAlert(data.message, 'success');
+            refreshPDFList();
+        } else {
+            showAlert(data.message, 'error');
+            btn.disabled = false;
+            btn.innerHTML = '<i class="fas fa-trash"></i> Remove';
+        }
+    })
+    .catch(error => {
+        showAlert('Error deleting PDF: ' + error.message, 'error');
+        btn.disabled = false;
+        btn.innerHTML = '<i class="fas fa-trash"></i> Remove';
+    });
+}
+
+function clearFileUpload(className, btn) {
+    // Clear the file input and status for the given class
+    const fileInput = document.getElementById(`file_${className.replace('class_', '')}`);
+    const statusSpan = document.getElementById(`status_${className.replace('class_', '')}`);
+    const uploadStatusSpan = document.getElementById(`upload_status_${className.replace('class_', '')}`);
+    if (fileInput) fileInput.value = '';
+    if (statusSpan) statusSpan.textContent = 'No file chosen';
+    if (uploadStatusSpan) {
+        uploadStatusSpan.textContent = '-';
+        uploadStatusSpan.className = 'file-status';
+    }
+}
@@ -0,0 +1,18 @@
+"""Static files storage: content-hashed names plus gzip and brotli copies."""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    ``CompressedManifestStaticFilesStorage`` that, unless
+    ``WHITENOISE_MANIFEST_STRICT`` is on, gives a file that is not there its
+    plain URL (a 404 for that file) instead of failing the whole page.
+    """
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if self.manifest_strict or content is not None:
+                raise
+            return name
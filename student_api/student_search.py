@@ -0,0 +1,304 @@
+"""
+Typeahead search over the stored students by name and roll number.
+
+``StudentSearchIndex`` keeps every ``StudentResult`` in memory as:
+
+* a sorted list of ``(roll number, slot)`` for exact and prefix roll lookups
+* sorted lists of the names and of every word of every name, so names
+  starting with the query, or with a word starting with each query word
+  ("RAH SHAR" for "RAHUL SHARMA"), are a ``bisect`` away
+* an inverted index of name trigrams for fuzzy matches ("RAHL SHRMA"),
+  consulted only when the prefixes do not fill the page: the trigrams the
+  query shares with every name are counted with one ``bincount``
+
+The index is built on first use and then kept up to date incrementally:
+``results_store`` hands it the rows it stores, and at most every
+``REFRESH_SECONDS`` it fetches the rows other processes changed since
+(``updated_at`` is indexed). It is rebuilt only when rows were deleted.
+
+With ``STUDENT_SEARCH_BACKEND = 'postgres'`` in the Django settings the
+names are matched by PostgreSQL instead, with the ``pg_trgm`` extension and
+the trigram index that migration 0008 creates where the extension is
+available.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max, Q
+
+from .comparison import identity
+from .models import StudentResult
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Seconds between checks for rows stored by other processes
+REFRESH_SECONDS = 2
+# Rows changed this long before the last one seen are fetched again, for
+# writers whose clocks or transactions lag behind
+CLOCK_SKEW = timedelta(seconds=5)
+# Least share of the query's trigrams a fuzzy match must have
+MIN_SIMILARITY = 0.5
+
+COLUMNS = ('id', 'academic_year', 'class_name', 'stream', 'roll_number', 'name', 'percentage')
+
+
+def trigrams(text):
+    """Trigrams of every word of ``text``, padded like ``pg_trgm`` does."""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _prefix_range(entries, prefix):
+    """Slice of the sorted ``(key, ...)`` tuples whose key starts with ``prefix``."""
+    return bisect_left(entries, (prefix,)), bisect_left(entries, (prefix + '\uffff',))
+
+
+class StudentSearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}  # slot -> result dict
+        self.slots = {}  # StudentResult id -> slot
+        self.rolls = []  # sorted (roll, slot)
+        self.names = []  # sorted (name, slot)
+        self.words = []  # sorted (word, name, slot)
+        self.grams = {}  # trigram -> set of slots
+        self.postings = {}  # trigram -> numpy array of its slots, made on first use
+        self.gram_counts = np.zeros(0, dtype=np.int32)  # trigrams per slot
+        self.seen = None  # latest updated_at applied
+        self.checked = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _keys(self, slot, row):
+        yield self.rolls, (row['roll_number'], slot)
+        yield self.names, (row['name'], slot)
+        for word in row['words']:
+            yield self.words, (word, row['name'], slot)
+
+    def _entry(self, values):
+        slot = self.slots.setdefault(values['id'], len(self.slots))
+        name = identity(values['name'])
+        row = {column: values[column] for column in COLUMNS if column != 'id'}
+        row.update(name=name, words=sorted(set(name.split())), grams=trigrams(name))
+        for gram in row['grams']:
+            self.grams.setdefault(gram, set()).add(slot)
+            self.postings.pop(gram, None)
+        if slot >= len(self.gram_counts):
+            self.gram_counts = np.resize(self.gram_counts, max(slot + 1, 2 * len(self.gram_counts)))
+        self.gram_counts[slot] = len(row['grams'])
+        changed = values.get('updated_at')
+        if changed and (self.seen is None or changed > self.seen):
+            self.seen = changed
+        self.rows[slot] = row
+        return slot, row
+
+    def _add(self, values):
+        slot = self.slots.get(values['id'])
+        if slot in self.rows:
+            row = self.rows.pop(slot)
+            for entries, key in self._keys(slot, row):
+                i = bisect_left(entries, key)
+                if i < len(entries) and entries[i] == key:
+                    del entries[i]
+            for gram in row['grams']:
+                self.grams[gram].discard(slot)
+                self.postings.pop(gram, None)
+        slot, row = self._entry(values)
+        for entries, key in self._keys(slot, row):
+            insort(entries, key)
+
+    def build(self):
+        """Load every stored student; the lists are sorted once at the end."""
+        self._reset()
+        for values in StudentResult.objects.values(*COLUMNS, 'updated_at').iterator(chunk_size=5000):
+            slot, row = self._entry(values)
+            for entries, key in self._keys(slot, row):
+                entries.append(key)
+        for entries in (self.rolls, self.names, self.words):
+            entries.sort()
+        self.checked = time.monotonic()
+
+    def update(self, results):
+        """Apply stored ``StudentResult`` objects or value dicts."""
+        with self.lock:
+            for result in results:
+                if not isinstance(result, dict):
+                    result = {column: getattr(result, column) for column in COLUMNS + ('updated_at',)}
+                self._add(result)
+
+    def refresh(self, force=False):
+        """Pick up rows changed by other processes (at most every ``REFRESH_SECONDS``)."""
+        if not force and time.monotonic() - self.checked < REFRESH_SECONDS:
+            return
+        with self.lock:
+            if not force and time.monotonic() - self.checked < REFRESH_SECONDS:
+                return
+            stats = StudentResult.objects.aggregate(rows=Count('id'), changed=Max('updated_at'))
+            if stats['changed'] and (self.seen is None or stats['changed'] > self.seen):
+                changed = StudentResult.objects.all()
+                if self.seen is not None:
+                    changed = changed.filter(updated_at__gte=self.seen - CLOCK_SKEW)
+                for values in changed.values(*COLUMNS, 'updated_at').iterator(chunk_size=5000):
+                    self._add(values)
+            if stats['rows'] != len(self.rows):
+                # Rows were deleted
+                self.build()
+                return
+            self.checked = time.monotonic()
+
+    def _posting(self, gram):
+        posting = self.postings.get(gram)
+        if posting is None:
+            posting = self.postings[gram] = np.fromiter(self.grams.get(gram, ()), dtype=np.int64)
+        return posting
+
+    def search(self, query, limit=DEFAULT_LIMIT, year=None, class_name=None):
+        """Best matches for ``query``: rolls, then name prefixes, then fuzzy names."""
+        query = ' '.join(query.split()).upper()
+        if not query:
+            return []
+        found = {}
+
+        def take(slot, match, score):
+            row = self.rows[slot]
+            if slot not in found and (not year or row['academic_year'] == year) and (
+                    not class_name or row['class_name'] == class_name):
+                found[slot] = (match, score)
+            return len(found) >= limit
+
+        with self.lock:
+            if query.isdigit():
+                for i in range(*_prefix_range(self.rolls, query)):
+                    roll, slot = self.rolls[i]
+                    if take(slot, 'roll' if roll == query else 'roll_prefix', 1.0 if roll == query else 0.9):
+                        break
+                return self._results(found)
+
+            # Names starting with the query, then names with a word starting
+            # with each query word (the last one may still be being typed)
+            for i in range(*_prefix_range(self.names, query)):
+                if take(self.names[i][1], 'name_prefix', 1.0):
+                    return self._results(found)
+            words = query.split()
+            ranges = sorted((_prefix_range(self.words, word) for word in words), key=lambda r: r[1] - r[0])
+            for i in range(*ranges[0]):
+                slot = self.words[i][2]
+                row_words = self.rows[slot]['words']
+                if all(any(w.startswith(word) for w in row_words) for word in words):
+                    if take(slot, 'name_prefix', 0.8):
+                        return self._results(found)
+
+            # Fuzzy: the trigrams the query shares with every name, counted at
+            # once; ties go to the name with the fewest other trigrams
+            grams = trigrams(query)
+            postings = [self._posting(gram) for gram in grams]
+            if not any(len(posting) for posting in postings):
+                return self._results(found)
+            common = np.bincount(np.concatenate(postings), minlength=len(self.gram_counts))
+            candidates = np.flatnonzero(common >= MIN_SIMILARITY * len(grams))
+            shared = common[candidates]
+            similarity = shared / len(grams)
+            overlap = shared / (len(grams) + self.gram_counts[candidates] - shared)
+            for i in np.lexsort((-overlap, -similarity)):
+                if take(int(candidates[i]), 'fuzzy', round(float(similarity[i]) * 0.7, 3)):
+                    break
+            return self._results(found)
+
+    def _results(self, found):
+        results = []
+        for slot, (match, score) in sorted(found.items(), key=lambda item: -item[1][1]):
+            row = self.rows[slot]
+            results.append({
+                'roll_number': row['roll_number'], 'name': row['name'], 'academic_year': row['academic_year'],
+                'class_name': row['class_name'], 'stream': row['stream'], 'percentage': row['percentage'],
+                'match': match, 'score': score,
+            })
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def index():
+    """The process-wide index, built on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                built = StudentSearchIndex()
+                built.build()
+                _index = built
+    return _index
+
+
+def stored(results):
+    """Called with the rows ``results_store`` wrote; no-op until the index is built."""
+    if _index is not None:
+        _index.update(results)
+
+
+def backend():
+    return getattr(settings, 'STUDENT_SEARCH_BACKEND', 'memory')
+
+
+def _search_postgres(query, limit, year, class_name):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db import connection, transaction
+    from django.db.models.functions import Upper
+
+    query = ' '.join(query.split()).upper()
+    if not query:
+        return []
+    rows = StudentResult.objects.all()
+    if year:
+        rows = rows.filter(academic_year=year)
+    if class_name:
+        rows = rows.filter(class_name=class_name)
+    if query.isdigit():
+        rows = rows.filter(roll_number__startswith=query).order_by('roll_number')
+        return [
+            dict(row, match='roll' if row['roll_number'] == query else 'roll_prefix',
+                 score=1.0 if row['roll_number'] == query else 0.9)
+            for row in rows.values(*COLUMNS[1:])[:limit]
+        ]
+    # The %> operator (not a comparison of the similarity) is what the
+    # trigram index of migration 0008 can answer; its cut-off is a setting
+    rows = rows.filter(
+        Q(name__istartswith=query) | TrigramWordSimilar(Upper('name'), query)
+    ).annotate(similarity=TrigramWordSimilarity(query, Upper('name'))).order_by('-similarity', 'name')
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                           [str(MIN_SIMILARITY)])
+        found = list(rows.values(*COLUMNS[1:], 'similarity')[:limit])
+    results = []
+    for row in found:
+        similarity = row.pop('similarity')
+        row['name'] = identity(row['name'])
+        prefix = row['name'].startswith(query)
+        results.append(dict(row, match='name_prefix' if prefix else 'fuzzy',
+                            score=1.0 if prefix else round(similarity * 0.7, 3)))
+    return results
+
+
+def search(query, limit=DEFAULT_LIMIT, year=None, class_name=None):
+    """Students matching ``query`` (a name or roll number, complete or not)."""
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    if backend() == 'postgres':
+        return _search_postgres(query, limit, year, class_name)
+    search_index = index()
+    search_index.refresh()
+    return search_index.search(query, limit, year, class_name)
@@ -0,0 +1,159 @@
+"""Analyzer job lifecycle in ``jobs``: every run finishes, and publishes its output set atomically."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from student_api import jobs
+
+# Stands in for an analyzer: writes the result document given as its first
+# argument and one CSV naming the year it was run for
+FAKE_ANALYZER = '''
+import argparse, json, os
+parser = argparse.ArgumentParser()
+parser.add_argument('result')
+for flag in ('--result-file', '--progress-file', '--output-dir', '--backend', '--year', '--duplicates'):
+    parser.add_argument(flag)
+args = parser.parse_args()
+os.makedirs(args.output_dir, exist_ok=True)
+with open(os.path.join(args.output_dir, '10th_result.csv'), 'w') as f:
+    f.write(args.year)
+result = json.loads(args.result)
+result['files'] = [os.path.join(args.output_dir, '10th_result.csv')]
+with open(args.result_file, 'w') as f:
+    json.dump(result, f)
+'''
+
+
+class JobTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        settings = override_settings(ANALYZER_JOBS_DIR=os.path.join(self.root, 'jobs'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.script = os.path.join(self.root, 'analyzer.py')
+        with open(self.script, 'w') as f:
+            f.write(FAKE_ANALYZER)
+        self.output_dir = os.path.join(self.root, 'output', 'class_10')
+        # Storing students needs the database; these tests are about the job
+        patcher = mock.patch.object(jobs, '_store_results', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self, result=None, year='2025-2026'):
+        args = [sys.executable, self.script, json.dumps({'status': 'success'} if result is None else result)]
+        pdf = os.path.join(self.root, f'{uuid.uuid4().hex}.pdf')
+        job_id, _ = jobs.start_job('class_10', args, None, [pdf], year, self.output_dir, unattended=True)
+        return job_id
+
+    def wait(self, job_id, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = jobs.read_status(job_id)
+            if status['state'] == jobs.STATE_FINISHED:
+                return status
+            time.sleep(0.05)
+        self.fail(f'job {job_id} did not finish')
+
+    def run_dirs(self):
+        """The hidden run directories next to the output set."""
+        return sorted(name for name in os.listdir(os.path.dirname(self.output_dir))
+                      if name.startswith('.class_10.') and not name.endswith('.retired'))
+
+
+class JobLifecycleTests(JobTestCase):
+    def test_successful_run_is_published(self):
+        status = self.wait(self.start())
+        self.assertEqual(status['response']['status'], 'success')
+        self.assertTrue(os.path.islink(self.output_dir))
+        with open(os.path.join(self.output_dir, '10th_result.csv')) as f:
+            self.assertEqual(f.read(), '2025-2026')
+        self.assertEqual(status['response']['api_results']['files'],
+                         [os.path.join(self.output_dir, '10th_result.csv')])
+
+    def test_failed_publish_still_finishes_the_job(self):
+        with mock.patch.object(jobs, 'publish_output', side_effect=OSError('No space left on device')), \
+                self.assertLogs(jobs.logger, 'ERROR'):
+            status = self.wait(self.start())
+        self.assertEqual(status['response']['status'], 'error')
+        self.assertIn('No space left on device', status['response']['error'])
+        self.assertFalse(jobs.job_active(status))
+        self.assertFalse(os.path.lexists(self.output_dir))
+        self.assertEqual(self.run_dirs(), [])
+
+    def test_result_without_a_status_finishes_with_an_error(self):
+        status = self.wait(self.start(result={'students': 3}))
+        self.assertEqual(status['state'], jobs.STATE_FINISHED)
+        self.assertEqual(status['response']['status'], 'error')
+        self.assertFalse(os.path.lexists(self.output_dir))
+
+    def test_runs_of_one_class_queue_whatever_their_year(self):
+        lock = jobs.FileLock('class', 'class_10')
+        self.assertTrue(lock.acquire())
+        try:
+            job_id = self.start(year='2024-2025')
+            time.sleep(1)
+            self.assertEqual(jobs.read_status(job_id)['state'], jobs.STATE_QUEUED)
+        finally:
+            lock.release()
+        self.assertEqual(self.wait(job_id)['response']['status'], 'success')
+
+    def test_later_year_replaces_the_published_set(self):
+        self.wait(self.start(year='2024-2025'))
+        self.wait(self.start(year='2025-2026'))
+        with open(os.path.join(self.output_dir, '10th_result.csv')) as f:
+            self.assertEqual(f.read(), '2025-2026')
+
+
+class PublishOutputTests(JobTestCase):
+    def staged(self, content):
+        staging_dir = os.path.join(os.path.dirname(self.output_dir), f'.class_10.{uuid.uuid4().hex}')
+        os.makedirs(staging_dir)
+        with open(os.path.join(staging_dir, '10th_result.csv'), 'w') as f:
+            f.write(content)
+        return staging_dir
+
+    def test_output_set_never_goes_missing(self):
+        jobs.publish_output(self.staged('0'), self.output_dir)
+        missing = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                if not os.path.isfile(os.path.join(self.output_dir, '10th_result.csv')):
+                    missing.append(time.monotonic())
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for i in range(1, 50):
+                jobs.publish_output(self.staged(str(i)), self.output_dir)
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(missing, [])
+        with open(os.path.join(self.output_dir, '10th_result.csv')) as f:
+            self.assertEqual(f.read(), '49')
+
+    def test_previous_run_is_kept_until_the_next_publish(self):
+        first, second, third = self.staged('1'), self.staged('2'), self.staged('3')
+        for staging_dir in (first, second, third):
+            jobs.publish_output(staging_dir, self.output_dir)
+        self.assertEqual(self.run_dirs(), sorted(os.path.basename(path) for path in (second, third)))
+
+    def test_plain_output_folder_is_replaced_by_a_link(self):
+        os.makedirs(self.output_dir)
+        with open(os.path.join(self.output_dir, '10th_result.csv'), 'w') as f:
+            f.write('old')
+        jobs.publish_output(self.staged('new'), self.output_dir)
+        self.assertTrue(os.path.islink(self.output_dir))
+        with open(os.path.join(self.output_dir, '10th_result.csv')) as f:
+            self.assertEqual(f.read(), 'new')
@@ -0,0 +1,92 @@
+"""Keyset pagination and parameter checks of ``/api/results/`` (``results_api.page``)."""
+import base64
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from student_api import results_api
+from student_api.models import StudentResult
+
+# Ties on purpose: pages must still neither repeat nor skip a student
+PERCENTAGES = [91.0, 85.5, 85.5, 85.5, 72.0, 64.25, 64.25, 40.0]
+
+
+class ResultsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('teacher', password='secret')
+        for i, percentage in enumerate(PERCENTAGES):
+            StudentResult.objects.create(
+                academic_year='2025-2026', class_name='class_10', roll_number=str(1000 + i), name=f'STUDENT {i}',
+                marks={'184': int(percentage)}, best_of_5=int(percentage * 5), percentage=percentage,
+            )
+        StudentResult.objects.create(academic_year='2024-2025', class_name='class_10', roll_number='9',
+                                     name='OTHER YEAR', marks={'184': 99}, best_of_5=495, percentage=99)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse('results_api'), params)
+
+    def walk(self, **params):
+        """Every page of a query, following ``next``."""
+        pages = []
+        cursor = None
+        while True:
+            response = self.get(**params, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append(data['results'])
+            cursor = data['next']
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_student_once_in_order(self):
+        pages = self.walk(year='2025-2026', limit=3, fields='roll_number,percentage')
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        rows = [row for page in pages for row in page]
+        self.assertEqual(len({row['roll_number'] for row in rows}), len(PERCENTAGES))
+        self.assertEqual([row['percentage'] for row in rows], sorted(PERCENTAGES, reverse=True))
+
+    def test_ascending_sort_pages_the_other_way(self):
+        pages = self.walk(year='2025-2026', limit=2, sort='best_of_5', fields='best_of_5')
+        values = [row['best_of_5'] for page in pages for row in page]
+        self.assertEqual(values, sorted(int(p * 5) for p in PERCENTAGES))
+
+    def test_last_page_has_no_next_cursor(self):
+        data = self.get(year='2025-2026', limit=len(PERCENTAGES)).json()
+        self.assertEqual(len(data['results']), len(PERCENTAGES))
+        self.assertIsNone(data['next'])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(self.get(limit=0).json()['limit'], 1)
+        self.assertEqual(self.get(limit=10 ** 6).json()['limit'], results_api.MAX_LIMIT)
+
+    def test_cursor_round_trips(self):
+        self.assertEqual(results_api.decode_cursor(results_api.encode_cursor(85.5, 42)), (85.5, 42))
+
+    def test_malformed_cursors_are_rejected(self):
+        not_numbers = base64.urlsafe_b64encode(json.dumps(['x', 1]).encode()).decode().rstrip('=')
+        float_id = base64.urlsafe_b64encode(json.dumps([85.5, 1.5]).encode()).decode().rstrip('=')
+        for cursor in ('not a cursor', '!!!', not_numbers, float_id):
+            with self.subTest(cursor=cursor):
+                response = self.get(cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'Invalid cursor.')
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({'sort': 'name'}, {'fields': 'password'}, {'limit': 'ten'}, {'subject': '18;4'},
+                       {'min_percentage': 'high'}, {'band': 'A+'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+    def test_subject_band_filters_on_the_subject_mark(self):
+        data = self.get(year='2025-2026', subject='184', band='>80', fields='roll_number').json()
+        self.assertEqual(len(data['results']), 3)
+
+    def test_login_is_required(self):
+        self.client.logout()
+        self.assertEqual(self.get().status_code, 302)
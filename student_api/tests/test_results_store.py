@@ -0,0 +1,58 @@
+"""Duplicate roll numbers across uploads in ``results_store.record_students``."""
+from django.test import TestCase
+
+from student_api import results_store
+from student_api.models import StudentResult
+
+
+def record(name, marks, source='a.pdf', version=0, roll='101'):
+    return {'year': '2025-2026', 'class': 'class_10', 'roll': roll, 'name': name, 'marks': marks,
+            'source': source, 'stream': '', 'version': version}
+
+
+class RecordStudentsTests(TestCase):
+    def stored(self):
+        return {row.name: row for row in StudentResult.objects.all()}
+
+    def test_new_students_are_created_with_clean_names(self):
+        report = results_store.record_students([record('Aarav  Rajesh Mehta\nM', {'184': 80})], 'latest')
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(list(self.stored()), ['AARAV RAJESH MEHTA'])
+
+    def test_identical_upload_is_a_duplicate(self):
+        results_store.record_students([record('AARAV', {'184': 80})], 'latest')
+        report = results_store.record_students([record('Aarav\nM', {'184': 80}, 'b.pdf')], 'latest')
+        self.assertEqual((report['created'], report['updated'], report['duplicates']), (0, 0, 1))
+
+    def test_latest_keeps_the_newest_source(self):
+        results_store.record_students([record('AARAV', {'184': 70}, 'old.pdf', version=1)], 'latest')
+        report = results_store.record_students([record('AARAV', {'184': 90}, 'new.pdf', version=2)], 'latest')
+        self.assertEqual((report['updated'], report['conflicts']), (1, 1))
+        row = self.stored()['AARAV']
+        self.assertEqual((row.marks, row.source), ({'184': 90}, 'new.pdf'))
+
+    def test_max_keeps_the_higher_mark_of_each_subject(self):
+        results_store.record_students([record('AARAV', {'184': 90, '041': 40})], 'max')
+        results_store.record_students([record('AARAV', {'184': 60, '041': 75}, 'b.pdf')], 'max')
+        self.assertEqual(self.stored()['AARAV'].marks, {'184': 90, '041': 75})
+
+    def test_flag_keeps_the_stored_result_and_attaches_the_new_one(self):
+        results_store.record_students([record('AARAV', {'184': 90})], 'flag')
+        results_store.record_students([record('AARAV', {'184': 60}, 'b.pdf')], 'flag')
+        row = self.stored()['AARAV']
+        self.assertEqual(row.marks, {'184': 90})
+        self.assertEqual(row.conflicts, [{'source': 'b.pdf', 'name': 'AARAV', 'marks': {'184': 60}}])
+
+    def test_another_name_under_a_stored_roll_is_a_second_student(self):
+        results_store.record_students([record('VIJAY VILAS DEV', {'184': 55})], 'latest')
+        report = results_store.record_students([record('AARAV RAJESH MEHTA', {'184': 72}, 'b.pdf')], 'latest')
+        self.assertEqual((report['created'], report['conflicts'], report['shared_rolls']), (1, 0, 1))
+        self.assertEqual(report['collisions'][0]['resolution'], 'kept both')
+        self.assertEqual(sorted(self.stored()), ['AARAV RAJESH MEHTA', 'VIJAY VILAS DEV'])
+        self.assertEqual(StudentResult.objects.filter(roll_number='101').count(), 2)
+
+    def test_both_students_of_one_file_are_stored(self):
+        report = results_store.record_students(
+            [record('VIJAY VILAS DEV', {'184': 55}), record('AARAV RAJESH MEHTA', {'184': 72})], 'latest'
+        )
+        self.assertEqual(report['created'], 2)
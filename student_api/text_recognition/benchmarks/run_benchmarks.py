@@ -0,0 +1,152 @@
+"""
+Benchmark the PDF-to-API pipeline on synthetic result PDFs.
+
+Every case generates a merged result PDF of the requested size, runs the
+matching analyzer end to end (text extraction through the overall summary)
+in a fresh process, and records the per-stage timings and peak RSS reported
+by the analyzer's profiler.
+
+    python benchmarks/run_benchmarks.py --students 1000 --save-baseline
+    python benchmarks/run_benchmarks.py --students 1000 --threshold 0.2
+
+With a baseline present, the run exits with status 1 when a case's total
+time or peak memory regresses by more than the threshold.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'src')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, SRC_DIR)
+from synthetic import STREAMS, write_result_pdf
+
+
+def _load_analyzer(stream):
+    if stream == 'class_10':
+        from class_10.test10th import ResultAnalyzer10th
+        return ResultAnalyzer10th()
+    from class_12.test12th import ResultAnalyzer12th
+    return ResultAnalyzer12th()
+
+
+def _run_case(stream, pdf_path, output_dir):
+    analyzer = _load_analyzer(stream)
+    success = analyzer.process_all([pdf_path], output_dir=output_dir)
+    report = analyzer.profiler.report()
+    report['success'] = success
+    return report
+
+
+def run_case(stream, students, work_dir, seed=0):
+    """Generate, analyze and report on one (stream, size) case."""
+    case_dir = os.path.join(work_dir, f'{stream}_{students}')
+    os.makedirs(case_dir, exist_ok=True)
+    pdf_path = os.path.join(case_dir, f'{stream}_{students}.pdf')
+
+    start = time.perf_counter()
+    write_result_pdf(pdf_path, stream, students, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    # A fresh process per case keeps peak RSS figures independent
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1) as pool:
+        report = pool.apply(_run_case, (stream, pdf_path, os.path.join(case_dir, 'output')))
+
+    parsed = report['counters'].get('students', 0)
+    return {
+        'stream': stream,
+        'students': students,
+        'pdf_bytes': os.path.getsize(pdf_path),
+        'generate_seconds': round(generate_seconds, 4),
+        'parsed_students': parsed,
+        'students_per_second': round(parsed / report['total_wall_seconds'], 2) if report['total_wall_seconds'] else None,
+        'total_wall_seconds': report['total_wall_seconds'],
+        'total_cpu_seconds': report['total_cpu_seconds'],
+        'peak_rss_mb': report['peak_rss_mb'],
+        'stages': {stage['name']: stage['wall_seconds'] for stage in report['stages']},
+        'success': report['success'],
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of human-readable regressions against ``baseline``."""
+    regressions = []
+    previous = {(case['stream'], case['students']): case for case in baseline.get('cases', [])}
+    for case in results:
+        old = previous.get((case['stream'], case['students']))
+        if not old:
+            continue
+        for metric in ('total_wall_seconds', 'peak_rss_mb'):
+            if old.get(metric) and case.get(metric) and case[metric] > old[metric] * (1 + threshold):
+                regressions.append(
+                    f"{case['stream']} x{case['students']}: {metric} {old[metric]} -> {case[metric]} "
+                    f"(+{(case[metric] / old[metric] - 1) * 100:.1f}%)"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the result analyzers on synthetic PDFs.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000],
+                        help='Students per generated PDF; one case per size (default: 1000)')
+    parser.add_argument('--streams', nargs='+', choices=STREAMS, default=STREAMS,
+                        help='Class X / Class XII streams to benchmark (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    parser.add_argument('--work-dir', help='Keep generated PDFs and outputs here instead of a temp dir')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='Allowed slowdown / memory growth before failing (default: 0.15 = 15%%)')
+    parser.add_argument('--output', help='Also write this run\'s results to a JSON file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='api_bench_') as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        results = []
+        for students in args.students:
+            for stream in args.streams:
+                case = run_case(stream, students, work_dir, seed=args.seed)
+                results.append(case)
+                print(f"{stream:<22} {students:>7} students  {case['total_wall_seconds']:>9.2f}s  "
+                      f"{case['peak_rss_mb']} MB  parsed={case['parsed_students']}")
+
+    run = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0], 'cases': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+    status = 0
+    mismatched = [case for case in results if case['parsed_students'] != case['students']]
+    for case in mismatched:
+        print(f"Parsed {case['parsed_students']} of {case['students']} students for {case['stream']}")
+        status = 1
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            status = 1
+        else:
+            print("No regressions against baseline")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Synthetic CBSE-style result PDFs for benchmarking.
+
+Each page mirrors the text layout of a page from a merged board result PDF
+(one candidate per page). The PDF is written directly with the built-in
+Helvetica font, so no PDF library or network access is needed, and pages are
+streamed to disk so very large files do not have to fit in memory.
+"""
+import random
+
+FIRST_NAMES = ['AARAV', 'ANANYA', 'ARJUN', 'DIYA', 'ISHAAN', 'KABIR', 'KOMAL', 'MEGH', 'NIKITA',
+               'PRANAV', 'PRACHI', 'RAHUL', 'RITVIK', 'SAI', 'SANIKA', 'SNEHA', 'TANVI', 'VIHAN']
+MIDDLE_NAMES = ['AMIT', 'DATTATRAY', 'MAHESH', 'MILIND', 'RAJESH', 'RAMESH', 'SANJAY', 'SURESH', 'VIJAY']
+LAST_NAMES = ['DESAI', 'DESHMUKH', 'GHADGE', 'JADHAV', 'KADAM', 'KALE', 'KULKARNI', 'MEHTA', 'NAIR',
+              'PATIL', 'PAWAR', 'SHARMA', 'SHINDE']
+
+CLASS_10_SUBJECTS = [
+    ('184', 'ENGLISH LNG & LIT.'),
+    ('085', 'HINDI COURSE-B'),
+    ('241', 'MATHEMATICS BASIC'),
+    ('086', 'SCIENCE'),
+    ('087', 'SOCIAL SCIENCE'),
+    ('402', 'IT'),
+]
+
+CLASS_12_SUBJECTS = {
+    'science': [('301', 'ENGLISH CORE'), ('041', 'MATHEMATICS'), ('042', 'PHYSICS'),
+                ('043', 'CHEMISTRY'), ('083', 'COMPUTER SCIENCE')],
+    'commerce': [('301', 'ENGLISH CORE'), ('030', 'ECONOMICS'), ('054', 'BUSINESS STUDIES'),
+                 ('055', 'ACCOUNTANCY'), ('048', 'PHYSICAL EDUCATION')],
+    'humanities': [('301', 'ENGLISH CORE'), ('302', 'HINDI CORE'), ('027', 'HISTORY'),
+                   ('028', 'POLITICAL SCIENCE'), ('029', 'GEOGRAPHY')],
+}
+
+STREAMS = ['class_10', 'class_12_science', 'class_12_commerce', 'class_12_humanities']
+
+
+def _grade(total):
+    for bound, grade in ((91, 'A1'), (81, 'A2'), (71, 'B1'), (61, 'B2'), (51, 'C1'), (41, 'C2'), (33, 'D')):
+        if total >= bound:
+            return grade
+    return 'E'
+
+
+def page_lines(stream, roll_number, name, subject_marks):
+    """Text lines of one result page for ``stream``."""
+    if stream == 'class_10':
+        lines = [
+            'Secondary School Examination (Class X) 2025',
+            'CENTRAL BOARD OF SECONDARY EDUCATION',
+            'Secondary School Examination (Class X) 2025',
+        ]
+    else:
+        lines = [
+            'CBSE - Senior School Certificate Examination (Class XII) Results 2025',
+            'Examination Results',
+            'Senior School Certificate Examination (Class XII) Results 2025',
+        ]
+    lines += [
+        f'Roll No: {roll_number}',
+        f'Candidate Name: {name}',
+        f"Mother's Name: M {name.split()[-1]}",
+        f"Father's Name: F {name.split()[-1]}",
+        "School's Name: SYNTHETIC PUBLIC SCHOOL",
+        'SUB CODE SUB NAME THEORY Prac./IA/Proj. MARKS',
+        'GRADE',
+    ]
+    for code, subject, theory, practical in subject_marks:
+        total = theory + practical
+        lines.append(f'{code} {subject} {theory:03d} {practical:03d} {total:03d} {_grade(total)}')
+    lines.append('Result : PASS')
+    return lines
+
+
+def generate_students(stream, count, seed=0):
+    """Yield ``(roll_number, name, subject_marks)`` tuples for ``count`` students."""
+    rng = random.Random(f'{stream}-{seed}')
+    if stream == 'class_10':
+        subjects = CLASS_10_SUBJECTS[:5]
+        roll_base = 15000000
+    else:
+        subjects = CLASS_12_SUBJECTS[stream.replace('class_12_', '')]
+        roll_base = 16000000 + STREAMS.index(stream) * 1000000
+    for i in range(count):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(LAST_NAMES)}'
+        marks = []
+        for code, subject in subjects:
+            theory = rng.randint(0, 80)
+            practical = rng.randint(0, 20) if theory else 0
+            marks.append((code, subject, theory, practical))
+        yield str(roll_base + i), name, marks
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _content_stream(lines):
+    ops = ['BT', '/F1 10 Tf', '12 TL', '40 800 Td']
+    for line in lines:
+        ops.append(f'({_escape(line)}) Tj T*')
+    ops.append('ET')
+    return '\n'.join(ops).encode('latin-1', errors='replace')
+
+
+def write_result_pdf(path, stream, count, seed=0):
+    """Write a merged result PDF with one page per synthetic student."""
+    offsets = {}
+    page_ids = []
+
+    with open(path, 'wb') as f:
+        def write_object(obj_id, body):
+            offsets[obj_id] = f.tell()
+            f.write(f'{obj_id} 0 obj\n'.encode('ascii'))
+            f.write(body)
+            f.write(b'\nendobj\n')
+
+        f.write(b'%PDF-1.4\n')
+        # 1: catalog, 2: page tree (written last), 3: font
+        write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        write_object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+        next_id = 4
+        for roll_number, name, marks in generate_students(stream, count, seed):
+            content = _content_stream(page_lines(stream, roll_number, name, marks))
+            write_object(next_id, b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+            write_object(next_id + 1, (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                f'/Resources << /Font << /F1 3 0 R >> >> /Contents {next_id} 0 R >>'
+            ).encode('ascii'))
+            page_ids.append(next_id + 1)
+            next_id += 2
+
+        kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+        write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'.encode('ascii'))
+
+        xref_offset = f.tell()
+        f.write(f'xref\n0 {next_id}\n'.encode('ascii'))
+        f.write(b'0000000000 65535 f \n')
+        for obj_id in range(1, next_id):
+            f.write(f'{offsets[obj_id]:010d} 00000 n \n'.encode('ascii'))
+        f.write(f'trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii'))
+    return path
@@ -0,0 +1 @@
+"""Helpers shared by the Class X and Class XII result analyzers."""
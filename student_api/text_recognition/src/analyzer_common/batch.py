@@ -0,0 +1,186 @@
+"""
+Batch analysis of result PDFs for several schools at once.
+
+A manifest lists ``school, year, class, stream, pdf`` entries (CSV with a
+header row, or a JSON list of objects). Entries are grouped into one job per
+(school, year, class) - the Class XII streams of a school are analyzed
+together, as in the web UI, each PDF's students tagged with the stream its
+entry names (else the one in its file name) - and the jobs run on a bounded
+process pool. Two schools or years whose names map to the same output folder
+are rejected.
+
+Each job writes its CSVs and result document to
+``<output_root>/<school>/<year>/<class>/``; a cross-school roll-up of the
+API figures is written to ``<output_root>/rollup.csv`` and ``rollup.json``.
+"""
+import csv
+import json
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import result_contract
+
+CLASS_ALIASES = {
+    '10': 'class_10', 'x': 'class_10', 'class_10': 'class_10',
+    '12': 'class_12', 'xii': 'class_12', 'class_12': 'class_12',
+}
+STREAMS = ('science', 'commerce', 'humanities')
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def _slug(value):
+    """Filesystem-safe directory name for a school or year."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', value.strip()).strip('_') or 'unnamed'
+
+
+def load_manifest(path):
+    """Read and validate manifest entries from a CSV or JSON file."""
+    with open(path, encoding='utf-8-sig') as f:
+        if path.lower().endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    # Output folder name -> the school or year name that owns it
+    folders = {'school': {}, 'year': {}}
+    for line_no, row in enumerate(rows, start=1):
+        row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+        missing = [key for key in ('school', 'year', 'class', 'pdf') if not row.get(key)]
+        if missing:
+            raise ManifestError(f"Entry {line_no}: missing {', '.join(missing)}")
+        class_name = CLASS_ALIASES.get(row['class'].lower())
+        if class_name is None:
+            raise ManifestError(f"Entry {line_no}: unknown class {row['class']!r}")
+        stream = row.get('stream', '').lower()
+        if class_name == 'class_12' and stream and stream not in STREAMS:
+            raise ManifestError(f"Entry {line_no}: unknown stream {row['stream']!r}")
+        for key in ('school', 'year'):
+            owner = folders[key].setdefault(_slug(row[key]), row[key])
+            if owner != row[key]:
+                raise ManifestError(
+                    f"Entry {line_no}: {key} {row[key]!r} and {owner!r} would share the output folder {_slug(row[key])!r}"
+                )
+        pdf = row['pdf'] if os.path.isabs(row['pdf']) else os.path.join(base_dir, row['pdf'])
+        entries.append({
+            'school': row['school'],
+            'year': row['year'],
+            'class': class_name,
+            'stream': stream,
+            'pdf': os.path.normpath(pdf),
+        })
+    return entries
+
+
+def plan_jobs(entries, output_root):
+    """Group manifest entries into one job per (school, year, class)."""
+    jobs = OrderedDict()
+    for entry in entries:
+        key = (entry['school'], entry['year'], entry['class'])
+        job = jobs.setdefault(key, {
+            'school': entry['school'],
+            'year': entry['year'],
+            'class': entry['class'],
+            'pdfs': [],
+            'streams': {},
+            'output_dir': os.path.join(output_root, _slug(entry['school']), _slug(entry['year']), entry['class']),
+        })
+        job['pdfs'].append(entry['pdf'])
+        if entry['stream']:
+            job['streams'][entry['pdf']] = entry['stream']
+    return list(jobs.values())
+
+
+def _new_analyzer(class_name, **kwargs):
+    if class_name == 'class_10':
+        from class_10.test10th import ResultAnalyzer10th
+        return ResultAnalyzer10th(**kwargs)
+    from class_12.test12th import ResultAnalyzer12th
+    return ResultAnalyzer12th(**kwargs)
+
+
+def run_job(job):
+    """Analyze one job's PDFs; runs inside a pool worker."""
+    os.makedirs(job['output_dir'], exist_ok=True)
+    options = {'streams': job['streams']} if job['class'] == 'class_12' else {}
+    analyzer = _new_analyzer(job['class'], academic_year=job['year'], **options)
+    result = result_contract.run_analyzer(analyzer, job['class'], job['pdfs'], job['output_dir'])
+    result_contract.write_result(result, os.path.join(job['output_dir'], 'result.json'))
+    return result
+
+
+def rollup_rows(jobs_with_results):
+    """Flatten per-job result documents into one row per (school, year, class)."""
+    rows = []
+    for job, result in jobs_with_results:
+        row = OrderedDict([
+            ('School', job['school']),
+            ('Year', job['year']),
+            ('Class', job['class']),
+            ('Status', result['status']),
+            ('Students', result['students']),
+            ('Overall API', (result['overall'] or {}).get('api')),
+        ])
+        for subject in result['subjects']:
+            if subject['students']:
+                row[f"API {subject['name']}"] = subject['api']
+        rows.append(row)
+    return rows
+
+
+def write_rollup(jobs_with_results, output_root):
+    rows = rollup_rows(jobs_with_results)
+    columns = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+
+    csv_path = os.path.join(output_root, 'rollup.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    json_path = os.path.join(output_root, 'rollup.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'school': job['school'], 'year': job['year'], 'class': job['class'], 'result': result}
+            for job, result in jobs_with_results
+        ], f, indent=2)
+    return csv_path, json_path
+
+
+def run_batch(entries, output_root, max_workers=None, on_result=None):
+    """
+    Run every job on a process pool and write the cross-school roll-up.
+
+    ``max_workers`` defaults to the CPU count. ``on_result(job, result)`` is
+    called as each job finishes. Returns ``[(job, result), ...]`` in manifest
+    order.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    jobs = plan_jobs(entries, output_root)
+    results = [None] * len(jobs)
+    max_workers = min(max_workers or os.cpu_count() or 1, max(len(jobs), 1))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory)
+                result = result_contract.build_result(jobs[index]['class'], result_contract.STATUS_ERROR, error=str(e))
+            results[index] = result
+            if on_result:
+                on_result(jobs[index], result)
+
+    jobs_with_results = list(zip(jobs, results))
+    write_rollup(jobs_with_results, output_root)
+    return jobs_with_results
@@ -0,0 +1,133 @@
+"""
+Versioned grading policies and the API (Academic Performance Index) they
+define.
+
+A policy is data: the marks each band covers (whole marks, both ends
+included), the points it earns and the pass mark. Policies are read from
+``grading_policies.json`` next to this module, or from the file named by
+the ``RESULT_GRADING_POLICIES`` environment variable; a new board banding
+is a new entry with a higher ``version``, and the highest version is the
+default:
+
+    {"version": 2, "name": "...", "pass_mark": 33, "max_mark": 100,
+     "bands": [{"label": ">95", "min": 96, "max": 100, "points": 10}, ...]}
+
+Marks that fall in no band count towards the students of a subject but
+earn no points (with version 1 that is a mark of exactly 33).
+
+``grade_groups`` grades any number of groups (subjects, years, classes) in
+one vectorized pass: each mark is mapped to its band through a lookup
+table indexed by the mark, and the counts per group and band come from a
+single ``bincount``. The analyzers use it for one run's summaries and the
+re-grade of stored results uses it for every year at once, so both give
+the same numbers.
+"""
+import json
+import os
+
+import numpy as np
+
+POLICIES_ENV = 'RESULT_GRADING_POLICIES'
+POLICIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grading_policies.json')
+
+NO_BAND = -1
+
+
+class GradingPolicy:
+    def __init__(self, version, name, bands, pass_mark=33, max_mark=100):
+        self.version = int(version)
+        self.name = name
+        self.pass_mark = pass_mark
+        self.max_mark = max_mark
+        self.bands = bands
+        self.labels = [band['label'] for band in bands]
+        self.points = np.array([band['points'] for band in bands], dtype=np.int64)
+        # Band index of every whole mark from 0 to max_mark
+        self.table = np.full(max_mark + 1, NO_BAND, dtype=np.int64)
+        for i, band in enumerate(bands):
+            if not 0 <= band['min'] <= band['max'] <= max_mark:
+                raise ValueError(f"Policy {self.version}: band {band['label']!r} is outside 0-{max_mark}")
+            if (self.table[band['min']:band['max'] + 1] != NO_BAND).any():
+                raise ValueError(f"Policy {self.version}: band {band['label']!r} overlaps another band")
+            self.table[band['min']:band['max'] + 1] = i
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['version'], data.get('name', ''), data['bands'],
+                   data.get('pass_mark', 33), data.get('max_mark', 100))
+
+    def to_dict(self):
+        return {'version': self.version, 'name': self.name, 'pass_mark': self.pass_mark,
+                'max_mark': self.max_mark, 'bands': self.bands}
+
+    def band_of(self, marks):
+        """Band index of each mark (``NO_BAND`` outside every band)."""
+        marks = np.asarray(marks, dtype=np.int64)
+        inside = (marks >= 0) & (marks <= self.max_mark)
+        return np.where(inside, self.table[np.clip(marks, 0, self.max_mark)], NO_BAND)
+
+
+def load_policies(path=None):
+    """Every policy in the policies file, oldest version first."""
+    path = path or os.environ.get(POLICIES_ENV) or POLICIES_PATH
+    with open(path, encoding='utf-8') as f:
+        policies = [GradingPolicy.from_dict(data) for data in json.load(f)]
+    versions = [policy.version for policy in policies]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f'{path}: duplicate policy versions')
+    return sorted(policies, key=lambda policy: policy.version)
+
+
+def get_policy(version=None, path=None):
+    """Policy ``version``, or the latest one."""
+    policies = load_policies(path)
+    if version is None:
+        return policies[-1]
+    for policy in policies:
+        if policy.version == int(version):
+            return policy
+    raise ValueError(f"No grading policy version {version}; known: {', '.join(str(p.version) for p in policies)}")
+
+
+def grade_groups(group_ids, marks, policy, n_groups):
+    """
+    Grade marks belonging to ``n_groups`` groups in one pass.
+
+    ``group_ids`` and ``marks`` are parallel integer arrays. Returns a dict
+    of arrays indexed by group: ``students``, ``passed``, ``points``,
+    ``api`` (NaN for a group without marks) and ``bands`` (groups x bands).
+    """
+    group_ids = np.asarray(group_ids, dtype=np.int64)
+    marks = np.asarray(marks, dtype=np.int64)
+    n_bands = len(policy.bands)
+    band = policy.band_of(marks)
+    banded = band != NO_BAND
+    bands = np.bincount(
+        group_ids[banded] * n_bands + band[banded], minlength=n_groups * n_bands
+    ).reshape(n_groups, n_bands)
+    students = np.bincount(group_ids, minlength=n_groups)
+    passed = np.bincount(group_ids[marks >= policy.pass_mark], minlength=n_groups)
+    points = bands @ policy.points
+    # One division per group, rounded like the analyzers always have (round())
+    api = np.array([
+        round(p / n, 2) if n else np.nan for p, n in zip(points.tolist(), students.tolist())
+    ], dtype=float)
+    return {'students': students, 'passed': passed, 'points': points, 'api': api, 'bands': bands}
+
+
+def grade_marks(marks, policy):
+    """
+    Grade one group of marks (a pandas Series or any sequence, missing
+    marks as NaN); returns ``students, passed, bands {label: count},
+    points, api`` with ``api`` None when there are no marks.
+    """
+    marks = np.asarray(marks, dtype=float)
+    marks = marks[~np.isnan(marks)]
+    graded = grade_groups(np.zeros(len(marks), dtype=np.int64), marks, policy, 1)
+    return {
+        'students': graded['students'][0],
+        'passed': graded['passed'][0],
+        'bands': dict(zip(policy.labels, graded['bands'][0])),
+        'points': graded['points'][0],
+        'api': None if graded['students'][0] == 0 else graded['api'][0].item(),
+    }
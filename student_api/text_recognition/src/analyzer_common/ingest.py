@@ -0,0 +1,314 @@
+"""
+Bulk ingestion of archived result PDFs with checkpoint/resume.
+
+Every PDF is split into chunks of pages and the chunks run on a process
+pool. The students parsed from a finished chunk are saved under the state
+directory and the chunk is appended to a checkpoint journal, so a rerun
+after a crash or Ctrl-C only reads the pages that are not done yet. A PDF
+whose size or modification time has changed since is read again from the
+start.
+
+PDFs are grouped by academic year and class (taken from the file and
+directory names unless given). Once every chunk of a group is done, its
+students are merged (once per roll number and name, see ``student_index``) and the
+analyzer's result and API CSVs are written to
+``<output_root>/<year>/<class>/`` along with ``result.json``.
+"""
+import glob
+import hashlib
+import json
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from . import result_contract
+from .batch import _new_analyzer
+from .naming import infer_class, infer_year
+from .student_index import POLICY_LATEST
+from .text_backends import count_pages
+
+DEFAULT_CHUNK_PAGES = 50
+JOURNAL_NAME = 'checkpoint.jsonl'
+
+
+class IngestError(ValueError):
+    pass
+
+
+def find_pdfs(patterns):
+    """Expand directories (searched recursively) and glob patterns into PDF paths."""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                found.extend(os.path.join(root, name) for name in files if name.lower().endswith('.pdf'))
+        else:
+            found.extend(
+                path for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path) and path.lower().endswith('.pdf')
+            )
+    return sorted(set(os.path.abspath(path) for path in found))
+
+
+def _file_key(path):
+    return hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+
+
+def plan_files(pdf_paths, class_name=None, year=None):
+    """
+    Describe every PDF to ingest: its class, year, page count and identity.
+
+    Raises ``IngestError`` listing the PDFs whose class or year could not be
+    worked out.
+    """
+    files = []
+    unknown = []
+    for path in pdf_paths:
+        file_class = class_name or infer_class(path)
+        file_year = year or infer_year(path)
+        if file_class is None or file_year is None:
+            unknown.append(path)
+            continue
+        stat = os.stat(path)
+        files.append({
+            'key': _file_key(path),
+            'path': path,
+            'class': file_class,
+            'year': file_year,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'pages': count_pages(path),
+        })
+    if unknown:
+        raise IngestError(
+            'Could not tell the class or academic year of: ' + ', '.join(unknown)
+            + ' (pass --class and --year, or name them like 2019-2020_class_10.pdf)'
+        )
+    return files
+
+
+def plan_chunks(file_info, chunk_pages):
+    """``(first_page, max_pages)`` chunks covering one PDF."""
+    if not file_info['pages']:
+        # Page count unknown: read the whole file as one chunk
+        return [(0, None)]
+    return [
+        (first, min(chunk_pages, file_info['pages'] - first))
+        for first in range(0, file_info['pages'], chunk_pages)
+    ]
+
+
+class Checkpoint:
+    """
+    Append-only journal of finished chunks in the state directory.
+
+    One JSON object per line; a line cut short by a crash is ignored on
+    load. Chunk results are CSV files under ``parts/<file key>/``.
+    """
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.path = os.path.join(state_dir, JOURNAL_NAME)
+        self.done = {}
+        os.makedirs(state_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    # Drop the partial last line so new records start on a line of their own
+                    data = data[:data.rfind(b'\n') + 1]
+                    f.truncate(len(data))
+            for line in data.decode('utf-8').splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.done[(record['file'], record['first_page'])] = record
+
+    def part_path(self, file_info, first_page):
+        return os.path.join(self.state_dir, 'parts', file_info['key'], f"{first_page}.csv")
+
+    def is_done(self, file_info, first_page):
+        record = self.done.get((file_info['key'], first_page))
+        return (
+            record is not None
+            and record['size'] == file_info['size']
+            and record['mtime'] == file_info['mtime']
+            and os.path.exists(self.part_path(file_info, first_page))
+        )
+
+    def record(self, file_info, first_page, pages, students):
+        record = {
+            'file': file_info['key'],
+            'path': file_info['path'],
+            'size': file_info['size'],
+            'mtime': file_info['mtime'],
+            'first_page': first_page,
+            'pages': pages,
+            'students': students,
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[(file_info['key'], first_page)] = record
+
+
+def _ignore_sigint():
+    # Ctrl-C is handled by the parent, which lets running chunks finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+_analyzers = {}
+
+
+def run_chunk(class_name, pdf_path, first_page, max_pages, part_path):
+    """Parse one chunk of pages and save its students; runs inside a pool worker."""
+    analyzer = _analyzers.get(class_name)
+    if analyzer is None:
+        # One analyzer per worker and class, so the text backend is chosen once
+        analyzer = _analyzers[class_name] = _new_analyzer(class_name)
+    before = analyzer.profiler.counters.get('pages', 0)
+    text = analyzer.extract_text_from_pdf(pdf_path, first_page=first_page, max_pages=max_pages)
+    pages = analyzer.profiler.counters.get('pages', 0) - before
+    df = analyzer.parse_students(text)
+
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    tmp_path = part_path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+    return pages, len(df)
+
+
+def summarize_group(class_name, parts, output_dir, duplicate_policy=POLICY_LATEST):
+    """
+    Merge the saved chunks of one (year, class) group and write its outputs.
+
+    ``parts`` is ``[(file_info, part_path), ...]`` with the newest PDFs last.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    analyzer = _new_analyzer(class_name, duplicate_policy=duplicate_policy)
+    for file_info, path in parts:
+        try:
+            df = pd.read_csv(path, dtype={'Roll_Number': str})
+        except pd.errors.EmptyDataError:
+            # A chunk without students is saved as an empty file
+            continue
+        analyzer.add_students(df, file_info['path'], year=file_info['year'])
+
+    analyzer.profiler.start()
+    try:
+        success = analyzer.summarize(output_dir)
+    except Exception as e:
+        result = result_contract.build_result(class_name, result_contract.STATUS_ERROR, analyzer, error=str(e))
+    else:
+        status = result_contract.STATUS_SUCCESS if success else result_contract.STATUS_NO_DATA
+        result = result_contract.build_result(class_name, status, analyzer)
+    finally:
+        analyzer.profiler.stop()
+    result_contract.write_result(result, os.path.join(output_dir, 'result.json'))
+    return result
+
+
+def run_ingest(pdf_paths, output_root, state_dir=None, class_name=None, year=None,
+               chunk_pages=DEFAULT_CHUNK_PAGES, max_workers=None, on_progress=None,
+               duplicate_policy=POLICY_LATEST):
+    """
+    Ingest ``pdf_paths``, resuming from the checkpoint in ``state_dir``.
+
+    ``on_progress(progress)`` is called after every chunk with a dict of
+    ``pages_done, pages_total, files_done, files_total, students``.
+    Returns a dict with the ``groups`` written as ``[(group, result), ...]``,
+    the ``failed`` chunks as ``[(path, first_page, error), ...]`` and whether
+    the run was ``interrupted``. Groups with failed or unfinished chunks are
+    not written; rerunning picks them up. A roll number found in more than
+    one PDF of a group is resolved with ``duplicate_policy`` (see
+    ``student_index``), treating the most recently modified PDF as newest.
+    """
+    state_dir = state_dir or os.path.join(output_root, '.ingest_state')
+    files = plan_files(pdf_paths, class_name, year)
+    checkpoint = Checkpoint(state_dir)
+
+    chunks = {file_info['key']: plan_chunks(file_info, chunk_pages) for file_info in files}
+    pending = []
+    progress = {'pages_done': 0, 'pages_total': 0, 'files_done': 0, 'files_total': len(files), 'students': 0}
+    remaining = {}
+    for file_info in files:
+        progress['pages_total'] += file_info['pages'] or 0
+        remaining[file_info['key']] = 0
+        for first_page, max_pages in chunks[file_info['key']]:
+            if checkpoint.is_done(file_info, first_page):
+                record = checkpoint.done[(file_info['key'], first_page)]
+                progress['pages_done'] += record['pages']
+                progress['students'] += record['students']
+            else:
+                remaining[file_info['key']] += 1
+                pending.append((file_info, first_page, max_pages))
+        if not remaining[file_info['key']]:
+            progress['files_done'] += 1
+    if on_progress:
+        on_progress(dict(progress))
+
+    failed = []
+    interrupted = False
+    if pending:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_ignore_sigint) as pool:
+            futures = {
+                pool.submit(
+                    run_chunk, file_info['class'], file_info['path'], first_page, max_pages,
+                    checkpoint.part_path(file_info, first_page),
+                ): (file_info, first_page)
+                for file_info, first_page, max_pages in pending
+            }
+
+            def collect(future):
+                file_info, first_page = futures[future]
+                try:
+                    pages, students = future.result()
+                except Exception as e:
+                    failed.append((file_info['path'], first_page, str(e)))
+                    return
+                checkpoint.record(file_info, first_page, pages, students)
+                progress['pages_done'] += pages
+                progress['students'] += students
+                remaining[file_info['key']] -= 1
+                if not remaining[file_info['key']]:
+                    progress['files_done'] += 1
+                if on_progress:
+                    on_progress(dict(progress))
+
+            collected = set()
+            try:
+                for future in as_completed(futures):
+                    collected.add(future)
+                    collect(future)
+            except KeyboardInterrupt:
+                interrupted = True
+                # Drop the queued chunks but keep the ones already running
+                for future in futures:
+                    future.cancel()
+                for future in as_completed(f for f in futures if not f.cancelled() and f not in collected):
+                    collect(future)
+
+    groups = OrderedDict()
+    for file_info in files:
+        groups.setdefault((file_info['year'], file_info['class']), []).append(file_info)
+
+    written = []
+    if not interrupted:
+        for (group_year, group_class), group_files in groups.items():
+            if any(remaining[file_info['key']] for file_info in group_files):
+                continue
+            parts = [
+                (file_info, checkpoint.part_path(file_info, first_page))
+                for file_info in sorted(group_files, key=lambda info: info['mtime'])
+                for first_page, _ in chunks[file_info['key']]
+            ]
+            output_dir = os.path.join(output_root, group_year, group_class)
+            result = summarize_group(group_class, parts, output_dir, duplicate_policy)
+            written.append(({'year': group_year, 'class': group_class, 'output_dir': output_dir}, result))
+    return {'groups': written, 'failed': failed, 'interrupted': interrupted}
@@ -0,0 +1,262 @@
+"""
+Region-based extraction for the fixed CBSE result page layout.
+
+Instead of laying out the whole page as text and regex-searching it, a
+``LayoutTemplate`` records where the roll number, the candidate name and the
+subject-marks table sit on a page, and where each marks column is. Only
+those regions are read, marks are taken by column position, and a name can
+no longer run into the following "Mother's Name" line.
+
+A template is either declared (a JSON file, see ``LayoutTemplate.to_dict``)
+or learned from the label words on the first page of a PDF. Pages whose
+layout does not fit the template (for example a wrapped school name that
+pushes everything down) are re-learned individually.
+"""
+import json
+import re
+
+from .text_backends import BackendUnavailable, PdfiumBackend, PdfplumberBackend
+
+# Marks columns, left to right, as printed on Class X and Class XII pages
+MARK_COLUMNS = ('theory', 'practical', 'total')
+
+# Margin (points) added around learned regions
+PADDING = 2.0
+# Extra room below the learned table so pages with more subject rows still fit
+TABLE_SLACK = 80.0
+# Words whose tops are within this many points share a line
+LINE_TOLERANCE = 3.0
+
+_CODE_RE = re.compile(r'^\d{3}$')
+_MARK_RE = re.compile(r'^\d{1,3}$')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _group_lines(words):
+    """Group ``(x0, top, x1, bottom, text)`` words into lines, top first."""
+    lines = []
+    for word in sorted(words, key=lambda w: (w[1], w[0])):
+        if lines and abs(word[1] - lines[-1][0][1]) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w[0]) for line in lines]
+
+
+def _find_label(lines, *labels):
+    """Return ``(line, index_of_last_label_word)`` for a label like ('Roll', 'No:')."""
+    wanted = [label.lower() for label in labels]
+    for line in lines:
+        texts = [word[4].lower() for word in line]
+        for i in range(len(texts) - len(wanted) + 1):
+            if all(texts[i + j].rstrip(':') == wanted[j].rstrip(':') for j in range(len(wanted))):
+                return line, i + len(wanted) - 1
+    return None, None
+
+
+class LayoutTemplate:
+    def __init__(self, roll_box, name_box, table_box, columns):
+        self.roll_box = tuple(roll_box)
+        self.name_box = tuple(name_box)
+        self.table_box = tuple(table_box)
+        # Centre x of each marks column, keyed by MARK_COLUMNS names
+        self.columns = dict(columns)
+
+    def to_dict(self):
+        return {
+            'roll_box': list(self.roll_box),
+            'name_box': list(self.name_box),
+            'table_box': list(self.table_box),
+            'columns': self.columns,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['roll_box'], data['name_box'], data['table_box'], data['columns'])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def learn(cls, lines, page_width):
+        """Derive a template from the word lines of one full page."""
+        roll_line, roll_end = _find_label(lines, 'Roll', 'No:')
+        name_line, name_end = _find_label(lines, 'Candidate', 'Name:')
+        header_line, _ = _find_label(lines, 'THEORY')
+        result_line, _ = _find_label(lines, 'Result')
+        if roll_line is None or name_line is None or header_line is None:
+            raise TemplateError('Page does not look like a CBSE result page')
+
+        def value_box(line, label_end):
+            return (
+                line[label_end][2],
+                min(word[1] for word in line) - PADDING,
+                page_width,
+                max(word[3] for word in line) + PADDING,
+            )
+
+        table_top = max(word[3] for word in header_line)
+        table_bottom = (result_line[0][1] if result_line else table_top + 200) + TABLE_SLACK
+
+        # Marks columns: cluster the x centres of numeric cells in subject rows
+        centres = []
+        for line in lines:
+            if not (table_top < line[0][1] < table_bottom) or not _CODE_RE.match(line[0][4]):
+                continue
+            centres.extend((w[0] + w[2]) / 2 for w in line[1:] if _MARK_RE.match(w[4]))
+        clusters = []
+        for centre in sorted(centres):
+            if clusters and centre - clusters[-1][-1] < 15:
+                clusters[-1].append(centre)
+            else:
+                clusters.append([centre])
+        if len(clusters) < len(MARK_COLUMNS):
+            raise TemplateError('Could not locate the marks columns')
+        # A stray number in the subject name column would add a cluster on the
+        # left; the marks columns are always the right-most ones
+        clusters = clusters[-len(MARK_COLUMNS):]
+        columns = {name: sum(c) / len(c) for name, c in zip(MARK_COLUMNS, clusters)}
+
+        return cls(
+            value_box(roll_line, roll_end),
+            value_box(name_line, name_end),
+            (0, table_top, page_width, table_bottom),
+            columns,
+        )
+
+    def read_student(self, read_region, subject_codes, marks_column='theory'):
+        """
+        Read one page through ``read_region(bbox) -> word lines``.
+
+        Returns ``{'Roll_Number', 'Name', 'marks'}`` or None when the page
+        does not match the template.
+        """
+        roll_lines = read_region(self.roll_box)
+        roll = next((w[4] for line in roll_lines for w in line if w[4].isdigit()), None)
+        name_lines = read_region(self.name_box)
+        if roll is None or not name_lines:
+            return None
+        name = ' '.join(w[4] for w in name_lines[0])
+
+        column_x = self.columns[marks_column]
+        first_column_left = min(self.columns.values()) - 15
+        marks = {}
+        for line in read_region(self.table_box):
+            code = line[0][4]
+            if not _CODE_RE.match(code) or code not in subject_codes:
+                continue
+            subject = ' '.join(w[4] for w in line[1:] if (w[0] + w[2]) / 2 < first_column_left)
+            if not subject.upper().startswith(subject_codes[code].upper()):
+                continue
+            cells = [w for w in line[1:] if _MARK_RE.match(w[4]) and (w[0] + w[2]) / 2 >= first_column_left]
+            if not cells:
+                continue
+            cell = min(cells, key=lambda w: abs((w[0] + w[2]) / 2 - column_x))
+            if abs((cell[0] + cell[2]) / 2 - column_x) > 15:
+                continue
+            value = int(cell[4])
+            if 0 <= value <= 100:
+                marks[code] = value
+        return {'Roll_Number': roll, 'Name': name, 'marks': marks}
+
+
+class _PdfiumPages:
+    def __init__(self, pdf_path):
+        import pypdfium2 as pdfium
+        self.backend = PdfiumBackend()
+        self.pdf = pdfium.PdfDocument(pdf_path)
+
+    def __iter__(self):
+        for index in range(len(self.pdf)):
+            page = self.pdf[index]
+            try:
+                # Characters are read once per page and shared by every region
+                yield self.backend.page_chars(page), page.get_width()
+            finally:
+                page.close()
+
+    def lines(self, page_chars, bbox=None):
+        return self.backend.lines_from_chars(page_chars, bbox)
+
+    def close(self):
+        self.pdf.close()
+
+
+def _centre_inside(obj, bbox):
+    if obj.get('object_type') != 'char':
+        return False
+    x_centre = (obj['x0'] + obj['x1']) / 2
+    y_centre = (obj['top'] + obj['bottom']) / 2
+    return bbox[0] <= x_centre <= bbox[2] and bbox[1] <= y_centre <= bbox[3]
+
+
+class _PdfplumberPages:
+    def __init__(self, pdf_path):
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def __iter__(self):
+        for page in self.pdf.pages:
+            yield page, page.width
+            page.close()
+
+    def lines(self, page, bbox=None):
+        # Keep characters whose centre lies in the box, as the pdfium path
+        # does; ``crop`` would also keep the label's trailing ':' when it
+        # only touches the box edge
+        region = page.filter(lambda obj: _centre_inside(obj, bbox)) if bbox else page
+        words = region.extract_words()
+        return _group_lines([(w['x0'], w['top'], w['x1'], w['bottom'], w['text']) for w in words])
+
+    def close(self):
+        self.pdf.close()
+
+
+def open_pages(pdf_path, engine=None):
+    """Open ``pdf_path`` for region reads with pdfium, falling back to pdfplumber."""
+    if engine in (None, 'pdfium') and PdfiumBackend.is_available():
+        return _PdfiumPages(pdf_path)
+    if engine in (None, 'pdfplumber') and PdfplumberBackend.is_available():
+        return _PdfplumberPages(pdf_path)
+    raise BackendUnavailable('Template extraction needs pypdfium2 or pdfplumber')
+
+
+def extract_students(pdf_path, subject_codes, template=None, marks_column='theory', engine=None, profiler=None):
+    """
+    Read every candidate page of ``pdf_path`` using a layout template.
+
+    ``template`` is learned from the first candidate page when not given.
+    Returns a list of ``{'Roll_Number', 'Name', 'marks'}`` dicts.
+    """
+    pages = open_pages(pdf_path, engine)
+    students = []
+    try:
+        for page, width in pages:
+            if profiler is not None:
+                profiler.count('pages')
+            student = None
+            if template is not None:
+                student = template.read_student(lambda bbox: pages.lines(page, bbox), subject_codes, marks_column)
+            if student is None or not student['marks']:
+                # First page, or a page that does not fit: learn from the full page
+                try:
+                    page_template = LayoutTemplate.learn(pages.lines(page), width)
+                except TemplateError:
+                    continue
+                if template is None:
+                    template = page_template
+                student = page_template.read_student(lambda bbox: pages.lines(page, bbox), subject_codes, marks_column)
+            if student is not None:
+                students.append(student)
+    finally:
+        pages.close()
+    return students
@@ -0,0 +1,34 @@
+"""Academic year, class and stream of a result PDF, from its file and folder names."""
+import os
+import re
+
+_YEAR_RE = re.compile(r'(?<!\d)(\d{4}-\d{4})(?!\d)')
+_CLASS_RE = re.compile(r'class[ _-]?(10|12)(?!\d)|(?<!\d)(10|12)th(?![a-z])', re.IGNORECASE)
+_STREAM_RE = re.compile(r'science|commerce|humanities', re.IGNORECASE)
+
+
+def _search_parts(path, pattern):
+    """First match of ``pattern`` in the file name, else the nearest folder name."""
+    for part in reversed(os.path.normpath(path).split(os.sep)):
+        match = pattern.search(part)
+        if match:
+            return match
+    return None
+
+
+def infer_year(path):
+    """Academic year such as '2019-2020', or None."""
+    match = _search_parts(path, _YEAR_RE)
+    return match.group(1) if match else None
+
+
+def infer_class(path):
+    """'class_10' or 'class_12', or None."""
+    match = _search_parts(path, _CLASS_RE)
+    return f"class_{match.group(1) or match.group(2)}" if match else None
+
+
+def infer_stream(path):
+    """Class XII stream ('science', 'commerce' or 'humanities'), or ''."""
+    match = _search_parts(path, _STREAM_RE)
+    return match.group(0).lower() if match else ''
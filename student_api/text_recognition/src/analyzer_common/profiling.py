@@ -0,0 +1,107 @@
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return round(peak / divisor, 2)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 2)
+
+
+class StageProfiler:
+    """
+    Collects wall and CPU time per pipeline stage plus simple work counters.
+
+    Stages with the same name accumulate, so per-PDF stages add up across a
+    run. Pass ``cprofile_path`` to also record a cProfile dump of the run,
+    and ``progress`` (a ``ProgressReporter``) to publish stage changes and
+    counters as they happen.
+    """
+
+    def __init__(self, cprofile_path=None, progress=None):
+        self.stages = {}
+        self.counters = {}
+        self.cprofile_path = cprofile_path
+        self.progress = progress
+        self._profile = None
+        self._wall_start = None
+        self._cpu_start = None
+        self._wall_total = 0.0
+        self._cpu_total = 0.0
+
+    def start(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+            self._profile = None
+        if self._wall_start is not None:
+            self._wall_total += time.perf_counter() - self._wall_start
+            self._cpu_total += time.process_time() - self._cpu_start
+            self._wall_start = None
+
+    @contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if self.progress is not None:
+            self.progress.stage(name)
+        try:
+            yield self
+        finally:
+            stats = self.stages.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            stats['calls'] += 1
+            stats['wall_seconds'] += time.perf_counter() - wall_start
+            stats['cpu_seconds'] += time.process_time() - cpu_start
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if self.progress is not None:
+            self.progress.counters(self.counters)
+
+    def report(self):
+        """Return the collected figures as a JSON-serialisable dict."""
+        return {
+            'total_wall_seconds': round(self._wall_total, 4),
+            'total_cpu_seconds': round(self._cpu_total, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'counters': dict(self.counters),
+            'stages': [
+                {
+                    'name': name,
+                    'calls': stats['calls'],
+                    'wall_seconds': round(stats['wall_seconds'], 4),
+                    'cpu_seconds': round(stats['cpu_seconds'], 4),
+                }
+                for name, stats in self.stages.items()
+            ],
+            'cprofile_path': self.cprofile_path,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
@@ -0,0 +1,53 @@
+"""
+Progress events for long analyzer runs.
+
+``ProgressReporter`` appends one JSON object per line to a file while the
+analyzer works: the current stage, pages read out of the total, and students
+parsed so far. The web app tails that file and streams the events to the
+browser, so the analyzer process needs no connection to it.
+"""
+import json
+import time
+
+# Counters forwarded from the StageProfiler
+TRACKED_COUNTERS = ('pdfs', 'pages', 'students')
+
+
+class ProgressReporter:
+    # Counter updates closer together than this (seconds) are not written;
+    # stage changes and the final event always are
+    MIN_INTERVAL = 0.25
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._started = time.perf_counter()
+        self._last_write = 0.0
+        self.state = {'stage': 'starting', 'total_pages': None}
+        self.state.update((name, 0) for name in TRACKED_COUNTERS)
+
+    def update(self, force=False, **fields):
+        self.state.update(fields)
+        now = time.perf_counter()
+        if force or now - self._last_write >= self.MIN_INTERVAL:
+            self._write(now)
+
+    def stage(self, name):
+        self.update(force=True, stage=name)
+
+    def counters(self, counters):
+        self.update(**{name: counters.get(name, 0) for name in TRACKED_COUNTERS})
+
+    def finish(self):
+        self.update(force=True, stage='finished')
+
+    def _write(self, now):
+        event = dict(self.state, elapsed_seconds=round(now - self._started, 2))
+        self._file.write(json.dumps(event) + '\n')
+        # Flushed per event so the reading side sees it straight away
+        self._file.flush()
+        self._last_write = now
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,230 @@
+"""
+Per-student report cards as one-page PDFs, rendered in bulk into a zip.
+
+The PDFs are written directly (no PDF library): the page uses the standard
+Helvetica fonts, which every reader has, so nothing is embedded, and text
+is measured with the Adobe font metrics that pdfminer ships. A
+``CardTemplate`` compiles everything that is the same on every card once -
+the PDF header, catalog, fonts, the page heading and the table header -
+and each card only adds its own text and table rows.
+
+``generate_cards`` splits the students into chunks for a process pool.
+Each worker builds its template once (pool initializer) and returns the
+finished PDFs of a chunk; the parent writes them into the zip archive in
+order as they arrive, so memory stays bounded by a few chunks.
+"""
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from . import grading
+from .student_index import name_key
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89  # A4
+MARGIN = 50
+ROW_HEIGHT = 22
+# Students per unit of work sent to a pool worker
+CHUNK_SIZE = 250
+# Below this many students the cards are rendered in this process
+MIN_POOL_STUDENTS = 500
+
+CLASS_LABELS = {'class_10': 'Class X', 'class_12': 'Class XII'}
+HEADING_RGB = '0.118 0.235 0.447'  # #1e3c72, as on the web pages
+
+# Table columns: (title, x, alignment)
+COLUMNS = (
+    ('Code', MARGIN + 8, 'left'),
+    ('Subject', MARGIN + 60, 'left'),
+    ('Marks', MARGIN + 300, 'right'),
+    ('Band', MARGIN + 330, 'left'),
+    ('Points', PAGE_WIDTH - MARGIN - 8, 'right'),
+)
+
+_widths = {}
+
+
+def _font_widths(font):
+    if font not in _widths:
+        from pdfminer.fontmetrics import FONT_METRICS
+        _widths[font] = FONT_METRICS[font][1]
+    return _widths[font]
+
+
+def text_width(text, font, size):
+    widths = _font_widths(font)
+    return sum(widths.get(char, 556) for char in text) * size / 1000
+
+
+def _escape(text):
+    data = text.encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class CardTemplate:
+    """The parts of a report card PDF that are the same for every student."""
+
+    FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+
+    def __init__(self, class_name, subject_names, year='', school='', policy_version=None):
+        self.class_name = class_name
+        self.subject_names = subject_names
+        self.policy = grading.get_policy(policy_version)
+        self.year = year
+        self.school = school
+
+        # Objects 1-5 never change: catalog, page tree, page, two fonts
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+             '/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>').encode('ascii'),
+        ] + [
+            f'<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>'.encode('ascii')
+            for font in self.FONTS.values()
+        ]
+        head = io.BytesIO()
+        head.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self.offsets = []
+        for number, body in enumerate(objects, start=1):
+            self.offsets.append(head.tell())
+            head.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        self.head = head.getvalue()
+        self.static = self._static_content()
+
+    def _text(self, ops, x, y, text, size=10, bold=False, align='left', rgb=None):
+        font = 'F2' if bold else 'F1'
+        if align != 'left':
+            width = text_width(text, self.FONTS[font], size)
+            x -= width if align == 'right' else width / 2
+        color = f'{rgb} rg ' if rgb else ''
+        ops.append(f'BT {color}/{font} {size} Tf {x:.2f} {y:.2f} Td ('.encode('ascii') + _escape(text) + b') Tj ET')
+
+    def _static_content(self):
+        ops = []
+        # Heading band
+        ops.append(f'{HEADING_RGB} rg {MARGIN} 762 {PAGE_WIDTH - 2 * MARGIN:.2f} 46 re f'.encode('ascii'))
+        self._text(ops, PAGE_WIDTH / 2, 787, self.school or 'Academic Performance Indicator', 16, True,
+                   'center', '1 1 1')
+        self._text(ops, PAGE_WIDTH / 2, 770, 'Report Card', 10, False, 'center', '1 1 1')
+        title = f"{CLASS_LABELS.get(self.class_name, self.class_name)} - {self.year}".rstrip(' -')
+        self._text(ops, MARGIN, 735, title, 13, True, rgb='0 0 0')
+        self._text(ops, MARGIN, 710, 'Name', 10, True)
+        self._text(ops, MARGIN, 694, 'Roll number', 10, True)
+        # Table header
+        ops.append(f'0.9 0.92 0.96 rg {MARGIN} 650 {PAGE_WIDTH - 2 * MARGIN:.2f} {ROW_HEIGHT} re f'.encode('ascii'))
+        for title, x, align in COLUMNS:
+            self._text(ops, x, 657, title, 10, True, align, '0 0 0')
+        footer = f'Bands and points: grading policy {self.policy.version} ({self.policy.name}).'
+        self._text(ops, MARGIN, 40, footer, 7, rgb='0.4 0.4 0.4')
+        self._text(ops, MARGIN, 30, f'Generated on {date.today().isoformat()} from the CBSE result sheet.', 7)
+        return b'\n'.join(ops)
+
+    def render(self, student):
+        """One student's report card as PDF bytes."""
+        ops = [self.static, b'0 0 0 rg']
+        self._text(ops, MARGIN + 80, 710, name_key(student['name']), 10)
+        self._text(ops, MARGIN + 80, 694, str(student['roll']), 10)
+
+        y = 650
+        failed = []
+        for code, mark in student['marks'].items():
+            y -= ROW_HEIGHT
+            band = self.policy.band_of([mark])[0]
+            subject = self.subject_names.get(code, code)
+            if mark < self.policy.pass_mark:
+                failed.append(subject.title())
+            cells = (code, subject.title(), str(mark),
+                     self.policy.labels[band] if band >= 0 else '-',
+                     str(self.policy.points[band]) if band >= 0 else '-')
+            for text, (_, x, align) in zip(cells, COLUMNS):
+                self._text(ops, x, y + 7, text, 10, align=align)
+            ops.append(f'0.8 0.8 0.8 RG 0.5 w {MARGIN} {y} m {PAGE_WIDTH - MARGIN:.2f} {y} l S'.encode('ascii'))
+
+        y -= 36
+        self._text(ops, MARGIN, y, 'Best of 5', 10, True)
+        self._text(ops, MARGIN + 110, y, f"{student['best_of_5']} / 500", 10)
+        self._text(ops, MARGIN, y - 16, 'Percentage', 10, True)
+        self._text(ops, MARGIN + 110, y - 16, f"{student['percentage']}%", 10)
+        self._text(ops, MARGIN, y - 32, 'Result', 10, True)
+        self._text(ops, MARGIN + 110, y - 32, 'Compartment: ' + ', '.join(failed) if failed else 'Pass', 10)
+
+        content = b'\n'.join(ops)
+        out = io.BytesIO()
+        out.write(self.head)
+        offsets = self.offsets + [out.tell()]
+        out.write(b'6 0 obj\n<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream\nendobj\n')
+        xref = out.tell()
+        out.write(b'xref\n0 7\n0000000000 65535 f \n')
+        out.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+        out.write(b'trailer\n<< /Size 7 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % xref)
+        return out.getvalue()
+
+
+def card_name(student):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', name_key(student['name'])).strip('_')
+    return f"{student['roll']}_{slug or 'student'}.pdf"
+
+
+def load_students(result_csv, subject_codes):
+    """Students of an analyzer's ``1Xth_result.csv`` as dicts for ``CardTemplate.render``."""
+    df = pd.read_csv(result_csv, dtype={'Roll_Number': str})
+    codes = [code for code in subject_codes if code in df.columns]
+    students = []
+    for row in df[['Roll_Number', 'Name', 'Best_of_5', 'Percentage'] + codes].itertuples(index=False, name=None):
+        marks = {code: int(mark) for code, mark in zip(codes, row[4:]) if not pd.isna(mark)}
+        best_of_5 = row[2] if not pd.isna(row[2]) else 0
+        students.append({
+            'roll': row[0], 'name': row[1], 'marks': marks,
+            'best_of_5': int(best_of_5) if float(best_of_5).is_integer() else best_of_5,
+            'percentage': row[3],
+        })
+    return students
+
+
+_template = None
+
+
+def _init_worker(template_args):
+    global _template
+    _template = CardTemplate(*template_args)
+
+
+def _render_chunk(students):
+    return [(card_name(student), _template.render(student)) for student in students]
+
+
+def generate_cards(students, output, class_name, subject_names, year='', school='', policy_version=None,
+                   max_workers=None, chunk_size=CHUNK_SIZE, on_progress=None):
+    """
+    Render a card per student into the zip archive ``output`` (a path or a
+    writable file object, which need not be seekable). ``on_progress(done)``
+    is called after every chunk. Returns the number of cards.
+    """
+    template_args = (class_name, subject_names, year, school, policy_version)
+    chunks = [students[i:i + chunk_size] for i in range(0, len(students), chunk_size)]
+    done = 0
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        def write(cards):
+            nonlocal done
+            for name, pdf in cards:
+                archive.writestr(name, pdf)
+            done += len(cards)
+            if on_progress:
+                on_progress(done)
+
+        workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+        if workers <= 1 or len(students) < MIN_POOL_STUDENTS:
+            _init_worker(template_args)
+            for chunk in chunks:
+                write(_render_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(template_args,)) as pool:
+                for cards in pool.map(_render_chunk, chunks):
+                    write(cards)
+    return done
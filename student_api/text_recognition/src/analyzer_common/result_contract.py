@@ -0,0 +1,138 @@
+"""
+Machine-readable result document produced by an analyzer run.
+
+The document is what the web tier consumes instead of scraping stdout or
+re-reading the CSV outputs:
+
+    {
+      "schema_version": 1,
+      "status": "success" | "no_data" | "error",
+      "class": "class_10" | "class_12",
+      "students": 123,
+      "subjects": [{"code", "name", "students", "passed", "bands", "api"}, ...],
+      "overall": {"appeared", "passed", "bands", "api"},
+      "timings": {...profiler report...},
+      "text_backend": "pdfium",
+      "files": [...],
+      "grading_policy": 1,
+      "duplicates": {...student_index report...} | null,
+      "error": null | "message"
+    }
+"""
+import json
+import os
+import tempfile
+
+SCHEMA_VERSION = 1
+
+STATUS_SUCCESS = 'success'
+STATUS_NO_DATA = 'no_data'
+STATUS_ERROR = 'error'
+
+BAND_LABELS = ['>95', '>90', '>80', '>70', '>60', '>50', '>33', 'Compartment', 'Fail']
+
+
+def _number(value):
+    """Convert numpy/pandas scalars to plain Python; '#DIV/0!' becomes None."""
+    if isinstance(value, str):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    return value
+
+
+def subject_entry(code, row, labels=BAND_LABELS):
+    """Contract entry for one row of the subject-wise API summary."""
+    return {
+        'code': code,
+        'name': row['Name of APS'],
+        'students': _number(row['Total Students']),
+        'passed': _number(row['Passed']),
+        'bands': {label: _number(row[label]) for label in labels},
+        'api': _number(row['API']),
+    }
+
+
+def overall_entry(row, labels=BAND_LABELS):
+    """Contract entry for the overall summary row."""
+    return {
+        'appeared': _number(row['No of students appeared']),
+        'passed': _number(row['No of students passed']),
+        'bands': {label: _number(row[label]) for label in labels},
+        'api': _number(row['API']),
+    }
+
+
+def build_result(class_name, status, analyzer=None, error=None):
+    """Assemble the result document for a finished (or failed) run."""
+    result = {
+        'schema_version': SCHEMA_VERSION,
+        'status': status,
+        'class': class_name,
+        'students': 0,
+        'subjects': [],
+        'overall': None,
+        'timings': None,
+        'text_backend': None,
+        'files': [],
+        'grading_policy': None,
+        'duplicates': None,
+        'error': error,
+    }
+    if analyzer is not None:
+        labels = analyzer.policy.labels
+        result['students'] = analyzer.student_count
+        result['subjects'] = [
+            subject_entry(code, row, labels)
+            for code, row in zip(analyzer.subject_codes, analyzer.subject_summary or [])
+        ]
+        if analyzer.overall_summary is not None:
+            result['overall'] = overall_entry(analyzer.overall_summary, labels)
+        result['grading_policy'] = analyzer.policy.version
+        result['timings'] = analyzer.profiler.report()
+        if analyzer.text_backend is not None:
+            result['text_backend'] = analyzer.text_backend.name
+        result['files'] = list(analyzer.generated_files)
+        index = getattr(analyzer, 'index', None)
+        if index is not None and index.rows:
+            result['duplicates'] = index.report()
+    return result
+
+
+def run_analyzer(analyzer, class_name, pdf_paths=None, output_dir=None):
+    """Run ``analyzer.process_all`` and return the result document, never raising."""
+    try:
+        success = analyzer.process_all(pdf_paths, output_dir=output_dir)
+    except Exception as e:
+        return build_result(class_name, STATUS_ERROR, analyzer, error=str(e))
+    return build_result(class_name, STATUS_SUCCESS if success else STATUS_NO_DATA, analyzer)
+
+
+def dumps(result):
+    """Compact JSON encoding of a result document."""
+    return json.dumps(result, separators=(',', ':'))
+
+
+def write_result(result, path):
+    """Atomically write the result document to ``path``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(dumps(result))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def read_result(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def exit_code(result):
+    """Process exit status for a result: 0 on success or no data, 1 on error."""
+    return 1 if result['status'] == STATUS_ERROR else 0
@@ -0,0 +1,210 @@
+"""
+Index of students keyed by (academic year, class, roll number, name).
+
+Merged result sheets are often uploaded more than once, or overlap (a
+re-issued sheet after revaluation, the same stream in two files). The
+index is filled while the PDFs are parsed, one frame at a time, so every
+student is counted once without concatenating all frames first. When a
+roll number comes back with different marks the conflict policy decides:
+
+    latest  the record from the newest source wins (file modification time,
+            then the order the sources were added)
+    max     the higher mark of each subject is kept
+    flag    the first record is kept and the others are attached to it
+            under ``conflicts`` for someone to review
+
+Two different names under one roll number are never merged: both
+students are kept and the collision is reported with the resolution
+``kept both``, whatever the policy. Identical repeats are only counted.
+``report()`` summarises what was merged:
+
+    {
+      "policy": "latest",
+      "rows": 1240,
+      "students": 620,
+      "duplicates": 600,
+      "conflicts": 20,
+      "shared_rolls": 1,
+      "collisions": [{"year", "class", "roll", "names", "sources", "resolution"}, ...]
+    }
+
+``conflicts`` counts the repeats resolved with the policy and
+``shared_rolls`` the other names kept under a roll number; ``collisions``
+lists at most ``REPORT_LIMIT`` of both.
+"""
+import json
+import math
+import os
+import tempfile
+
+POLICY_LATEST = 'latest'
+POLICY_MAX = 'max'
+POLICY_FLAG = 'flag'
+POLICIES = (POLICY_LATEST, POLICY_MAX, POLICY_FLAG)
+# Resolution reported for different names under one roll number
+KEPT_BOTH = 'kept both'
+
+REPORT_LIMIT = 50
+
+
+def _mark(value):
+    """Plain int mark, or None for a missing one (NaN/None)."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return int(value)
+
+
+def name_key(name):
+    """
+    Name as stored and compared: the first line (result sheets print the
+    gender under the name), single spaces, upper case.
+    """
+    first_line = str(name or '').strip().split('\n')[0]
+    return ' '.join(first_line.split()).upper()
+
+
+def same_result(a, b):
+    return name_key(a['name']) == name_key(b['name']) and a['marks'] == b['marks']
+
+
+def resolve(current, incoming, policy):
+    """
+    Record to keep when ``incoming`` repeats ``current`` (same roll number
+    and name) with a different result.
+    """
+    if policy == POLICY_FLAG:
+        kept = dict(current)
+        kept['conflicts'] = list(current.get('conflicts') or []) + [
+            {'source': incoming['source'], 'name': incoming['name'], 'marks': incoming['marks']}
+        ]
+        return kept
+    if (incoming.get('version') or 0) >= (current.get('version') or 0):
+        newer, older = incoming, current
+    else:
+        newer, older = current, incoming
+    kept = dict(newer)
+    if policy == POLICY_MAX:
+        marks = dict(older['marks'])
+        for code, mark in newer['marks'].items():
+            if code not in marks or mark > marks[code]:
+                marks[code] = mark
+        kept['marks'] = marks
+    kept['conflicts'] = current.get('conflicts') or []
+    return kept
+
+
+class StudentIndex:
+    def __init__(self, class_name, policy=POLICY_LATEST):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown duplicate policy {policy!r}; expected one of {', '.join(POLICIES)}")
+        self.class_name = class_name
+        self.policy = policy
+        # (year, class, roll number, name key) -> record
+        self.entries = {}
+        # (year, class, roll number) -> names seen, to report name collisions
+        self.names = {}
+        self.rows = 0
+        self.duplicates = 0
+        self.conflicts = 0
+        self.shared_rolls = 0
+        self.collisions = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, record):
+        """Add one student record (``year, roll, name, marks, source, stream, version``)."""
+        self.rows += 1
+        roll_key = (record['year'], self.class_name, record['roll'])
+        key = roll_key + (name_key(record['name']),)
+        current = self.entries.get(key)
+        if current is None:
+            names = self.names.setdefault(roll_key, [])
+            if names:
+                current = self.entries[roll_key + (name_key(names[0]),)]
+                self._collision(current, record, KEPT_BOTH)
+            names.append(record['name'])
+            self.entries[key] = record
+            return
+        if same_result(current, record):
+            self.duplicates += 1
+            return
+        self.entries[key] = resolve(current, record, self.policy)
+        self._collision(current, record, self.policy)
+
+    def _collision(self, current, record, resolution):
+        if resolution == KEPT_BOTH:
+            self.shared_rolls += 1
+        else:
+            self.conflicts += 1
+        if len(self.collisions) < REPORT_LIMIT:
+            self.collisions.append({
+                'year': record['year'], 'class': self.class_name, 'roll': record['roll'],
+                'names': [current['name'], record['name']],
+                'sources': [current['source'], record['source']], 'resolution': resolution,
+            })
+
+    def add_frame(self, df, subject_codes, year, source, stream='', version=0):
+        """Add every row of a parsed frame (``Roll_Number, Name, <subject codes>``)."""
+        if df.empty:
+            return
+        codes = [code for code in subject_codes if code in df.columns]
+        columns = ['Roll_Number', 'Name'] + codes
+        for row in df[columns].itertuples(index=False, name=None):
+            marks = {}
+            for code, value in zip(codes, row[2:]):
+                value = _mark(value)
+                if value is not None:
+                    marks[code] = value
+            if not marks:
+                continue
+            self.add({
+                'year': year or '', 'roll': str(row[0]), 'name': name_key(row[1]), 'marks': marks,
+                'source': source, 'stream': stream, 'version': version,
+            })
+
+    def frame(self, subject_codes):
+        """One row per student in first-seen order, shaped like the parsed frames."""
+        import pandas as pd
+        rows = []
+        for record in self.entries.values():
+            row = {'Roll_Number': record['roll'], 'Name': record['name']}
+            for code in subject_codes:
+                row[code] = record['marks'].get(code)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def records(self):
+        for (year, class_name, roll, name), record in self.entries.items():
+            yield dict(record, **{'class': class_name})
+
+    def report(self):
+        return {
+            'policy': self.policy,
+            'rows': self.rows,
+            'students': len(self.entries),
+            'duplicates': self.duplicates,
+            'conflicts': self.conflicts,
+            'shared_rolls': self.shared_rolls,
+            'collisions': list(self.collisions),
+        }
+
+    def save(self, path):
+        """Atomically write the records as JSON lines."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for record in self.records():
+                    f.write(json.dumps(record) + '\n')
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+def load_records(path):
+    """Records written by ``StudentIndex.save``."""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
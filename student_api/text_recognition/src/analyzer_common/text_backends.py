@@ -0,0 +1,317 @@
+"""
+Text extraction backends for result PDFs.
+
+Every backend turns a PDF into one string per page, laid out line by line
+in reading order, which is what the analyzers' block and regex parsing
+expects. Available backends:
+
+* ``pdfplumber`` - pdfminer layout analysis; the original, slowest engine.
+* ``pdfium``     - pypdfium2; rebuilds lines from character positions and
+                   is typically 20-30x faster.
+* ``poppler``    - the ``pdftotext`` tool, from PATH or the bundled
+                   ``tools/poppler`` build.
+
+``get_backend('auto')`` times the available backends on a sample PDF and
+picks the fastest. The default comes from the ``RESULT_TEXT_BACKEND``
+environment variable.
+"""
+import ctypes
+import glob
+import os
+import shutil
+import subprocess
+import time
+
+DEFAULT_BACKEND_ENV = 'RESULT_TEXT_BACKEND'
+TOOLS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
+
+
+class BackendUnavailable(RuntimeError):
+    pass
+
+
+class TextBackend:
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def extract_pages(self, pdf_path, max_pages=None, on_page=None, first_page=0):
+        """
+        Return a list with the text of every page (or ``max_pages`` pages).
+
+        Reading starts at the zero-based ``first_page``. ``on_page`` is
+        called with no arguments after each page is read.
+        """
+        raise NotImplementedError
+
+    def extract_text(self, pdf_path):
+        return "\n".join(self.extract_pages(pdf_path))
+
+
+class PdfplumberBackend(TextBackend):
+    name = 'pdfplumber'
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import pdfplumber  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def extract_pages(self, pdf_path, max_pages=None, on_page=None, first_page=0):
+        import pdfplumber
+        pages = []
+        last_page = None if max_pages is None else first_page + max_pages
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages[first_page:last_page]:
+                pages.append(page.extract_text() or "")
+                if on_page is not None:
+                    on_page()
+        return pages
+
+
+class PdfiumBackend(TextBackend):
+    name = 'pdfium'
+
+    # Characters whose baselines differ by less than this (in points) share a line
+    LINE_TOLERANCE = 2.0
+    # A horizontal gap wider than this (in points) starts a new word; the same
+    # tolerance pdfplumber uses, so both engines split words alike
+    WORD_GAP = 3.0
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def extract_pages(self, pdf_path, max_pages=None, on_page=None, first_page=0):
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            pages = []
+            last_page = len(pdf) if max_pages is None else min(len(pdf), first_page + max_pages)
+            for index in range(first_page, last_page):
+                page = pdf[index]
+                try:
+                    pages.append(self._page_text(page))
+                finally:
+                    page.close()
+                if on_page is not None:
+                    on_page()
+            return pages
+        finally:
+            pdf.close()
+
+    def _page_text(self, page):
+        return "\n".join(' '.join(word[4] for word in line) for line in self.page_lines(page))
+
+    def page_lines(self, page, bbox=None):
+        """
+        Words of ``page`` grouped into lines, top of the page first.
+
+        Each word is ``(x0, top, x1, bottom, text)`` in points, measured from
+        the top-left corner like pdfplumber's word boxes. With ``bbox``
+        (``x0, top, x1, bottom``) only characters inside that region are used.
+        """
+        return self.lines_from_chars(self.page_chars(page), bbox)
+
+    def page_chars(self, page):
+        """Positioned characters of ``page``, for ``lines_from_chars``."""
+        import pypdfium2.raw as pdfium_c
+        page_height = page.get_height()
+        textpage = page.get_textpage()
+        chars = []
+        x, y = ctypes.c_double(), ctypes.c_double()
+        try:
+            for index in range(textpage.count_chars()):
+                code = pdfium_c.FPDFText_GetUnicode(textpage.raw, index)
+                if code in (0, 10, 13):
+                    continue
+                pdfium_c.FPDFText_GetCharOrigin(textpage.raw, index, x, y)
+                left, bottom, right, top = textpage.get_charbox(index, loose=True)
+                chars.append((y.value, left, right, page_height - top, page_height - bottom, chr(code)))
+        finally:
+            textpage.close()
+        return chars
+
+    def lines_from_chars(self, chars, bbox=None):
+        if bbox is not None:
+            chars = [char for char in chars if _inside(char, bbox)]
+
+        # Group characters into lines by baseline, top of the page first
+        chars = sorted(chars, key=lambda c: (-c[0], c[1]))
+        lines = []
+        current = []
+        baseline = None
+        for char in chars:
+            if baseline is None or abs(char[0] - baseline) > self.LINE_TOLERANCE:
+                if current:
+                    lines.append(current)
+                current = []
+                baseline = char[0]
+            current.append(char)
+        if current:
+            lines.append(current)
+
+        word_lines = []
+        for line in lines:
+            # Order by horizontal centre: zero-width generated spaces then
+            # fall between the glyphs they separate
+            line.sort(key=lambda c: c[1] + c[2])
+            words = []
+            word = []
+            previous_right = None
+            for char in line:
+                _, left, right, _, _, text = char
+                gap = previous_right is not None and left - previous_right > self.WORD_GAP
+                if text.isspace() or gap:
+                    if word:
+                        words.append(word)
+                    word = []
+                if not text.isspace():
+                    word.append(char)
+                    previous_right = right
+            if word:
+                words.append(word)
+            if words:
+                word_lines.append([
+                    (
+                        word[0][1],
+                        min(c[3] for c in word),
+                        word[-1][2],
+                        max(c[4] for c in word),
+                        ''.join(c[5] for c in word),
+                    )
+                    for word in words
+                ])
+        return word_lines
+
+
+def _inside(char, bbox):
+    """Whether the centre of a pdfium char tuple lies inside ``bbox``."""
+    x_centre = (char[1] + char[2]) / 2
+    y_centre = (char[3] + char[4]) / 2
+    return bbox[0] <= x_centre <= bbox[2] and bbox[1] <= y_centre <= bbox[3]
+
+
+class PopplerBackend(TextBackend):
+    name = 'poppler'
+
+    @classmethod
+    def executable(cls):
+        found = shutil.which('pdftotext')
+        if found:
+            return found
+        bundled = glob.glob(os.path.join(TOOLS_DIR, 'poppler', '*', 'Library', 'bin', 'pdftotext*'))
+        if bundled and os.name == 'nt':
+            return bundled[0]
+        return None
+
+    @classmethod
+    def is_available(cls):
+        return cls.executable() is not None
+
+    def extract_pages(self, pdf_path, max_pages=None, on_page=None, first_page=0):
+        executable = self.executable()
+        if executable is None:
+            raise BackendUnavailable('pdftotext was not found')
+        # pdftotext numbers pages from 1
+        args = [executable, '-q', '-enc', 'UTF-8', '-f', str(first_page + 1)]
+        if max_pages is not None:
+            args += ['-l', str(first_page + max_pages)]
+        completed = subprocess.run(
+            args + [pdf_path, '-'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        text = completed.stdout.decode('utf-8', errors='replace')
+        # pdftotext ends every page with a form feed
+        pages = text.split('\f')
+        if pages and not pages[-1].strip():
+            pages.pop()
+        if on_page is not None:
+            # pdftotext reads the whole document in one go
+            for _ in pages:
+                on_page()
+        return pages
+
+
+BACKENDS = {backend.name: backend for backend in (PdfplumberBackend, PdfiumBackend, PopplerBackend)}
+
+_auto_choice = None
+
+
+def count_pages(pdf_path):
+    """Number of pages in ``pdf_path`` without extracting any text, or None."""
+    try:
+        if PdfiumBackend.is_available():
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        if PdfplumberBackend.is_available():
+            import pdfplumber
+            with pdfplumber.open(pdf_path) as pdf:
+                return len(pdf.pages)
+    except Exception:
+        return None
+    return None
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.is_available()]
+
+
+def benchmark_backends(sample_pdf, names=None, max_pages=2):
+    """Time each available backend on the first pages of ``sample_pdf``; returns {name: seconds}."""
+    timings = {}
+    for name in names or available_backends():
+        backend = BACKENDS[name]()
+        start = time.perf_counter()
+        try:
+            backend.extract_pages(sample_pdf, max_pages=max_pages)
+        except Exception:
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def choose_fastest(sample_pdf=None):
+    """Pick the fastest working backend, benchmarking once per process."""
+    global _auto_choice
+    if _auto_choice is None:
+        if sample_pdf is None:
+            # Without a sample, prefer the engines known to be fastest
+            for name in ('pdfium', 'poppler', 'pdfplumber'):
+                if BACKENDS[name].is_available():
+                    _auto_choice = name
+                    break
+        else:
+            timings = benchmark_backends(sample_pdf)
+            if timings:
+                _auto_choice = min(timings, key=timings.get)
+        if _auto_choice is None:
+            raise BackendUnavailable('No text extraction backend is available')
+    return _auto_choice
+
+
+def get_backend(name=None, sample_pdf=None):
+    """Return a backend instance by name ('auto' benchmarks and picks the fastest)."""
+    name = (name or os.environ.get(DEFAULT_BACKEND_ENV) or 'auto').lower()
+    if name == 'auto':
+        name = choose_fastest(sample_pdf)
+    if name not in BACKENDS:
+        raise BackendUnavailable(f"Unknown text backend {name!r}; choose from {', '.join(BACKENDS)} or auto")
+    backend = BACKENDS[name]
+    if not backend.is_available():
+        raise BackendUnavailable(f"Text backend {name!r} is not installed")
+    return backend()
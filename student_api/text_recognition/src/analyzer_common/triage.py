@@ -0,0 +1,185 @@
+"""
+Pre-flight checks for a result PDF before it is stored or analyzed.
+
+``triage`` reads the file header, the trailer and the first page only, so
+it costs milliseconds even for a large merged PDF. It reports the page
+count, whether the file is encrypted, whether the first page has a text
+layer and which class its heading belongs to, picks the extraction route
+and estimates how long the analyzer will take:
+
+    {
+      "ok": true,
+      "reason": null | "not_pdf" | "damaged" | "encrypted" | "empty"
+                | "no_text" | "not_result" | "wrong_class",
+      "message": "...",
+      "pages": 120,
+      "encrypted": false,
+      "text_layer": true,
+      "class": "class_10" | "class_12" | null,
+      "route": "text" | "ocr",
+      "estimated_seconds": 3.4
+    }
+
+Scanned PDFs (no text layer) would need the ``ocr`` route, which the
+analyzers do not have; they are rejected with a message saying so.
+"""
+import json
+import os
+import re
+
+from .text_backends import PdfiumBackend, PdfplumberBackend
+
+ROUTE_TEXT = 'text'
+ROUTE_OCR = 'ocr'
+
+# Characters the first page needs to count as having a text layer
+TEXT_LAYER_MIN_CHARS = 50
+
+# Headings printed on CBSE result pages; Class XII is checked first
+CLASS_SIGNATURES = (
+    ('class_12', re.compile(r'Senior School Certificate Examination|\(Class XII\)', re.IGNORECASE)),
+    ('class_10', re.compile(r'Secondary School Examination|\(Class X\)', re.IGNORECASE)),
+)
+_ROLL_RE = re.compile(r'Roll\s*No', re.IGNORECASE)
+
+# Analyzer cost used until a previous run's profile is available to calibrate it
+STARTUP_SECONDS = 1.0
+SECONDS_PER_PAGE = {'pdfium': 0.02, 'poppler': 0.03, 'pdfplumber': 0.2}
+
+MESSAGES = {
+    'not_pdf': 'The file is not a PDF.',
+    'damaged': 'The PDF is damaged and cannot be read.',
+    'encrypted': 'The PDF is password protected.',
+    'empty': 'The PDF has no pages.',
+    'no_text': 'The PDF is a scan without a text layer; download the result PDF from the CBSE site instead.',
+    'not_result': 'The PDF does not look like a CBSE result.',
+    'wrong_class': 'The PDF holds {found} results, not {expected}.',
+}
+CLASS_LABELS = {'class_10': 'Class X', 'class_12': 'Class XII'}
+
+
+def _read_ends(source):
+    """First and last KB of ``source`` (a path or bytes)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source[:1024]), bytes(source[-2048:])
+    with open(source, 'rb') as f:
+        head = f.read(1024)
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 2048))
+        return head, f.read()
+
+
+def _pdfium_first_page(source):
+    """``(pages, first page text)``; raises ValueError('encrypted'/'damaged')."""
+    import pypdfium2 as pdfium
+    try:
+        pdf = pdfium.PdfDocument(source)
+    except pdfium.PdfiumError as e:
+        raise ValueError('encrypted' if 'password' in str(e).lower() else 'damaged')
+    try:
+        pages = len(pdf)
+        if not pages:
+            return 0, ''
+        page = pdf[0]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return pages, textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _pdfplumber_first_page(source):
+    import io
+    import pdfplumber
+    from pdfminer.pdfdocument import PDFPasswordIncorrect
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        with pdfplumber.open(source) as pdf:
+            if not pdf.pages:
+                return 0, ''
+            return len(pdf.pages), pdf.pages[0].extract_text() or ''
+    except PDFPasswordIncorrect:
+        raise ValueError('encrypted')
+    except Exception:
+        raise ValueError('damaged')
+
+
+def seconds_per_page(backend=None, profile_path=None):
+    """Per-page analyzer cost, from a previous run's profile JSON when there is one."""
+    if profile_path:
+        try:
+            with open(profile_path, encoding='utf-8') as f:
+                report = json.load(f)
+            pages = report['counters'].get('pages')
+            if pages:
+                return report['total_wall_seconds'] / pages
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    if backend not in SECONDS_PER_PAGE:
+        backend = 'pdfium' if PdfiumBackend.is_available() else 'pdfplumber'
+    return SECONDS_PER_PAGE[backend]
+
+
+def estimate_seconds(pages, backend=None, profile_path=None):
+    """Rough analyzer run time for ``pages`` pages."""
+    return round(STARTUP_SECONDS + (pages or 0) * seconds_per_page(backend, profile_path), 1)
+
+
+def triage(source, expected_class=None, backend=None, profile_path=None):
+    """
+    Check a result PDF given as a path or bytes; see the module docstring.
+
+    ``expected_class`` ('class_10' or 'class_12') rejects a PDF whose
+    heading belongs to the other class.
+    """
+    report = {
+        'ok': False, 'reason': None, 'message': None, 'pages': None, 'encrypted': False,
+        'text_layer': None, 'class': None, 'route': ROUTE_TEXT, 'estimated_seconds': None,
+    }
+
+    def reject(reason, **fmt):
+        report.update(reason=reason, message=MESSAGES[reason].format(**fmt))
+        return report
+
+    head, tail = _read_ends(source)
+    if b'%PDF-' not in head:
+        return reject('not_pdf')
+    report['encrypted'] = b'/Encrypt' in tail
+
+    try:
+        if PdfiumBackend.is_available():
+            pages, text = _pdfium_first_page(source)
+        elif PdfplumberBackend.is_available():
+            pages, text = _pdfplumber_first_page(source)
+        else:
+            # Nothing to look inside with; let the analyzer decide
+            report['ok'] = True
+            return report
+    except ValueError as e:
+        if str(e) == 'encrypted':
+            report['encrypted'] = True
+        return reject(str(e))
+    report['pages'] = pages
+    if not pages:
+        return reject('empty')
+
+    report['text_layer'] = len(text.strip()) >= TEXT_LAYER_MIN_CHARS
+    if not report['text_layer']:
+        report['route'] = ROUTE_OCR
+        return reject('no_text')
+
+    report['class'] = next((name for name, pattern in CLASS_SIGNATURES if pattern.search(text)), None)
+    if report['class'] is None and not _ROLL_RE.search(text):
+        return reject('not_result')
+    if expected_class and report['class'] and report['class'] != expected_class:
+        return reject('wrong_class', found=CLASS_LABELS[report['class']], expected=CLASS_LABELS[expected_class])
+
+    report['ok'] = True
+    report['estimated_seconds'] = estimate_seconds(pages, backend, profile_path)
+    return report
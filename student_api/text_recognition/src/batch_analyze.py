@@ -0,0 +1,57 @@
+"""
+Analyze result PDFs for many schools from a manifest.
+
+    python src/batch_analyze.py manifest.csv --output-root output/batch --workers 8
+
+The manifest has the columns ``school, year, class, stream, pdf`` (``class``
+is 10 or 12, ``stream`` is science/commerce/humanities for Class XII, and
+relative ``pdf`` paths are resolved against the manifest's directory).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from analyzer_common.batch import ManifestError, load_manifest, run_batch
+from analyzer_common.text_backends import DEFAULT_BACKEND_ENV
+
+
+def parse_args(argv=None):
+    default_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'output', 'batch'))
+    parser = argparse.ArgumentParser(description='Analyze result PDFs for several schools in parallel.')
+    parser.add_argument('manifest', help='CSV or JSON manifest of school, year, class, stream, pdf entries')
+    parser.add_argument('--output-root', default=default_root,
+                        help='Directory for per-school outputs and the roll-up (default: output/batch)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--backend', choices=['auto', 'pdfplumber', 'pdfium', 'poppler'],
+                        help='Text extraction backend (default: $RESULT_TEXT_BACKEND or auto)')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.backend:
+        # Inherited by the worker processes
+        os.environ[DEFAULT_BACKEND_ENV] = args.backend
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ManifestError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    def report(job, result):
+        api = (result['overall'] or {}).get('api')
+        print(f"{job['school']} {job['year']} {job['class']}: {result['status']} "
+              f"({result['students']} students, API {api})")
+
+    start = time.perf_counter()
+    jobs_with_results = run_batch(entries, args.output_root, max_workers=args.workers, on_result=report)
+    failed = sum(1 for _, result in jobs_with_results if result['status'] == 'error')
+    print(f"{len(jobs_with_results)} jobs in {time.perf_counter() - start:.1f}s, {failed} failed; "
+          f"roll-up written to {os.path.join(args.output_root, 'rollup.csv')}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
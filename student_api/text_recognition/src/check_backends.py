@@ -0,0 +1,68 @@
+"""
+Conformance check for the text extraction backends.
+
+Parses every sample PDF in ``data/`` with each available backend and checks
+that the students (roll number, name and marks) match what the reference
+``pdfplumber`` backend produces. Exits with status 1 on any difference.
+
+    python src/check_backends.py [PDF ...]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from analyzer_common.text_backends import available_backends
+from class_10.test10th import ResultAnalyzer10th
+from class_12.test12th import ResultAnalyzer12th
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+REFERENCE = 'pdfplumber'
+
+
+def parse_students(pdf_path, backend):
+    """Parse ``pdf_path`` with ``backend``; returns (records, seconds)."""
+    class_10 = os.path.basename(os.path.dirname(pdf_path)) == 'class_10'
+    analyzer = (ResultAnalyzer10th if class_10 else ResultAnalyzer12th)(text_backend=backend)
+    start = time.perf_counter()
+    df = analyzer.process_pdf(pdf_path)
+    elapsed = time.perf_counter() - start
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return sorted(records, key=lambda record: (record['Roll_Number'], record['Name'])), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that every text backend parses the same students.')
+    parser.add_argument('pdf_files', nargs='*', help='PDFs to check (default: every PDF under data/)')
+    args = parser.parse_args()
+
+    pdf_files = args.pdf_files or sorted(glob.glob(os.path.join(DATA_DIR, '*', '*.pdf')))
+    backends = available_backends()
+    if REFERENCE not in backends:
+        print(f"The reference backend {REFERENCE} is not installed", file=sys.stderr)
+        return 1
+
+    failures = 0
+    for pdf_path in pdf_files:
+        reference, reference_time = parse_students(pdf_path, REFERENCE)
+        print(f"{os.path.basename(pdf_path)}: {len(reference)} students")
+        print(f"  {REFERENCE:<12} {reference_time:8.3f}s  reference")
+        for backend in backends:
+            if backend == REFERENCE:
+                continue
+            records, elapsed = parse_students(pdf_path, backend)
+            if records == reference:
+                status = 'OK'
+            else:
+                failures += 1
+                missing = [r['Roll_Number'] for r in reference if r not in records]
+                status = f"MISMATCH ({len(records)} students; differing rolls: {', '.join(missing) or '-'})"
+            print(f"  {backend:<12} {elapsed:8.3f}s  {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
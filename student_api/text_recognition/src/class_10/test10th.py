@@ -1,10 +1,23 @@
+import argparse
 import os
 import re
+import sys
 import pandas as pd
-import pdfplumber
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analyzer_common.profiling import StageProfiler
+from analyzer_common import result_contract
+from analyzer_common.text_backends import count_pages, get_backend
+from analyzer_common.progress import ProgressReporter
+from analyzer_common.layout_templates import LayoutTemplate, extract_students
+from analyzer_common.grading import get_policy, grade_marks
+from analyzer_common.naming import infer_stream, infer_year
+from analyzer_common.student_index import POLICIES, POLICY_LATEST, StudentIndex
 
 class ResultAnalyzer10th:
-    def __init__(self):
+    def __init__(self, cprofile_path=None, text_backend=None, extraction='text', template_path=None,
+                 progress_path=None, duplicate_policy=POLICY_LATEST, academic_year=None,
+                 grading_policy=None):
         self.subject_codes = {
             '184': 'ENGLISH',
             '085': 'HINDI',
@@ -14,23 +27,33 @@ class ResultAnalyzer10th:
             '402': 'IT'
         }
 
-        self.grade_ranges = [
-            (95, 100, 10, '>95'),
-            (90, 94.99, 8, '90-94.99'),
-            (80, 89.99, 6, '80-89.9'),
-            (70, 79.99, 4, '70-79.9'),
-            (60, 69.99, 2, '60-69.9'),
-            (50, 59.99, 0, '50-59.99'),
-            (33, 49.99, -1, '33-49.99'),
-            (1, 32.99, -2, 'Compartment'),
-            (0, 0.99, -3, 'Fail')
-        ]
+        # Bands and points of every API worksheet and summary (analyzer_common/grading.py)
+        self.policy = get_policy(grading_policy)
 
         self.generated_files = []
-
-    def extract_text_from_pdf(self, pdf_path):
-        with pdfplumber.open(pdf_path) as pdf:
-            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+        self.student_count = 0
+        self.subject_summary = None
+        self.overall_summary = None
+        self.progress = ProgressReporter(progress_path) if progress_path else None
+        self.profiler = StageProfiler(cprofile_path=cprofile_path, progress=self.progress)
+        self.text_backend_name = text_backend
+        self.text_backend = None
+        # 'text' parses the full page text; 'template' reads fixed page regions
+        self.extraction = extraction
+        self.layout_template = LayoutTemplate.load(template_path) if template_path else None
+        # Students of every PDF, keyed by (year, class, roll number, name); see student_index
+        self.index = StudentIndex('class_10', duplicate_policy)
+        # Year of every PDF; when None it is taken from each file name
+        self.academic_year = academic_year
+
+    def extract_text_from_pdf(self, pdf_path, first_page=0, max_pages=None):
+        if self.text_backend is None:
+            # Resolved on first use so 'auto' can benchmark on a real PDF
+            self.text_backend = get_backend(self.text_backend_name, sample_pdf=pdf_path)
+        pages = self.text_backend.extract_pages(
+            pdf_path, max_pages=max_pages, on_page=lambda: self.profiler.count('pages'), first_page=first_page
+        )
+        return "\n".join(pages)
 
     def extract_student_blocks(self, text):
         lines = text.splitlines()
@@ -71,23 +94,53 @@ class ResultAnalyzer10th:
         return marks
 
     def process_pdf(self, path):
-        text = self.extract_text_from_pdf(path)
+        self.profiler.count('pdfs')
+        if self.extraction == 'template':
+            return self.process_pdf_regions(path)
+        with self.profiler.stage('extract_text'):
+            text = self.extract_text_from_pdf(path)
+        return self.parse_students(text)
+
+    def parse_students(self, text):
+        """One row per student block in ``text``, with a column per subject code."""
         if not text.strip():
             return pd.DataFrame()
-        blocks = self.extract_student_blocks(text)
+        with self.profiler.stage('split_blocks'):
+            blocks = self.extract_student_blocks(text)
+        self.profiler.count('blocks', len(blocks))
         all_students = []
 
-        for block in blocks:
-            info = self.extract_student_info(block)
-            if not info:
-                continue
-            marks = self.extract_marks(block)
-            if not marks:
+        with self.profiler.stage('extract_fields'):
+            for block in blocks:
+                info = self.extract_student_info(block)
+                if not info:
+                    continue
+                marks = self.extract_marks(block)
+                if not marks:
+                    continue
+                student = {'Roll_Number': info['Roll_Number'], 'Name': info['Name']}
+                for code in self.subject_codes:
+                    student[code] = marks.get(code, None)
+                all_students.append(student)
+        self.profiler.count('students', len(all_students))
+        return pd.DataFrame(all_students)
+
+    def process_pdf_regions(self, path):
+        # Region reads use pdfium unless pdfplumber was asked for explicitly
+        engine = 'pdfplumber' if self.text_backend_name == 'pdfplumber' else None
+        with self.profiler.stage('extract_regions'):
+            students = extract_students(
+                path, self.subject_codes, self.layout_template, engine=engine, profiler=self.profiler
+            )
+        all_students = []
+        for info in students:
+            if not info['marks']:
                 continue
             student = {'Roll_Number': info['Roll_Number'], 'Name': info['Name']}
             for code in self.subject_codes:
-                student[code] = marks.get(code, None)
+                student[code] = info['marks'].get(code, None)
             all_students.append(student)
+        self.profiler.count('students', len(all_students))
         return pd.DataFrame(all_students)
 
     def calculate_best_of_5(self, df):
@@ -108,24 +161,16 @@ class ResultAnalyzer10th:
         return pd.DataFrame(simplified)
 
     def save_subject_api(self, df, subject_code, output_dir):
-        series = df[subject_code].dropna()
-        total = len(series)
-        grade_data = []
-        total_points = 0
-
-        for min_m, max_m, pts, label in self.grade_ranges:
-            count = sum((series >= min_m) & (series <= max_m)) if label != 'Fail' else sum(series == 0)
-            points = count * pts
-            grade_data.append({
-                'Range': label,
-                'Points to be Awarded': pts,
-                'no of students': count,
-                'POINTS': points
-            })
-            total_points += points
-
-        grade_data.append({'Range': 'Total', 'Points to be Awarded': '', 'no of students': total, 'POINTS': total_points})
-        api = round(total_points / total, 2) if total > 0 else '#DIV/0!'
+        graded = grade_marks(df[subject_code], self.policy)
+        grade_data = [
+            {'Range': label, 'Points to be Awarded': pts, 'no of students': graded['bands'][label],
+             'POINTS': graded['bands'][label] * pts}
+            for label, pts in zip(self.policy.labels, self.policy.points.tolist())
+        ]
+        total = graded['students']
+        grade_data.append({'Range': 'Total', 'Points to be Awarded': '', 'no of students': total,
+                           'POINTS': graded['points']})
+        api = graded['api'] if graded['api'] is not None else '#DIV/0!'
         grade_data.append({'Range': 'API', 'Points to be Awarded': '', 'no of students': total, 'POINTS': api})
 
         subject_api_dir = os.path.join(output_dir, 'subject_api')
@@ -138,32 +183,19 @@ class ResultAnalyzer10th:
     def generate_api_summary(self, df, output_dir):
         rows = []
         for i, (code, name) in enumerate(self.subject_codes.items(), start=1):
-            series = df[code].dropna()
-            total = len(series)
+            graded = grade_marks(df[code], self.policy)
             row = {
                 'SNO': i,
                 'Name of APS': name,
-                'Total Students': total,
-                'Appeared': total,
-                'Passed': sum(series >= 33),
-                '>95': sum(series > 95),
-                '>90': sum((series > 90) & (series <= 95)),
-                '>80': sum((series > 80) & (series <= 90)),
-                '>70': sum((series > 70) & (series <= 80)),
-                '>60': sum((series > 60) & (series <= 70)),
-                '>50': sum((series > 50) & (series <= 60)),
-                '>33': sum((series > 33) & (series <= 50)),
-                'Compartment': sum((series >= 1) & (series <= 32)),
-                'Fail': sum(series == 0)
+                'Total Students': graded['students'],
+                'Appeared': graded['students'],
+                'Passed': graded['passed'],
             }
-            points = (
-                row['>95'] * 10 + row['>90'] * 8 + row['>80'] * 6 + row['>70'] * 4 +
-                row['>60'] * 2 + row['>50'] * 0 + row['>33'] * -1 +
-                row['Compartment'] * -2 + row['Fail'] * -3
-            )
-            row['API'] = round(points / total, 2) if total > 0 else '#DIV/0!'
+            row.update(graded['bands'])
+            row['API'] = graded['api'] if graded['api'] is not None else '#DIV/0!'
             rows.append(row)
 
+        self.subject_summary = rows
         df_summary = pd.DataFrame(rows)
         summary_path = os.path.join(output_dir, 'subject_api', '10th_Subject_Wise_API_Summary.csv')
         df_summary.to_csv(summary_path, index=False)
@@ -174,82 +206,148 @@ class ResultAnalyzer10th:
         for code in self.subject_codes:
             all_marks.extend(df[code].dropna().tolist())
 
-        marks_series = pd.Series(all_marks)
-        total_students = len(marks_series)
-
+        graded = grade_marks(all_marks, self.policy)
         overall_row = {
             'CLASS X OVERALL': '',
-            'No of students appeared': total_students,
-            'No of students passed': sum(marks_series >= 33),
-            '>95': sum(marks_series > 95),
-            '>90': sum((marks_series > 90) & (marks_series <= 95)),
-            '>80': sum((marks_series > 80) & (marks_series <= 90)),
-            '>70': sum((marks_series > 70) & (marks_series <= 80)),
-            '>60': sum((marks_series > 60) & (marks_series <= 70)),
-            '>50': sum((marks_series > 50) & (marks_series <= 60)),
-            '>33': sum((marks_series > 33) & (marks_series <= 50)),
-            'Compartment': sum((marks_series >= 1) & (marks_series <= 32)),
-            'Fail': sum(marks_series == 0)
+            'No of students appeared': graded['students'],
+            'No of students passed': graded['passed'],
         }
+        overall_row.update(graded['bands'])
+        overall_row['API'] = graded['api'] if graded['api'] is not None else '#DIV/0!'
 
-        points = (
-            overall_row['>95'] * 10 + overall_row['>90'] * 8 + overall_row['>80'] * 6 +
-            overall_row['>70'] * 4 + overall_row['>60'] * 2 + overall_row['>50'] * 0 +
-            overall_row['>33'] * -1 + overall_row['Compartment'] * -2 + overall_row['Fail'] * -3
-        )
-
-        overall_row['API'] = round(points / total_students, 2) if total_students > 0 else '#DIV/0!'
-
+        self.overall_summary = overall_row
         df_overall = pd.DataFrame([overall_row])
         summary_path = os.path.join(output_dir, '10th_overall_summary.csv')
         df_overall.to_csv(summary_path, index=False)
         self.generated_files.append(summary_path)
 
-    def process_all(self):
+    def process_all(self, pdf_paths=None, output_dir=None):
         base = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
         data_dir = os.path.join(base, 'data', 'class_10')
-        out_dir = os.path.join(base, 'output', 'class_10')
+        out_dir = output_dir or os.path.join(base, 'output', 'class_10')
         os.makedirs(out_dir, exist_ok=True)
 
-        all_dfs = []
-        for root, _, files in os.walk(data_dir):
-            for file in files:
-                if file.endswith('.pdf'):
-                    df = self.process_pdf(os.path.join(root, file))
-                    if not df.empty:
-                        all_dfs.append(df)
-
-        # Filter out empty/all-NA DataFrames (FutureWarning Fix)
-        all_dfs = [df for df in all_dfs if not df.empty and not df.isna().all().all()]
+        if not pdf_paths:
+            pdf_paths = []
+            for root, _, files in os.walk(data_dir):
+                for file in files:
+                    if file.endswith('.pdf'):
+                        pdf_paths.append(os.path.join(root, file))
+
+        if self.progress is not None:
+            page_counts = [count_pages(path) for path in pdf_paths]
+            self.progress.update(force=True, total_pages=None if None in page_counts else sum(page_counts))
+        self.profiler.start()
+        try:
+            success = self._analyze(pdf_paths, out_dir)
+        finally:
+            self.profiler.stop()
+            if self.progress is not None:
+                self.progress.finish()
+                self.progress.close()
+            profile_path = self.profiler.write_json(os.path.join(out_dir, '10th_profile.json'))
+            self.generated_files.append(profile_path)
+        return success
+
+    def _analyze(self, pdf_paths, out_dir):
+        for path in pdf_paths:
+            df = self.process_pdf(path)
+            self.add_students(df, path)
+
+        return self.summarize(out_dir)
+
+    def add_students(self, df, path, year=None):
+        """Add one PDF's (or chunk's) parsed students to the index."""
+        # Skip empty/all-NA DataFrames (FutureWarning Fix)
+        if df.empty or df.isna().all().all():
+            return
+        with self.profiler.stage('index'):
+            self.index.add_frame(
+                df, self.subject_codes,
+                year=year or self.academic_year or infer_year(path),
+                source=os.path.basename(path),
+                stream=infer_stream(path),
+                version=os.path.getmtime(path) if os.path.exists(path) else 0,
+            )
 
-        if not all_dfs:
+    def summarize(self, out_dir):
+        """Write the result and API CSVs for the indexed students to ``out_dir``."""
+        if not len(self.index):
             return False  # No data processed
 
-        merged = pd.concat(all_dfs, ignore_index=True)
-        merged_best5 = self.calculate_best_of_5(merged)
+        with self.profiler.stage('merge'):
+            merged = self.index.frame(self.subject_codes)
+        with self.profiler.stage('best_of_5'):
+            merged_best5 = self.calculate_best_of_5(merged)
+        self.student_count = len(merged_best5)
 
-        result_path = os.path.join(out_dir, '10th_result.csv')
-        merged_best5.to_csv(result_path, index=False)
-        self.generated_files.append(result_path)
+        with self.profiler.stage('write_results'):
+            result_path = os.path.join(out_dir, '10th_result.csv')
+            merged_best5.to_csv(result_path, index=False)
+            self.generated_files.append(result_path)
+            students_path = self.index.save(os.path.join(out_dir, '10th_students.jsonl'))
+            self.generated_files.append(students_path)
 
-        for code in self.subject_codes:
-            self.save_subject_api(merged_best5, code, out_dir)
+        with self.profiler.stage('subject_api'):
+            for code in self.subject_codes:
+                self.save_subject_api(merged_best5, code, out_dir)
 
-        self.generate_api_summary(merged_best5, out_dir)
-        self.generate_overall_summary_csv(merged_best5, out_dir)
+        with self.profiler.stage('api_summary'):
+            self.generate_api_summary(merged_best5, out_dir)
+        with self.profiler.stage('overall_summary'):
+            self.generate_overall_summary_csv(merged_best5, out_dir)
 
         return True  # Process Successful
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze Class X result PDFs.')
+    parser.add_argument('pdf_files', nargs='*',
+                        help='PDF files to analyze (defaults to every PDF in data/class_10)')
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help='Write a cProfile dump of the run to PATH')
+    parser.add_argument('--result-file', metavar='PATH',
+                        help='Write the JSON result document to PATH')
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help='Directory for the generated CSV files')
+    parser.add_argument('--backend', choices=['auto', 'pdfplumber', 'pdfium', 'poppler'],
+                        help='Text extraction backend (default: $RESULT_TEXT_BACKEND or auto)')
+    parser.add_argument('--extraction', choices=['text', 'template'], default='text',
+                        help='Parse the full page text, or read the fixed regions of a layout template')
+    parser.add_argument('--template', metavar='PATH',
+                        help='Declared layout template (JSON) for --extraction template; learned when omitted')
+    parser.add_argument('--progress-file', metavar='PATH',
+                        help='Append JSON progress events (stage, pages, students) to PATH while running')
+    parser.add_argument('--duplicates', choices=POLICIES, default=POLICY_LATEST,
+                        help='Roll number seen again with other marks: newest file wins (latest), '
+                             'highest mark per subject (max), or keep the first and flag it (flag)')
+    parser.add_argument('--grading-policy', type=int, metavar='VERSION',
+                        help='Grading policy version for the API (default: the latest)')
+    parser.add_argument('--year', metavar='YYYY-YYYY',
+                        help='Academic year of every PDF (default: taken from each file name)')
+    return parser.parse_args(argv)
+
 def main():
-    try:
-        analyzer = ResultAnalyzer10th()
-        success = analyzer.process_all()
-        if success:
-            print("Successful")
-        else:
-            print("No Data Found")
-    except Exception as e:
-        print(f"Error: {e}")
+    args = parse_args()
+    analyzer = ResultAnalyzer10th(
+        cprofile_path=args.cprofile,
+        text_backend=args.backend,
+        extraction=args.extraction,
+        template_path=args.template,
+        progress_path=args.progress_file,
+        duplicate_policy=args.duplicates,
+        academic_year=args.year,
+        grading_policy=args.grading_policy,
+    )
+    result = result_contract.run_analyzer(analyzer, 'class_10', args.pdf_files, args.output_dir)
+    if args.result_file:
+        result_contract.write_result(result, args.result_file)
+    if result['status'] == result_contract.STATUS_SUCCESS:
+        print("Successful")
+    elif result['status'] == result_contract.STATUS_NO_DATA:
+        print("No Data Found")
+    else:
+        print(f"Error: {result['error']}", file=sys.stderr)
+    return result_contract.exit_code(result)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
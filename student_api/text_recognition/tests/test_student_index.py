@@ -0,0 +1,82 @@
+"""
+Duplicate roll numbers in ``analyzer_common.student_index``: repeats of a
+student are resolved with the conflict policy, other students sharing a
+roll number are all kept.
+"""
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+from analyzer_common.student_index import (  # noqa: E402
+    KEPT_BOTH, POLICY_FLAG, POLICY_LATEST, POLICY_MAX, StudentIndex, name_key,
+)
+
+
+def record(name, marks, source='a.pdf', version=0, roll='101'):
+    return {'year': '2025-2026', 'roll': roll, 'name': name, 'marks': marks,
+            'source': source, 'stream': '', 'version': version}
+
+
+def index_of(policy, *records):
+    index = StudentIndex('class_10', policy)
+    for item in records:
+        index.add(item)
+    return index
+
+
+def test_name_key_drops_the_gender_line_spacing_and_case():
+    assert name_key('Aarav  Rajesh Mehta\nM') == 'AARAV RAJESH MEHTA'
+    assert name_key(' aarav rajesh\tmehta ') == 'AARAV RAJESH MEHTA'
+
+
+def test_identical_repeat_is_counted_once():
+    index = index_of(POLICY_LATEST, record('AARAV', {'184': 80}), record('Aarav\nM', {'184': 80}, 'b.pdf'))
+    assert len(index) == 1
+    assert index.report()['duplicates'] == 1
+    assert index.report()['conflicts'] == 0
+
+
+def test_latest_keeps_the_newest_source():
+    index = index_of(POLICY_LATEST, record('AARAV', {'184': 90}, 'new.pdf', version=2),
+                     record('AARAV', {'184': 70}, 'old.pdf', version=1))
+    [kept] = index.records()
+    assert kept['marks'] == {'184': 90}
+    assert kept['source'] == 'new.pdf'
+    assert index.report()['collisions'][0]['resolution'] == POLICY_LATEST
+
+
+def test_max_keeps_the_higher_mark_of_each_subject():
+    index = index_of(POLICY_MAX, record('AARAV', {'184': 90, '041': 40}),
+                     record('AARAV', {'184': 60, '041': 75, '086': 50}, 'b.pdf'))
+    [kept] = index.records()
+    assert kept['marks'] == {'184': 90, '041': 75, '086': 50}
+
+
+def test_flag_keeps_the_first_result_and_attaches_the_others():
+    index = index_of(POLICY_FLAG, record('AARAV', {'184': 90}), record('AARAV', {'184': 60}, 'b.pdf'))
+    [kept] = index.records()
+    assert kept['marks'] == {'184': 90}
+    assert kept['conflicts'] == [{'source': 'b.pdf', 'name': 'AARAV', 'marks': {'184': 60}}]
+    assert index.report()['conflicts'] == 1
+
+
+@pytest.mark.parametrize('policy', [POLICY_LATEST, POLICY_MAX, POLICY_FLAG])
+def test_different_names_under_one_roll_are_both_kept(policy):
+    index = index_of(policy, record('VIJAY VILAS DEV', {'184': 55}),
+                     record('AARAV RAJESH MEHTA', {'184': 72}, 'b.pdf'))
+    assert sorted(item['name'] for item in index.records()) == ['AARAV RAJESH MEHTA', 'VIJAY VILAS DEV']
+    report = index.report()
+    assert (report['students'], report['conflicts'], report['shared_rolls']) == (2, 0, 1)
+    assert report['collisions'][0]['resolution'] == KEPT_BOTH
+    assert report['collisions'][0]['names'] == ['VIJAY VILAS DEV', 'AARAV RAJESH MEHTA']
+
+
+def test_policy_still_applies_to_a_repeat_of_a_student_sharing_a_roll():
+    index = index_of(POLICY_MAX, record('VIJAY', {'184': 55}), record('AARAV', {'184': 72}, 'b.pdf'),
+                     record('AARAV', {'184': 80}, 'c.pdf'))
+    marks = {item['name']: item['marks'] for item in index.records()}
+    assert marks == {'VIJAY': {'184': 55}, 'AARAV': {'184': 80}}
+    assert (index.report()['conflicts'], index.report()['shared_rolls']) == (1, 1)
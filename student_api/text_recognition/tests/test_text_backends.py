@@ -0,0 +1,36 @@
+"""
+Every installed text extraction backend must parse the sample PDFs in
+``data/`` into the same students as the reference ``pdfplumber`` backend.
+"""
+import glob
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+from analyzer_common.text_backends import available_backends  # noqa: E402
+from check_backends import DATA_DIR, REFERENCE, parse_students  # noqa: E402
+
+SAMPLE_PDFS = sorted(glob.glob(os.path.join(DATA_DIR, '*', '*.pdf')))
+BACKENDS = [backend for backend in available_backends() if backend != REFERENCE]
+
+_reference = {}
+
+
+def reference_students(pdf_path):
+    if pdf_path not in _reference:
+        _reference[pdf_path] = parse_students(pdf_path, REFERENCE)[0]
+    return _reference[pdf_path]
+
+
+@pytest.mark.skipif(REFERENCE not in available_backends(), reason=f'{REFERENCE} is not installed')
+@pytest.mark.skipif(not BACKENDS, reason='no backend besides the reference is installed')
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('pdf_path', SAMPLE_PDFS, ids=os.path.basename)
+def test_backend_matches_reference(pdf_path, backend):
+    reference = reference_students(pdf_path)
+    assert reference, f'{REFERENCE} found no students in {pdf_path}'
+    records, _ = parse_students(pdf_path, backend)
+    assert records == reference
@@ -23,15 +23,25 @@ urlpatterns = [
     path('', views.login, name='login'),  # Login page as landing page
     path('verify-otp/', views.verify_otp, name='verify_otp'),
     path('resend-otp/', views.resend_otp, name='resend_otp'),
+    path('forget-device/', views.forget_device, name='forget_device'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('logout/', views.logout, name='logout'),
     path('download-report/', views.download_report, name='download_report'),
+    path('downloads/', views.list_downloads, name='list_downloads'),
+    path('downloads/<str:output_set>.zip', views.download_archive, name='download_archive'),
+    path('downloads/<str:output_set>/<path:path>', views.download_file, name='download_file'),
     path('upload-results/', views.upload_results, name='upload_results'),
     path('view-charts/', views.view_charts, name='view_charts'),
     path('results-view/', views.results_view, name='results_view'),
+    path('api/results/', views.results_api_view, name='results_api'),
+    path('api/students/search/', views.search_students, name='search_students'),
+    path('compare/', views.compare_results, name='compare_results'),
     path('process-pdf/', views.process_pdf, name='process_pdf'),
+    path('process-pdf/<str:job_id>/events/', views.analyzer_events, name='analyzer_events'),
+    path('process-pdf/<str:job_id>/cancel/', views.cancel_analyzer, name='cancel_analyzer'),
     path('get-pdf-files/', views.get_pdf_files_list, name='get_pdf_files'),
     path('delete-pdf/', views.delete_pdf, name='delete-pdf'),
     path('forgot-password/', views.forgot_password, name='forgot_password'),
     path('reset-password/', views.reset_password, name='reset_password'),
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
+from django.contrib.auth import aauthenticate, alogin, login as auth_login, logout as auth_logout
 from django.contrib.auth.hashers import make_password
 from django.views.decorators.csrf import csrf_exempt
 # --- Password Reset Views ---
@@ -63,6 +63,8 @@ def reset_password(request):
         user.save()
         # Delete all OTPs for this user
         otp_objs.delete()
+        # A new password also ends every remembered device
+        devices.revoke_all(user)
         return JsonResponse({'success': True, 'message': 'Password reset successful. You can now log in.'})
     except User.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'User not found.'})
@@ -74,10 +76,14 @@ from django.contrib import messages
 from django.core.mail import send_mail
 from django.conf import settings
 from .models import OTP
+from asgiref.sync import sync_to_async
 from django.urls import reverse
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+import asyncio
 import json
 import logging
+import time
 import traceback
 from django.core.files.storage import FileSystemStorage
 import os
@@ -85,10 +91,18 @@ from datetime import datetime
 import subprocess
 import sys
 from django.views.decorators.csrf import csrf_exempt
+from . import archive, comparison, devices, downloads, jobs, results_api, student_search
+from .metrics import REGISTRY
+from analyzer_common.naming import infer_year  # noqa: E402  (jobs puts the analyzer sources on sys.path)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Blocking calls used by the async views. Mail goes out on an executor thread;
+# templates render on the sync thread because they read the session and user.
+asend_mail = sync_to_async(send_mail, thread_sensitive=False)
+arender = sync_to_async(render)
+
 def get_academic_years():
     """Generate a list of academic years including past years"""
     current_year = datetime.now().year
@@ -105,9 +119,9 @@ def get_academic_years():
     years.sort(key=lambda x: x['value'], reverse=True)
     return years
 
-def login(request):
+async def login(request):
     # If user is already logged in, redirect to dashboard
-    if request.user.is_authenticated:
+    if (await request.auser()).is_authenticated:
         return redirect('dashboard')
 
     if request.method == 'POST':
@@ -120,9 +134,17 @@ def login(request):
         # Log the login attempt
         logger.info(f"Login attempt for username: {username}")
         
-        user = authenticate(request, username=username, password=password)
+        user = await aauthenticate(request, username=username, password=password)
         
         if user is not None and user.is_active:  # Allow any active user to login
+            # A browser trusted after an earlier OTP check goes straight in
+            if await devices.arecognise(request, user):
+                await alogin(request, user)
+                logger.info(f"Login from a trusted device for user {username}")
+                if is_ajax:
+                    return JsonResponse({'success': True, 'redirect_url': reverse('dashboard')})
+                return redirect('dashboard')
+
             try:
                 # Check if user has an email
                 if not user.email:
@@ -133,16 +155,16 @@ def login(request):
                             'message': 'No email address associated with this account. Please contact admin.'
                         })
                     messages.error(request, 'No email address associated with this account. Please contact admin.')
-                    return render(request, 'login.html')
+                    return await arender(request, 'login.html')
 
                 # Generate and send OTP
                 try:
-                    otp = OTP.generate_otp(user)
+                    otp = await OTP.agenerate_otp(user)
                     logger.info(f"Generated OTP for user {username}")
 
                     # Send OTP via email
                     logger.info(f"Attempting to send OTP email to {user.email}")
-                    send_mail(
+                    await asend_mail(
                         'Your OTP for Student API Login',
                         f'Your OTP is: {otp}\nThis OTP will expire in 5 minutes.',
                         settings.DEFAULT_FROM_EMAIL,
@@ -152,7 +174,7 @@ def login(request):
                     logger.info(f"Successfully sent OTP email to {user.email}")
                     
                     # Store user ID in session for OTP verification
-                    request.session['user_id_for_otp'] = user.id
+                    await request.session.aset('user_id_for_otp', user.id)
                     
                     if is_ajax:
                         return JsonResponse({
@@ -171,7 +193,7 @@ def login(request):
                             'message': 'Error sending OTP. Please try again later.'
                         })
                     messages.error(request, 'Error sending OTP. Please try again later.')
-                    return render(request, 'login.html')
+                    return await arender(request, 'login.html')
                     
             except Exception as e:
                 logger.error(f"Error in login process: {str(e)}")
@@ -182,7 +204,7 @@ def login(request):
                         'message': 'An error occurred during login. Please try again.'
                     })
                 messages.error(request, 'An error occurred during login. Please try again.')
-                return render(request, 'login.html')
+                return await arender(request, 'login.html')
         else:
             logger.warning(f"Failed login attempt for username: {username}")
             if is_ajax:
@@ -191,9 +213,9 @@ def login(request):
                     'message': 'Invalid credentials, inactive user, or insufficient permissions.'
                 })
             messages.error(request, 'Invalid credentials, inactive user, or insufficient permissions.')
-            return render(request, 'login.html')
+            return await arender(request, 'login.html')
     
-    return render(request, 'login.html')
+    return await arender(request, 'login.html')
 
 def verify_otp(request):
     # If user is already logged in, redirect to dashboard
@@ -223,11 +245,15 @@ def verify_otp(request):
                 request.session.pop('user_id_for_otp', None)
                 otp_obj.delete()
                 if is_ajax:
-                    return JsonResponse({
+                    response = JsonResponse({
                         'success': True,
                         'redirect_url': reverse('dashboard')
                     })
-                return redirect('dashboard')
+                else:
+                    response = redirect('dashboard')
+                if request.POST.get('remember_device'):
+                    devices.trust(request, response, user)
+                return response
             else:
                 if is_ajax:
                     return JsonResponse({
@@ -252,9 +278,9 @@ def verify_otp(request):
         'message': 'Invalid request method.'
     })
 
-def resend_otp(request):
+async def resend_otp(request):
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-    user_id = request.session.get('user_id_for_otp')
+    user_id = await request.session.aget('user_id_for_otp')
     
     if not user_id:
         if is_ajax:
@@ -265,11 +291,11 @@ def resend_otp(request):
         return redirect('login')
     
     try:
-        user = User.objects.get(id=user_id)
-        otp = OTP.generate_otp(user)
+        user = await User.objects.aget(id=user_id)
+        otp = await OTP.agenerate_otp(user)
         
         # Send new OTP via email
-        send_mail(
+        await asend_mail(
             'Your New OTP for Student API Login',
             f'Your new OTP is: {otp}\nThis OTP will expire in 5 minutes.',
             settings.DEFAULT_FROM_EMAIL,
@@ -302,31 +328,107 @@ def download_report(request):
     # TODO: Implement report download logic
     return render(request, 'download_report.html')
 
+@login_required
+def list_downloads(request):
+    """Files of each output set, with their download URLs."""
+    output_sets = {}
+    for output_set in downloads.OUTPUT_SETS:
+        output_sets[output_set] = {
+            'archive': reverse('download_archive', args=[output_set]),
+            'files': [
+                {'path': relative_path, 'size': stat.st_size,
+                 'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds'),
+                 'url': reverse('download_file', args=[output_set, relative_path])}
+                for relative_path, path, stat in downloads.list_files(output_set)
+            ],
+        }
+    return JsonResponse({'status': 'success', 'output_sets': output_sets})
+
+@login_required
+def download_file(request, output_set, path):
+    """One output file, with ETag and Range support."""
+    return downloads.file_response(request, output_set, path)
+
+@login_required
+def download_archive(request, output_set):
+    """Every file of an output set as a zip streamed while it is built."""
+    return downloads.archive_response(output_set)
+
 def get_pdf_files(directory):
-    """Get list of PDF files from a directory."""
+    """Get list of PDF files from a directory, including the archived ones."""
+    files = []
     try:
         if os.path.exists(directory):
-            return [f for f in os.listdir(directory) if f.endswith('.pdf')]
+            files = [f for f in os.listdir(directory) if f.endswith('.pdf')]
     except Exception as e:
         print(f"Error reading directory {directory}: {str(e)}")
-    return []
+    files.extend(os.path.basename(path) for path, _ in archive.archived_files(directory) if path.endswith('.pdf'))
+    return files
+
+async def list_existing_pdfs():
+    """PDF files of every class, with the directory reads run off the event loop."""
+    base_dir = os.path.join('student_api', 'text_recognition', 'data')
+    class_names = ['class_10', 'class_12_science', 'class_12_commerce', 'class_12_humanities']
+    listings = await asyncio.gather(*(
+        asyncio.to_thread(get_pdf_files, os.path.join(base_dir, class_name)) for class_name in class_names
+    ))
+    return dict(zip(class_names, listings))
+
+def triage_upload(file, class_name):
+    """Pre-flight report for an uploaded PDF bound for the ``class_name`` data folder."""
+    if hasattr(file, 'temporary_file_path'):
+        source = file.temporary_file_path()
+    else:
+        # Small uploads are held in memory
+        file.seek(0)
+        source = file.read()
+        file.seek(0)
+    return jobs.triage_pdf(source, 'class_10' if class_name == 'class_10' else 'class_12_all')
+
+def describe_triage(triage):
+    """' (12 pages, about 4 s to process)' for an accepted PDF."""
+    if triage['pages'] is None:
+        return ''
+    return f" ({triage['pages']} pages, about {round(triage['estimated_seconds'])} s to process)"
+
+def save_uploaded_pdf(file, dir_path, academic_year):
+    """Replace the PDFs in ``dir_path`` with ``file``; returns (filename, path)."""
+    # Delete existing files in the directory
+    for existing_file in os.listdir(dir_path):
+        if existing_file.endswith('.pdf'):
+            try:
+                os.remove(os.path.join(dir_path, existing_file))
+                logger.info(f"Deleted old file: {existing_file}")
+            except Exception as e:
+                logger.error(f"Error deleting file {existing_file}: {str(e)}")
+    archive.forget(path for path, _ in archive.archived_files(dir_path) if path.endswith('.pdf'))
+
+    # Create timestamp for unique filename
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{academic_year}_{timestamp}_{file.name}"
+    
+    # Full path for file storage
+    file_path = os.path.join(dir_path, filename)
+    
+    # Ensure directory exists
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    
+    # Save file
+    with open(file_path, 'wb+') as destination:
+        for chunk in file.chunks():
+            destination.write(chunk)
+    return filename, file_path
 
 @login_required
-def upload_results(request):
+async def upload_results(request):
     # Get existing PDFs for each class
-    base_dir = os.path.join('student_api', 'text_recognition', 'data')
-    existing_pdfs = {
-        'class_10': get_pdf_files(os.path.join(base_dir, 'class_10')),
-        'class_12_science': get_pdf_files(os.path.join(base_dir, 'class_12_science')),
-        'class_12_commerce': get_pdf_files(os.path.join(base_dir, 'class_12_commerce')),
-        'class_12_humanities': get_pdf_files(os.path.join(base_dir, 'class_12_humanities'))
-    }
+    existing_pdfs = await list_existing_pdfs()
 
     if request.method == 'POST':
         academic_year = request.POST.get('academic_year')
         if not academic_year:
             messages.error(request, 'Please provide the Academic Year')
-            return render(request, 'upload_results.html', {
+            return await arender(request, 'upload_results.html', {
                 'existing_pdfs': existing_pdfs,
                 'academic_years': get_academic_years()
             })
@@ -342,7 +444,7 @@ def upload_results(request):
 
         # Create directories if they don't exist
         for _, dir_path in class_dirs.values():
-            os.makedirs(dir_path, exist_ok=True)
+            await asyncio.to_thread(os.makedirs, dir_path, exist_ok=True)
 
         files_uploaded = False
         results = {}
@@ -352,40 +454,31 @@ def upload_results(request):
             if field_name in request.FILES:
                 files_uploaded = True
                 file = request.FILES[field_name]
+                label = field_name.replace("_file", "").replace("_", " ").title()
                 
                 try:
-                    # Delete existing files in the directory
-                    for existing_file in os.listdir(dir_path):
-                        if existing_file.endswith('.pdf'):
-                            try:
-                                os.remove(os.path.join(dir_path, existing_file))
-                                logger.info(f"Deleted old file: {existing_file}")
-                            except Exception as e:
-                                logger.error(f"Error deleting file {existing_file}: {str(e)}")
-
-                    # Create timestamp for unique filename
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f"{academic_year}_{timestamp}_{file.name}"
-                    
-                    # Full path for file storage
-                    file_path = os.path.join(dir_path, filename)
-                    
-                    # Ensure directory exists
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    
-                    # Save file
-                    with open(file_path, 'wb+') as destination:
-                        for chunk in file.chunks():
-                            destination.write(chunk)
+                    # Reject scans, encrypted and wrong-class PDFs before storing them
+                    triage = await asyncio.to_thread(triage_upload, file, class_name)
+                    if not triage['ok']:
+                        results[field_name] = {
+                            'status': 'Rejected',
+                            'triage': triage
+                        }
+                        messages.error(request, f'File rejected for {label}: {triage["message"]}')
+                        continue
+
+                    # Disk writes run on a worker thread, off the event loop
+                    filename, file_path = await asyncio.to_thread(save_uploaded_pdf, file, dir_path, academic_year)
                     
                     # Store results
                     results[field_name] = {
                         'status': 'Success',
                         'filename': filename,
-                        'path': file_path
+                        'path': file_path,
+                        'triage': triage
                     }
                     
-                    messages.success(request, f'File uploaded successfully for {field_name.replace("_file", "").replace("_", " ").title()}')
+                    messages.success(request, f'File uploaded successfully for {label}{describe_triage(triage)}')
                     
                 except Exception as e:
                     results[field_name] = {
@@ -397,13 +490,13 @@ def upload_results(request):
         if not files_uploaded:
             messages.error(request, 'Please upload at least one file')
         
-        return render(request, 'upload_results.html', {
+        return await arender(request, 'upload_results.html', {
             'existing_pdfs': existing_pdfs,
             'academic_years': get_academic_years()
         })
 
     # For GET requests, show upload form with existing PDFs
-    return render(request, 'upload_results.html', {
+    return await arender(request, 'upload_results.html', {
         'existing_pdfs': existing_pdfs,
         'academic_years': get_academic_years()
     })
@@ -413,6 +506,60 @@ def view_charts(request):
     # TODO: Implement charts view logic
     return render(request, 'view_charts.html')
 
+@login_required
+def compare_results(request):
+    """
+    Year-over-year comparisons of the stored results as JSON; ``query`` is
+    trend, delta, rank or cohort (see ``comparison``).
+    """
+    params = request.GET
+    query = params.get('query', 'trend')
+    policy = params.get('policy') or None
+    try:
+        if query == 'trend':
+            data = comparison.trend(params.get('class', 'class_10'), params.get('metric', 'api'),
+                                    subject=params.get('subject') or None, stream=params.get('stream'),
+                                    policy_version=policy)
+        elif query == 'delta':
+            data = comparison.delta(params.get('class', 'class_10'), params.get('from'), params.get('to'),
+                                    by=params.get('by', 'subject'), metric=params.get('metric', 'api'),
+                                    policy_version=policy)
+        elif query == 'rank':
+            data = comparison.rank(params.get('class', 'class_10'), params.get('year'),
+                                   by=params.get('by', 'subject'), metric=params.get('metric', 'api'),
+                                   subject=params.get('subject') or None, policy_version=policy)
+        elif query == 'cohort':
+            data = comparison.cohort(params.get('year'), params.get('xii_year') or None, policy_version=policy)
+        else:
+            return JsonResponse({'status': 'error', 'message': f'Unknown query {query!r}.'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', 'data_version': comparison.data_version(), 'result': data})
+
+@login_required
+def results_api_view(request):
+    """
+    Stored student results as JSON, one keyset page at a time; see
+    ``results_api.page`` for the query parameters.
+    """
+    try:
+        data = results_api.page(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return results_api.compress(request, JsonResponse({'status': 'success', **data}))
+
+@login_required
+def search_students(request):
+    """Typeahead over the stored students: ``q`` is a name or roll number, complete or not."""
+    params = request.GET
+    try:
+        limit = int(params.get('limit') or student_search.DEFAULT_LIMIT)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'limit must be a whole number.'}, status=400)
+    results = student_search.search(params.get('q', ''), limit,
+                                    year=params.get('year') or None, class_name=params.get('class') or None)
+    return JsonResponse({'status': 'success', 'results': results})
+
 @login_required
 def results_view(request):
     """Display the results of file processing."""
@@ -425,6 +572,19 @@ def results_view(request):
     }
     return render(request, 'results_view.html', context)
 
+@login_required
+def forget_device(request):
+    """Stop trusting this browser, or with ``all`` every browser of the user."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method.'}, status=405)
+    if request.POST.get('all'):
+        revoked = devices.revoke_all(request.user)
+    else:
+        revoked = devices.revoke(request)
+    response = JsonResponse({'success': True, 'revoked': revoked})
+    response.delete_cookie(devices.COOKIE_NAME, samesite='Lax')
+    return response
+
 def logout(request):
     # Clear any session data
     request.session.flush()
@@ -433,17 +593,15 @@ def logout(request):
     return redirect('login')
 
 @login_required
-def process_pdf(request):
+async def process_pdf(request):
     if request.method == 'POST':
         class_name = request.POST.get('class_name')
         file_name = request.POST.get('file_name')
         
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         if class_name == 'class_10':
-            analyzer_path = os.path.abspath(os.path.join(base_dir, 'student_api', 'text_recognition', 'src', 'class_10', 'test10th.py'))
             pdf_path = os.path.abspath(os.path.join(base_dir, 'student_api', 'text_recognition', 'data', 'class_10', file_name))
             pdf_files = [pdf_path]
-            analyzer_args = [sys.executable, analyzer_path] + pdf_files
         elif class_name == 'class_12_all':
             # Parse file_name from JSON string to dict
             try:
@@ -453,7 +611,6 @@ def process_pdf(request):
                     'status': 'error',
                     'message': 'Invalid file_name format for class_12_all.'
                 })
-            analyzer_path = os.path.abspath(os.path.join(base_dir, 'student_api', 'text_recognition', 'src', 'class_12', 'test12th.py'))
             pdf_files = []
             if file_name_dict.get('science'):
                 pdf_science = os.path.abspath(os.path.join(base_dir, 'student_api', 'text_recognition', 'data', 'class_12_science', file_name_dict['science']))
@@ -469,70 +626,75 @@ def process_pdf(request):
                     'status': 'error',
                     'message': 'No valid Class XII PDF files found to process.'
                 })
-            analyzer_args = [sys.executable, analyzer_path] + pdf_files
         else:
             return JsonResponse({
                 'status': 'error',
                 'message': 'Processing not implemented for this class yet'
             })
+        # One run stores every student under one academic year, taken from
+        # the file names (upload_results prefixes them with it)
+        years = {infer_year(pdf) for pdf in pdf_files}
+        if None in years:
+            unnamed = [os.path.basename(pdf) for pdf in pdf_files if infer_year(pdf) is None]
+            return JsonResponse({
+                'status': 'error',
+                'message': f"No academic year in the file name of {', '.join(unnamed)}; upload it again with its year."
+            })
+        if len(years) > 1:
+            return JsonResponse({
+                'status': 'error',
+                'message': f"The PDFs belong to different academic years ({', '.join(sorted(years))}); "
+                           'process each year separately.'
+            })
+        year = years.pop()
+        analyzer_args, output_dir = jobs.analyzer_run(class_name, pdf_files)
+        analyzer_path = analyzer_args[1]
 
         try:
-            if not os.path.exists(analyzer_path):
+            if not await asyncio.to_thread(os.path.exists, analyzer_path):
                 return JsonResponse({
                     'status': 'error',
                     'message': 'Result analyzer script not found'
                 })
 
             for pdf in pdf_files:
-                if not os.path.exists(pdf):
+                # Restores a PDF moved to the archive
+                if not await asyncio.to_thread(archive.ensure, pdf):
                     return JsonResponse({
                         'status': 'error',
                         'message': f'PDF file not found: {pdf}'
                     })
 
-            # Run the analyzer script with all PDFs as arguments
-            process = subprocess.Popen(
-                analyzer_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = process.communicate()
-            # Log output for debugging
-            logger.info(f"Analyzer stdout: {stdout}")
-            logger.error(f"Analyzer stderr: {stderr}")
-
-            try:
-                output_text = stdout.decode('utf-8', errors='replace')
-            except Exception as e:
-                output_text = str(stdout)
-            try:
-                error_text = stderr.decode('utf-8', errors='replace')
-            except Exception as e:
-                error_text = str(stderr)
-
-            if process.returncode == 0:
-                # Try to parse output as JSON (for API results)
-                try:
-                    api_results = json.loads(output_text)
+            # Files placed in the data folders without upload_results have
+            # not been checked yet
+            triages = await asyncio.gather(*(
+                asyncio.to_thread(jobs.triage_pdf, pdf, class_name) for pdf in pdf_files
+            ))
+            for pdf, triage in zip(pdf_files, triages):
+                if not triage['ok']:
                     return JsonResponse({
-                        'status': 'success',
-                        'message': 'PDF processing completed successfully',
-                        'api_results': api_results
-                    })
-                except Exception:
-                    # If not JSON, return raw output
-                    return JsonResponse({
-                        'status': 'success',
-                        'message': 'PDF processing completed successfully',
-                        'output': output_text
+                        'status': 'error',
+                        'message': f'{os.path.basename(pdf)}: {triage["message"]}'
                     })
-            else:
-                return JsonResponse({
-                    'status': 'error',
-                    'message': f'Error processing PDF',
-                    'output': output_text,
-                    'error': error_text
-                })
+            estimated_seconds = sum(triage['estimated_seconds'] or 0 for triage in triages)
+
+            # Run the analyzer in the background, or join the run already
+            # processing the same PDFs; the page follows its progress (and
+            # gets the result) from the analyzer_events stream
+            user = await request.auser()
+            job_id, joined = await asyncio.to_thread(
+                jobs.start_job, class_name, analyzer_args, user.id, pdf_files,
+                year, output_dir, estimated_seconds=estimated_seconds
+            )
+            return JsonResponse({
+                'status': 'started',
+                'message': 'Joined the processing already running for these PDFs' if joined else 'PDF processing started',
+                'joined': joined,
+                'estimated_seconds': estimated_seconds,
+                'job_id': job_id,
+                'events_url': reverse('analyzer_events', args=[job_id]),
+                'cancel_url': reverse('cancel_analyzer', args=[job_id])
+            })
 
         except Exception as e:
             return JsonResponse({
@@ -545,17 +707,123 @@ def process_pdf(request):
         'message': 'Invalid request method'
     })
 
+# Seconds between checks of a running job's progress file
+EVENTS_POLL_INTERVAL = 0.5
+# Idle streams get a comment line this often so proxies keep them open
+EVENTS_KEEPALIVE = 15
+
+def _sse(event, data, event_id=None):
+    """Format one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+async def analyzer_events(request, job_id):
+    """
+    Stream an analyzer job's progress as Server-Sent Events.
+
+    Sends ``progress`` events (stage, pages, students) while the job runs and
+    a final ``result`` event carrying the same body process_pdf used to
+    return. Reconnecting clients resume after their ``Last-Event-ID``.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Please log in first.'}, status=401)
+    try:
+        status = await asyncio.to_thread(jobs.read_status, job_id)
+    except ValueError:
+        status = None
+    if status is None or not await asyncio.to_thread(jobs.can_view, status, user.id):
+        return JsonResponse({'status': 'error', 'message': 'Job not found.'}, status=404)
+    try:
+        offset = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        offset = 0
+
+    last_sent = time.monotonic()
+
+    def step():
+        """One check of the job: the frames to send now, and whether the stream is over."""
+        nonlocal offset, last_sent
+        # Keeps the job alive: unwatched runs are cancelled after a grace period
+        jobs.touch_watcher(job_id)
+        # Status first: once it says finished, every event is already on disk
+        status = jobs.read_status(job_id)
+        events, offset = jobs.read_events(job_id, offset)
+        lost = False
+        if status['state'] != jobs.STATE_FINISHED and not jobs.job_active(status):
+            # The worker supervising it has died, unless it finished the job
+            # just before exiting
+            status = jobs.read_status(job_id)
+            more, offset = jobs.read_events(job_id, offset)
+            events += more
+            lost = status['state'] != jobs.STATE_FINISHED
+        frames = [_sse('progress', event, event_id) for event_id, event in events]
+        if status['state'] == jobs.STATE_FINISHED:
+            return frames + [_sse('result', status['response'])], True
+        if lost:
+            return frames + [_sse('result', jobs.analyzer_response(None, None, stop_reason=jobs.STOP_LOST))], True
+        now = time.monotonic()
+        if events:
+            last_sent = now
+        elif now - last_sent >= EVENTS_KEEPALIVE:
+            frames.append(': keepalive\n\n')
+            last_sent = now
+        return frames, False
+
+    async def stream():
+        while True:
+            frames, done = await asyncio.to_thread(step)
+            for frame in frames:
+                yield frame
+            if done:
+                return
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+
+    def stream_sync():
+        # Under WSGI Django sends an async iterator only once it is exhausted,
+        # so there the stream holds a worker thread instead
+        while True:
+            frames, done = step()
+            yield from frames
+            if done:
+                return
+            time.sleep(EVENTS_POLL_INTERVAL)
+
+    frames = stream() if isinstance(request, ASGIRequest) else stream_sync()
+    response = StreamingHttpResponse(frames, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @login_required
-def get_pdf_files_list(request):
+async def cancel_analyzer(request, job_id):
+    """Kill a running analyzer job, together with any processes it started."""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid request method.'})
+    user = await request.auser()
+    try:
+        status = await asyncio.to_thread(jobs.read_status, job_id)
+    except ValueError:
+        status = None
+    if status is None or not jobs.can_view(status, user.id):
+        return JsonResponse({'status': 'error', 'message': 'Job not found.'}, status=404)
+    if status['user_id'] != user.id:
+        # Shared runs can only be cancelled by whoever started them
+        return JsonResponse({'status': 'error', 'message': 'Processing was started by another user.'}, status=403)
+    if status['state'] == jobs.STATE_FINISHED:
+        return JsonResponse({'status': 'error', 'message': 'Processing has already finished.'})
+    await asyncio.to_thread(jobs.request_cancel, job_id)
+    return JsonResponse({'status': 'success', 'message': 'Cancelling processing.'})
+
+@login_required
+async def get_pdf_files_list(request):
     """API endpoint to get list of PDF files."""
-    base_dir = os.path.join('student_api', 'text_recognition', 'data')
-    existing_pdfs = {
-        'class_10': get_pdf_files(os.path.join(base_dir, 'class_10')),
-        'class_12_science': get_pdf_files(os.path.join(base_dir, 'class_12_science')),
-        'class_12_commerce': get_pdf_files(os.path.join(base_dir, 'class_12_commerce')),
-        'class_12_humanities': get_pdf_files(os.path.join(base_dir, 'class_12_humanities'))
-    }
-    return JsonResponse({'files': existing_pdfs})
+    return JsonResponse({'files': await list_existing_pdfs()})
 
 @csrf_exempt
 def delete_pdf(request):
@@ -576,10 +844,23 @@ def delete_pdf(request):
     if not folder:
         return JsonResponse({'status': 'error', 'message': 'Invalid class name.'})
     file_path = os.path.join(folder, file_name)
-    if not os.path.isfile(file_path):
+    archived = archive.lookup(file_path) is not None
+    if not os.path.isfile(file_path) and not archived:
         return JsonResponse({'status': 'error', 'message': 'File not found.'})
     try:
-        os.remove(file_path)
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+        if archived:
+            archive.forget([file_path])
         return JsonResponse({'status': 'success', 'message': f'{file_name} deleted successfully.'})
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': f'Error deleting file: {str(e)}'})
+
+
+def metrics(request):
+    """Expose request, database and analyzer metrics in Prometheus text format."""
+    remote_addr = request.META.get('REMOTE_ADDR')
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if remote_addr not in allowed_ips and not request.user.is_staff:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')